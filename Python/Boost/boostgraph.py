@@ -1,54 +1,44 @@
-import plotly
+import os
 import numpy as np
 import matplotlib.pyplot as plt
-import numpy as np
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import boostsim
 
-def calcBostFactors():
-    xDutyCycles = []
-    yBostFactors = []
 
+def calcBostFactors():
     maxBoost = 5
+    minActDuties = np.arange(1, 10)
+    xDutyCycles = np.arange(0, 10)
+
+    # one row per minActDuty
+    yBostFactors = boostsim.boostGrid([maxBoost], minActDuties, xDutyCycles)[0]
 
-    for minActDuty in range(1, 10):
-        isWriten = False
-        
-        for actDutyCycle in range(0, 10):
-            xDutyCycles.append(actDutyCycle)
-            
-            if(actDutyCycle < minActDuty):
-                yBostFactors.append(((1-maxBoost)/minActDuty) * actDutyCycle + maxBoost)           
-            else:
-                yBostFactors.append(1)
-                if(isWriten==False):
-                    plt.text(actDutyCycle, 1, "%d" % (minActDuty))
-                    isWriten = True
-
-        plt.text(0, 1, "minDuty")       
-        plt.title("maxBoost %d | minActDuty %d\n" % (maxBoost, minActDuty))
-        plt.plot(xDutyCycles, yBostFactors, lw=2)
+    for minActDuty in minActDuties:
+        plt.text(minActDuty, 1, "%d" % (minActDuty))
 
+    plt.text(0, 1, "minDuty")
+    plt.title("maxBoost %d | minActDuty %d..%d\n" % (maxBoost, minActDuties[0], minActDuties[-1]))
+    plt.plot(xDutyCycles, yBostFactors.T, lw=2)
 
     plt.show()
     plt.close()
 
 
 def calcDutyCycle():
-   
+
     period = 5
-    
-    for overlap in range(50, 500, 75):
-        xCycles = [0]
-        yDutyCycles = [0]
-
-        for dutyCycle in range(1, 200):        
-            xCycles.append(dutyCycle)
-            yDutyCycles.append((((period-1)*yDutyCycles[dutyCycle-1]) + overlap) / period)           
-           
-        plt.text(xCycles[int(len(xCycles)/2)], yDutyCycles[int(len(yDutyCycles)/2)], "overlap=%d" % (overlap))     
-        plt.title("overlap %d" % (overlap))
-        plt.plot(xCycles, yDutyCycles, lw=2)
+    overlaps = np.arange(50, 500, 75)
+
+    xCycles, yDutyCycles = boostsim.dutyCycleGrid(overlaps, [period], 200)
+    yDutyCycles = yDutyCycles[:, 0]
+
+    middle = int(len(xCycles)/2)
+    for overlap, curve in zip(overlaps, yDutyCycles):
+        plt.text(xCycles[middle], curve[middle], "overlap=%d" % (overlap))
+    plt.title("overlap %d..%d" % (overlaps[0], overlaps[-1]))
+    plt.plot(xCycles, yDutyCycles.T, lw=2)
 
     plt.show()
     plt.close()
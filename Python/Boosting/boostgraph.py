@@ -1,54 +1,46 @@
-import plotly
+import os
 import numpy as np
 import matplotlib.pyplot as plt
-import numpy as np
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import boostsim
 
-def calcBostFactors():
-    xDutyCycles = []
-    yBostFactors = []
 
+def calcBostFactors():
     maxBoost = 5
+    minActDuties = np.arange(1, 10)
+    xDutyCycles = np.arange(0, 10)
 
-    for minActDuty in range(1, 10):
-        isWriten = False
-        
-        for actDutyCycle in range(0, 10):
-            xDutyCycles.append(actDutyCycle)
-            
-            if(actDutyCycle < minActDuty):
-                yBostFactors.append(((1-maxBoost)/minActDuty) * actDutyCycle + maxBoost)           
-            else:
-                yBostFactors.append(1)
-                if(isWriten==False):
-                    plt.text(actDutyCycle, 1, "%d" % (minActDuty))
-                    isWriten = True
-
-        plt.text(0, 1, "minDuty")       
-        plt.title("maxBoost %d | minActDuty %d\n" % (maxBoost, minActDuty))
-        plt.plot(xDutyCycles, yBostFactors, lw=2)
+    # one row per minActDuty
+    yBostFactors = boostsim.boostGrid([maxBoost], minActDuties, xDutyCycles)[0]
 
+    for minActDuty in minActDuties:
+        plt.text(minActDuty, 1, "%d" % (minActDuty))
+
+    plt.text(0, 1, "minDuty")
+    plt.title("maxBoost %d | minActDuty %d..%d\n" % (maxBoost, minActDuties[0], minActDuties[-1]))
+    plt.plot(xDutyCycles, yBostFactors.T, lw=2)
 
     plt.show()
     plt.close()
 
 
 def calcDutyCycle():
-   
+
     #period = 5
-    for period in range(1, 1000, 100):
-        for overlap in range(50, 150, 50):
-            xCycles = [0]
-            yDutyCycles = [0]
-
-            for dutyCycle in range(1, 200):        
-                xCycles.append(dutyCycle)
-                yDutyCycles.append((((period-1)*yDutyCycles[dutyCycle-1]) + overlap) / period)           
-            
-            plt.text(xCycles[int(len(xCycles)/2)], yDutyCycles[int(len(yDutyCycles)/2)], "o,p=(%d,%d)" % (overlap, period))     
-            plt.title("overlap %d" % (overlap))
-            plt.plot(xCycles, yDutyCycles, lw=2)
+    periods = np.arange(1, 1000, 100)
+    overlaps = np.arange(50, 150, 50)
+
+    # all (overlap, period) curves at once, shape (overlaps, periods, cycles)
+    xCycles, yDutyCycles = boostsim.dutyCycleGrid(overlaps, periods, 200)
+
+    middle = int(len(xCycles)/2)
+    for i, overlap in enumerate(overlaps):
+        for j, period in enumerate(periods):
+            plt.text(xCycles[middle], yDutyCycles[i, j, middle], "o,p=(%d,%d)" % (overlap, period))
+    plt.title("overlap %d..%d" % (overlaps[0], overlaps[-1]))
+    plt.plot(xCycles, yDutyCycles.reshape(-1, len(xCycles)).T, lw=2)
 
     plt.show()
     plt.close()
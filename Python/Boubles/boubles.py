@@ -5,14 +5,15 @@
 ############################################
 
 
-import plotly
+import os
 import sys
-plotly.__version__
 import numpy as np
-import plotly.plotly as py
-import plotly.tools as tls
+import matplotlib.colors
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import valueio
+
 if len(sys.argv) <= 2:
     print("WARNING: Start with argumnet. I.E.: 'python bubles.py title, data1, .\dataFile1.txt, data2, .\dataFile2.txt'")
     print("'python bubbles.py <title> <Number of Points on X>, <name of data> <data file1>,.., <name of data> <data file N>")
@@ -32,42 +33,39 @@ for x in range(2, len(sys.argv)):
 
 bubbles_mpl = plt.figure()
 
-delimiter = ","
 bubleSize = 10
+# Files with more points are drawn as one image pixel per point.
+maxScatterPoints = 100000
+colors = matplotlib.colors.to_rgba_array(['blue','green', 'red', 'black'])
 
 yScale = 1
 i = 0
 for f in data:  
     fileName = f[1]
-    lines = open(fileName, 'r')
-
-    colors = ['blue','green', 'red', 'black']
-
-    for line in lines:
-
-        if(line != '\n' ):
-            numbers = []
-            tokens = line.split(delimiter)
-            for token in tokens:
-                if( token.strip()):
-                    numbers.append(float(token))
-            
-            y = 0 + yScale * i
-            #plt.annotate("%01d" % (i-1), xy=(-25, y))
-            yVals = np.empty(len(numbers))
-            yVals.fill(y)   
 
-            boubleSizes = []
-            boubleSizes = np.empty(len(numbers))
-            boubleSizes.fill(bubleSize)   
-
-            clr = [colors[i%4] for num in numbers]
-
-            plt.scatter(numbers,yVals, s=boubleSizes, c= clr)
-            i=i+1
+    # Points of all lines of the file, drawn by one scatter.
+    firstLine = i
+    xVals = []
+    lineIndices = []
+    with open(fileName, 'rb') as lines:
+        for line in lines:
+            if(line != b'\n' ):
+                numbers = valueio.parseValues(line)
+                xVals.append(numbers)
+                lineIndices.append(np.full(len(numbers), i))
+                i=i+1
+
+    if len(xVals) > 0:
+        lineIndices = np.concatenate(lineIndices)
+        xVals = np.concatenate(xVals)
+        isInteger = len(xVals) > 0 and np.all(xVals >= 0) and np.all(xVals == np.floor(xVals))
+        if len(xVals) > maxScatterPoints and isInteger:
+            image = np.zeros((i - firstLine, int(xVals.max()) + 1, 4))
+            image[lineIndices - firstLine, xVals.astype(np.int64)] = colors[lineIndices % 4]
+            plt.imshow(image, origin='lower', aspect='auto', interpolation='nearest',
+                       extent=(-0.5, image.shape[1] - 0.5,
+                               yScale * (firstLine - 0.5), yScale * (i - 0.5)))
+        else:
+            plt.scatter(xVals, 0 + yScale * lineIndices, s=bubleSize, c=colors[lineIndices % 4])
 
     plt.show()
-
-    
-
-    
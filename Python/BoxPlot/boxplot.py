@@ -4,75 +4,164 @@
 # python Title ./BoxPlot/boxplot.py ./BoxPlot/data.csv
 # python ./boxplot.py "Many messages, Page=5000, Single device" "./query 5000 large results.txt" "./query 5000 large results.png"
 # python "BoxPlot/boxplot.py" "Title" "BoxPlot/SpatialPoolerInitTimeNoAkka.txt" "BoxPlot/Spatial Pooler init.png" "xLabel" "yLabel"
+# Quantile sketches instead of all samples (-s), merged with the runs of other machines and saved for later merges:
+# python "BoxPlot/boxplot.py" "Messages" "BoxPlot/mongo messages per second.txt" "mps.png" "Messages" "per second" -s -m machine2.txt machine3.json -ss all.json
+# Data files parsed once and then loaded from the binary cache (see sdrcache.py):
+# python "BoxPlot/boxplot.py" "Messages" "BoxPlot/mongo messages per second.txt" "mps.png" "Messages" "per second" -c
 ########################################################################################
 
 
-import plotly.plotly as py
+import argparse
+import collections
+import itertools
+import os
 import matplotlib.pyplot as plt
-import plotly.tools as tls
 import numpy as np
-import plotly
-import csv
 import sys
-plotly.__version__
 
-delimiter = "|"
-
-if len(sys.argv) <= 3:
-    print("WARNING: Invalid arguments.")
-    print("python create-histogram.py <title> <CSV file with data> <output picture name>")
-    print("python ./boxplot.py title ./boxplotsample.txt ./figure1.png" "xLabel" "yLabel")
-    print("File example:")
-    print("100 | 1 | 21.5 | 24.5 | 2 | 4 | 5 | 6 | 7 | 7 | 9 ")
-    print("First number is number on X axiss.")
-    sys.argv = "./BoxPlot/boxplot.py", "sample graph", "./BoxPlot/boxplotsample.txt", "./figure.png", "xLabel", "yLabel"
-
-print(sys.argv)
-
-fileName = sys.argv[2]
-
-lines = open(fileName, 'r')
-
-data = []
-titles = []
-minimum = sys.float_info.max
-positions = []
-
-for line in lines:
-    tokenCnt = 0
-    numbers = []
-    tokens = line.split(delimiter)
-
-    for token in tokens:
-        if tokenCnt == 0:
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import quantsketch
+import sdrcache
+import valueio
+
+delimiter = b"|"
+
+
+def iterSeriesBlocks(fileName, blockSize=1 << 22):
+    """
+    Streams the values of a data file in blocks of about blockSize bytes, so
+    also a single very long series never has to fit in memory.
+
+    @return generator of (lineIndex, title, values), long lines give several
+            blocks with the same lineIndex and title
+    """
+    current = None
+    title = None
+    for lineIndex, data in valueio.iterLineBlocks(fileName, delimiter, blockSize):
+        if lineIndex != current:
+            if len(data.strip()) == 0:
+                continue
+            current = lineIndex
             # first word is title of sequence.
-            titles.append(token)
-            #positions.append(int(token))
+            title, _, data = data.partition(delimiter)
+            title = title.decode()
+        yield lineIndex, title, valueio.parseValues(data.replace(delimiter, b' '))
+
+
+def iterCachedBlocks(fileName, blockValues=1 << 19):
+    """
+    Same as iterSeriesBlocks, the series are read from the memory mapped binary
+    cache (see sdrcache.py), which is built on the first call.
+    """
+    table = sdrcache.loadTable(fileName, delimiter.decode(), labelColumn=True)
+    for row, title in enumerate(table.labels):
+        start, stop = int(table.offsets[row]), int(table.offsets[row + 1])
+        for blockStart in range(start, max(stop, start + 1), blockValues):
+            yield row, str(title), np.asarray(table.values[blockStart:min(blockStart + blockValues, stop)])
+
+
+def seriesBlocks(fileName, useCache=False):
+    return iterCachedBlocks(fileName) if useCache else iterSeriesBlocks(fileName)
+
+
+def iterSeries(fileName, useCache=False):
+    """
+    Streams the lines of a data file as (title, values) tuples.
+    """
+    for _, blocks in itertools.groupby(seriesBlocks(fileName, useCache), key=lambda block: block[0]):
+        blocks = list(blocks)
+        yield blocks[0][1], np.concatenate([values for _, _, values in blocks])
+
+
+def readSketches(fileNames, relativeAccuracy, useCache=False):
+    """
+    Summarizes every series of the data files in a quantile sketch. Series with
+    the same title are merged, also across files. Files ending with .json
+    contain sketches saved with --savesketch.
+    """
+    sketches = collections.OrderedDict()
+    for fileName in fileNames:
+        if fileName.lower().endswith('.json'):
+            series = quantsketch.loadSketches(fileName)
         else:
-            # here we read numbers in sequence
-            numbers.append(float(token))
-            if minimum > min(numbers):
-                minimum = min(numbers)
-
-        tokenCnt = tokenCnt + 1
-
-    data.append(numbers)
-
-fig1, ax1 = plt.subplots()
-ax1.set_title(sys.argv[1])
-positions = np.array(range(len(data)))
-ax1.boxplot(data, positions=positions)
-
-pos = 0
-for label in titles:
-    ax1.text(positions[pos],  minimum - 5000, label,
-             horizontalalignment='center', size='x-small', weight=5,
-             color="blue")
-    pos = pos + 1
-
-plt.xlabel(sys.argv[4], fontsize=13)
-plt.ylabel(sys.argv[5], fontsize=13)
-
-plt.savefig(sys.argv[3])
-plt.show()
-plt.close()
+            series = []
+            current = None
+            for lineIndex, title, numbers in seriesBlocks(fileName, useCache):
+                if lineIndex != current:
+                    current = lineIndex
+                    series.append((title, quantsketch.QuantileSketch(relativeAccuracy)))
+                series[-1][1].add(numbers)
+
+        for title, sketch in series:
+            if title in sketches:
+                sketches[title].merge(sketch)
+            else:
+                sketches[title] = sketch
+    return list(sketches.items())
+
+
+if __name__ == '__main__':
+    if len(sys.argv) <= 3:
+        print("WARNING: Invalid arguments.")
+        print("python create-histogram.py <title> <CSV file with data> <output picture name>")
+        print("python ./boxplot.py title ./boxplotsample.txt ./figure1.png" "xLabel" "yLabel")
+        print("File example:")
+        print("100 | 1 | 21.5 | 24.5 | 2 | 4 | 5 | 6 | 7 | 7 | 9 ")
+        print("First number is number on X axiss.")
+        sys.argv = "./BoxPlot/boxplot.py", "sample graph", "./BoxPlot/boxplotsample.txt", "./figure.png", "xLabel", "yLabel"
+
+    print(sys.argv)
+
+    parser = argparse.ArgumentParser(description='Box plot of measurement series')
+    parser.add_argument('title', help='Title of the figure')
+    parser.add_argument('filename', help='Data file, one series per line')
+    parser.add_argument('output', help='Output picture name')
+    parser.add_argument('xlabel', nargs='?', default='')
+    parser.add_argument('ylabel', nargs='?', default='')
+    parser.add_argument('--sketch', '-s', action='store_true',
+                        help='Summarize the series with quantile sketches instead of keeping all samples')
+    parser.add_argument('--accuracy', '-acc', type=float, default=0.01,
+                        help='Relative accuracy of the sketch quantiles')
+    parser.add_argument('--merge', '-m', nargs='+', default=[],
+                        help='More data files or saved sketches (.json), series are merged by title')
+    parser.add_argument('--savesketch', '-ss', help='Save the sketches as .json to merge them later')
+    parser.add_argument('--cache', '-c', action='store_true',
+                        help='Read the data files through the binary cache in the .sdrcache folder next to them')
+    args = parser.parse_args(list(sys.argv[1:]))
+
+    fig1, ax1 = plt.subplots()
+    ax1.set_title(args.title)
+
+    if args.sketch or len(args.merge) > 0 or args.savesketch is not None:
+        sketches = readSketches([args.filename] + args.merge, args.accuracy, args.cache)
+        if args.savesketch is not None:
+            quantsketch.saveSketches(args.savesketch, sketches)
+        titles = [title for title, _ in sketches]
+        minimum = min(sketch.min for _, sketch in sketches)
+        positions = np.array(range(len(sketches)))
+        ax1.bxp([sketch.boxStats() for _, sketch in sketches], positions=positions)
+    else:
+        data = []
+        titles = []
+        minimum = sys.float_info.max
+        for title, numbers in iterSeries(args.filename, args.cache):
+            titles.append(title)
+            data.append(numbers)
+            if len(numbers) > 0:
+                minimum = min(minimum, numbers.min())
+        positions = np.array(range(len(data)))
+        ax1.boxplot(data, positions=positions)
+
+    pos = 0
+    for label in titles:
+        ax1.text(positions[pos],  minimum - 5000, label,
+                 horizontalalignment='center', size='x-small', weight=5,
+                 color="blue")
+        pos = pos + 1
+
+    plt.xlabel(args.xlabel, fontsize=13)
+    plt.ylabel(args.ylabel, fontsize=13)
+
+    plt.savefig(args.output)
+    plt.show()
+    plt.close()
@@ -1,18 +1,28 @@
 import os
 import random
 import sys
+import copy
+import glob
+import time
+import traceback
+import concurrent.futures
 import plotly
 import plotly.subplots
 import itertools
 import plotly.graph_objs as go
 import argparse
-import csv
+import numpy as np
 
-import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import sdrio
+import sdrcache
+import figexport
+import spstability
 
 # py -m ensurepip
 # pip install plotly
 # Without pip: py -m pip install plotly
+# PNG/SVG/PDF export (-e): pip install kaleido
 # py draw_figure.py -fn "C:\dev\devops-daenet\NeoCortexApi\NeoCortexApi\UnitTestsProject\bin\Debug\netcoreapp3.1\exp.csv" -gn Digit -mc 1000 -ht 15 -yt "column indicies" -xt cycle -st "Predicted/Expected/Predictive Cells" -fign CortialColumn
 # py draw_figure.py -fn "C:\dev\devops-daenet\NeoCortexApi\Results\Spatial Pooler Stability\HomeostaticPlasticityActivator2\ActiveColumns_MaxBoost_5_MinOverl_1_4_plotly-input.csv" -gn Digit_4 -mc 1000 -ht 15 -yt column -xt cycle -st singlecolumn -fign CortialColumn        
 # py draw_figure.py -fn "C:\dev\devops-daenet\NeoCortexApi\Results\Spatial Pooler Stability\SpStability Experiment 2 - with new born effect\ActiveColumns_MaxBoost_5_MinOverl_1_4_plotly-input.csv" -gn GRAPHNAME -mc 1000 -ht 2 -yt column -xt cycle -st singlecolumn -fign CortialColumn        
@@ -20,14 +30,34 @@ import os
 # python draw_figure.py -fn "C:\dev\git\NeoCortex\Results\Spatial Pooler Stability\SpStability Experiment 2 Boost 00 - digits 0 1 2 stable\ActiveColumns_Boost_0_0_plotly-input.csv" -gn "Digit 0" -mc 700 -ht 320 -yt "Column Index" -xt Cycle -st "MinvOverlapCycles=0.1, first 300 cycles" -fign CortialColumn
 # python draw_figure.py -fn sample.txt -gn test1 -mc 19 -ht 8 -yt yaxis -xt xaxis -min 50 -max 4000 -st 'single column' -fign CortialColumn
 # python draw_figure.py -fn sample.txt -gn test1 -mc 19 -ht 8 -yt yaxis -xt xaxis -min 50 -max 4000 -st 'single column' -fign CortialColumn -a
+# python draw_figure.py -fn sample.txt -gn test1 -mc 19 -ht 8 -yt yaxis -xt xaxis -st 'single column' -fign CortialColumn -m heatmap
+# python draw_figure.py -fn sample.txt -gn test1 -mc 19 -ht 8 -yt yaxis -xt xaxis -st 'single column' -fign CortialColumn -e pdf png -no
+# python draw_figure.py -fn sample.txt -gn test1 -mc 300 -ht 8 -yt yaxis -xt xaxis -st 'single column' -fign CortialColumn -m heatmap -sc 1000 -ds 10 -ag or
+# Several cortical columns side by side, one file per column or one file with the column id in front of every row ("2, 39, 45, 93,"):
+# python draw_figure.py -fn sampleZero.txt sampleOne.txt sampleTwo.txt -gn columns -mc 19 -ht 8 -yt yaxis -xt xaxis -st 'column 1' -fign CortialColumn -m heatmap
+# python draw_figure.py -fn l2columns.csv -cid -gn columns -mc 19 -ht 8 -yt yaxis -xt xaxis -st 'column 1' -fign CortialColumn
+# Follow a file while the experiment still writes it, http://127.0.0.1:8051/ shows the last 1000 cycles and appends new cycles every 2 s (see live_figure.py):
+# python draw_figure.py -fn "..\..\Results\ActiveColumns_plotly-input.csv" -gn live -mc 1000 -ht auto -yt column -xt cycle -st singlecolumn -fign CortialColumn -fo -i 2
+# Batch mode, renders all matching files of a folder in parallel (output <input name>1.html next to the input):
+# python draw_figure.py -d "..\..\Results\Spatial Pooler Stability" -g "**/ActiveColumns_*_plotly-input.csv" -mc 1000 -ht 15 -yt column -xt cycle -st singlecolumn -fign CortialColumn -m heatmap
+# Highlight the cycle after which the SDR stays unchanged for 20 cycles:
+# python draw_figure.py -d "..\..\Results\Spatial Pooler Stability" -mc 1000 -ht auto -k 20 -yt column -xt cycle -st singlecolumn -fign CortialColumn -m heatmap
+
+
+def highlightTouchArg(value):
+    return value if value == 'auto' else int(value)
+
+
 parser = argparse.ArgumentParser(description='Draw convergence figure')
-parser.add_argument('--filename', '-fn',help='Filename from which data is supposed to be red', required=True)
+parser.add_argument('--filename', '-fn', nargs='+',
+                    help='Filename from which data is supposed to be red, several files are plotted as several columns')
 parser.add_argument(
-    '--graphename', '-gn', help='Graphname where data is supposed to be plot', required=True)
+    '--graphename', '-gn', help='Graphname where data is supposed to be plot')
 parser.add_argument(
     '--maxcycles', '-mc', help='Number of maximum touches/iterations ', required=True, type=int)
 parser.add_argument(
-    '--highlighttouch', '-ht', help='Number of highlight touches', required=True, type=int)
+    '--highlighttouch', '-ht', help='Number of highlight touches, auto: first cycle of the stable SDR, '
+                                    'default: no highlight', type=highlightTouchArg)
 parser.add_argument('--axis', '-a', nargs='?', default=None,
                     help='Cells are placed on desired x or y axis, enter x or y')
 parser.add_argument(
@@ -42,37 +72,117 @@ parser.add_argument(
     '--subplottitle', '-st', help='The title of the subplot', required=True, type=str)
 parser.add_argument(
     '--figurename', '-fign', help='The name of the figure', required=True, type=str)
+parser.add_argument(
+    '--mode', '-m', help='shapes: one rectangle per active cell, heatmap: a single rasterized trace per column',
+    choices=['shapes', 'heatmap'], default='shapes')
+parser.add_argument(
+    '--startcycle', '-sc', help='Number of cycles skipped at the beginning of the file', default=0, type=int)
+parser.add_argument(
+    '--downsample', '-ds', help='Number of cycles merged into one plotted cycle', default=1, type=int)
+parser.add_argument(
+    '--aggregate', '-ag', help='nth: plot every n-th cycle, or: plot the union of n cycles',
+    choices=['nth', 'or'], default='nth')
+parser.add_argument(
+    '--cache', '-c', help='Read the file through the binary cache in the .sdrcache folder next to it',
+    action='store_true')
+parser.add_argument(
+    '--noopen', '-no', help='Do not open the rendered figure in the browser', action='store_true')
+parser.add_argument(
+    '--export', '-e', help='Also save the figure as image, rendered locally without network',
+    nargs='+', choices=figexport.Formats, default=[])
+parser.add_argument(
+    '--dir', '-d', help='Batch mode: folder with the input files')
+parser.add_argument(
+    '--glob', '-g', help='Batch mode: pattern of the input files (relative to --dir, ** searches sub folders)')
+parser.add_argument(
+    '--outdir', '-od', help='Batch mode: folder of the output files, default is the folder of every input file')
+parser.add_argument(
+    '--workers', '-w', help='Batch mode: number of parallel processes', type=int)
+parser.add_argument(
+    '--force', '-f', help='Batch mode: render files even if their output is newer than the input',
+    action='store_true')
+parser.add_argument(
+    '--stablecycles', '-k', help='-ht auto: number of cycles the SDR has to stay stable', default=10, type=int)
+parser.add_argument(
+    '--follow', '-fo', help='Serve a live figure of the last --maxcycles cycles while the files are written, '
+                            'only appended lines are read', action='store_true')
+parser.add_argument(
+    '--interval', '-i', help='--follow: seconds between two checks of the files', default=1.0, type=float)
+parser.add_argument(
+    '--port', '-port', help='--follow: port of the local server of the live figure', default=8051, type=int)
+parser.add_argument(
+    '--until', '-u', help='--follow: stop reading after this number of cycles per column, default: follow forever',
+    type=int)
+parser.add_argument(
+    '--columnid', '-cid', help='The first number of every row is the id of the cortical column',
+    action='store_true')
+parser.add_argument(
+    '--minoverlap', '-mo', help='-ht auto: overlap with the previous cycle that counts as stable',
+    default=1.0, type=float)
+
+
+def activityMatrix(activeCellsColumn, numTouches, column, minCell, maxCell):
+    """
+    Rasterizes the activity of one cortical column into a touch x cell matrix.
+    Cells outside of [minCell, maxCell] are dropped, so the size of the matrix
+    depends on the plotted range only and not on the number of active cells.
+    """
+    numRows = min(numTouches + 1, len(activeCellsColumn))
+    rows = []
+    cols = []
+    for t in range(numRows):
+        activeCells = np.asarray(activeCellsColumn[t][column], dtype=np.int64)
+        rows.append(np.full(len(activeCells), t, dtype=np.int64))
+        cols.append(activeCells - minCell)
+
+    matrix = np.zeros((numRows, maxCell - minCell + 1), dtype=np.uint8)
+    if numRows > 0:
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        inRange = (cols >= 0) & (cols < matrix.shape[1])
+        matrix[rows[inRange], cols[inRange]] = 1
+    return matrix
+
+
+def activityHeatmap(activeCellsColumn, numTouches, column, horizontal, minCell, maxCell):
+    """
+    Creates one heatmap trace that replaces the per cell rectangles. Touch t
+    and cell i are centered the same way as the rectangles [t, t + 0.6] and
+    [i, i + 1] drawn in the 'shapes' mode.
+    """
+    matrix = activityMatrix(activeCellsColumn, numTouches, column, minCell, maxCell)
+    heatmap = {
+        'type': 'heatmap',
+        'zmin': 0,
+        'zmax': 1,
+        'colorscale': [[0, 'rgba(0, 0, 0, 0)'], [1, 'rgba(68, 68, 68, 1)']],
+        'showscale': False,
+        'hoverinfo': 'x+y',
+    }
+    if horizontal:
+        heatmap.update(z=matrix, x0=minCell + 0.5, dx=1, y0=0.3, dy=1)
+    else:
+        heatmap.update(z=matrix.T, x0=0.3, dx=1, y0=minCell + 0.5, dy=1)
+    return go.Heatmap(heatmap)
 
-args = parser.parse_args()
 
-# Plotly requires a valid user to be able to save High Res images
-plotlyUser = os.environ.get('PLOTLY_USERNAME')
-plotlyAPIKey = os.environ.get('PLOTLY_API_KEY')
-if plotlyAPIKey is not None:
-    plotly.plotly.sign_in(plotlyUser, plotlyAPIKey)
+def subplotTitles(args, columnNames):
+    return [args.subplottitle] + list(columnNames[1:])
 
-#text = args.   # Neuron #
-maxcycles = args.maxcycles
-highlight_touch = args.highlighttouch
-yAxisTitle = args.yaxistitle
-xAxisTitle = args.xaxistitle
-minCellRange = args.mincellrange
-maxCellRange = args.maxcellrange
-subPlotTitle = args.subplottitle
-figureName = args.graphename
-filename = args.filename
 
-print (filename)
-# os.path.realpath(__file__)
+def figureTitle(args, numColumns):
+    # 'text': ['', '<b>One cortical column</b>', '', '<b>Three cortical columns</b>'][numColumns],
+    if numColumns == 1:
+        return args.graphename
+    return '<b>%d cortical columns</b>' % numColumns
 
 
-def plotActivityVertically(activeCellsColumn, highlightTouch):
-    numTouches = min(maxcycles, len(activeCellsColumn))
-    numColumns = len(activeCellsColumn[0])
+def plotActivityVertically(activeCellsColumn, highlightTouch, args, minCell, maxCell, columnNames):
+    numTouches = min(args.maxcycles, len(activeCellsColumn))
+    numColumns = len(columnNames)
     fig = plotly.subplots.make_subplots(
-        rows=1, cols=numColumns, shared_yaxes=True,
-        subplot_titles=(subPlotTitle, 'Column 2', 'Column 3')[0:numColumns]
-        #subplot_titles=('Column 1', 'Column 2', 'Column 3')[0:numColumns]
+        rows=1, cols=numColumns, shared_yaxes=True, shared_xaxes='all',
+        subplot_titles=subplotTitles(args, columnNames)
     )
 
     data = go.Scatter(x=[], y=[])
@@ -81,33 +191,35 @@ def plotActivityVertically(activeCellsColumn, highlightTouch):
     for t, sdrs in enumerate(activeCellsColumn):
         if t <= numTouches:
             for c, activeCells in enumerate(sdrs):
-                for cell in activeCells:
-                    shapes.append(
-                        {
-                            'type': 'rect',
-                            'xref': 'x' + str((c + 1)),
-                            'yref': 'y1',
-                            'x0': t,
-                            'x1': t + 0.6,
-                            'y0': cell,
-                            'y1': cell + 1,
-                            'line': {
-                                # 'color': 'rgba(128, 0, 128, 1)',
-                                'width': 2,
+                if args.mode == 'shapes':
+                    for cell in activeCells:
+                        shapes.append(
+                            {
+                                'type': 'rect',
+                                'xref': 'x' + str((c + 1)),
+                                'yref': 'y1',
+                                'x0': t,
+                                'x1': t + 0.6,
+                                'y0': cell,
+                                'y1': cell + 1,
+                                'line': {
+                                    # 'color': 'rgba(128, 0, 128, 1)',
+                                    'width': 2,
+                                },
+                                # 'fillcolor': 'rgba(128, 0, 128, 0.7)',
                             },
-                            # 'fillcolor': 'rgba(128, 0, 128, 0.7)',
-                        },
-                    )
+                        )
                 if t == highlightTouch:
                     # Add red rectangle
                     shapes.append(
                         {
                             'type': 'rect',
                             'xref': 'x' + str((c + 1)),
+                            'yref': 'y1',
                             'x0': t,
                             'x1': t + 0.6,
-                            'y0': -95,
-                            'y1': 4100,
+                            'y0': minCell,
+                            'y1': maxCell + 1,
                             'line': {
                                 'color': 'rgba(255, 0, 0, 0.5)',
                                 'width': 3,
@@ -116,14 +228,12 @@ def plotActivityVertically(activeCellsColumn, highlightTouch):
                     )
 
     # Legend for x-axis and appropriate title
-    
-    # depending on the python version you might have to remove the list(..)
-    list(fig['layout']['annotations']).append({
+    fig.add_annotation({
         'font': {'size': 20},
         'xanchor': 'center',
         'yanchor': 'bottom',
         # 'text': 'Number of touches',
-        'text': xAxisTitle,
+        'text': args.xaxistitle,
         'xref': 'paper',
         'yref': 'paper',
         'x': 0.5,
@@ -131,14 +241,11 @@ def plotActivityVertically(activeCellsColumn, highlightTouch):
         'showarrow': False,
     })
 
-    # depending on the python version you might have to remove the list(..)
-    list(fig['layout']['annotations']).append({
+    fig.add_annotation({
         'font': {'size': 24},
         'xanchor': 'center',
         'yanchor': 'bottom',
-        # 'text': ['', '<b>One cortical column</b>', '', '<b>Three cortical columns</b>'][numColumns],
-        'text': ['', figureName, '',
-                 '<b>Three cortical columns</b>'][numColumns],
+        'text': figureTitle(args, numColumns),
         'xref': 'paper',
         'yref': 'paper',
         'x': 0.5,
@@ -150,7 +257,7 @@ def plotActivityVertically(activeCellsColumn, highlightTouch):
         'font': {'size': 18},
         'yaxis': {
             # 'title': "Neuron #",
-            'title': yAxisTitle,
+            'title': args.yaxistitle,
             # 'range': [-100, 4201],
             'range': [minCell, maxCell],
             'showgrid': False,
@@ -161,9 +268,11 @@ def plotActivityVertically(activeCellsColumn, highlightTouch):
     if numColumns == 1:
         layout.update(width=320)
     else:
-        layout.update(width=700)
+        layout.update(width=100 + 200 * numColumns)
 
     for c in range(numColumns):
+        if args.mode == 'heatmap':
+            data = activityHeatmap(activeCellsColumn, numTouches, c, False, minCell, maxCell)
         fig.append_trace(data, 1, c + 1)
         fig['layout']['xaxis' + str(c + 1)].update({
             'title': "",
@@ -175,20 +284,21 @@ def plotActivityVertically(activeCellsColumn, highlightTouch):
     fig['layout'].update(layout)
 
     # Save plots as HTM and/or PDF
-    basename = args.graphename + str(numColumns)
-    plotly.offline.plot(fig, filename=basename + '.html', auto_open=True)
+    basename = outputBasename(args.graphename, numColumns)
+    plotly.offline.plot(fig, filename=basename + '.html',
+                        auto_open=not args.noopen and figexport.hasDisplay())
 
-    # Can't save image files in offline mode
-    if plotlyAPIKey is not None:
-        plotly.plotly.image.save_as(fig, filename=basename + '.pdf', scale=4)
+    # Save plots as PNG/SVG/PDF
+    figexport.writeImages(fig, basename, args.export, scale=4)
 
 
-def plotActivityHorizontally(activeCellsColumn, highlightTouch):
-    numTouches = min(maxcycles, len(activeCellsColumn))
-    numColumns = len(activeCellsColumn[0])
+def plotActivityHorizontally(activeCellsColumn, highlightTouch, args, minCell, maxCell, columnNames):
+    numTouches = min(args.maxcycles, len(activeCellsColumn))
+    numColumns = len(columnNames)
+    # The cells are on the x-axis, so the columns are stacked
     fig = plotly.subplots.make_subplots(
-        rows=1, cols=numColumns, shared_yaxes=True,
-        subplot_titles=(subPlotTitle, 'Column 2', 'Column 3')[0:numColumns]
+        rows=numColumns, cols=1, shared_xaxes=True, shared_yaxes='all',
+        subplot_titles=subplotTitles(args, columnNames)
     )
 
     data = go.Scatter(x=[], y=[])
@@ -197,31 +307,33 @@ def plotActivityHorizontally(activeCellsColumn, highlightTouch):
     for t, sdrs in enumerate(activeCellsColumn):
         if t <= numTouches:
             for c, activeCells in enumerate(sdrs):
-                for cell in activeCells:
-                    shapes.append(
-                        {
-                            'type': 'rect',
-                            'xref': 'x1',
-                            'yref': 'y' + str((c + 1)),
-                            'x0': cell,
-                            'x1': cell + 1,
-                            'y0': t,
-                            'y1': t + 0.6,
-                            'line': {
-                                # 'color': 'rgba(128, 0, 128, 1)',
-                                'width': 2,
+                if args.mode == 'shapes':
+                    for cell in activeCells:
+                        shapes.append(
+                            {
+                                'type': 'rect',
+                                'xref': 'x' + str((c + 1)),
+                                'yref': 'y' + str((c + 1)),
+                                'x0': cell,
+                                'x1': cell + 1,
+                                'y0': t,
+                                'y1': t + 0.6,
+                                'line': {
+                                    # 'color': 'rgba(128, 0, 128, 1)',
+                                    'width': 2,
+                                },
+                                # 'fillcolor': 'rgba(128, 0, 128, 0.7)',
                             },
-                            # 'fillcolor': 'rgba(128, 0, 128, 0.7)',
-                        },
-                    )
+                        )
                 if t == highlightTouch:
                     # Add red rectangle
                     shapes.append(
                         {
                             'type': 'rect',
+                            'xref': 'x' + str((c + 1)),
                             'yref': 'y' + str((c + 1)),
-                            'x0': -95,
-                            'x1': 4100,
+                            'x0': minCell,
+                            'x1': maxCell + 1,
                             'y0': t,
                             'y1': t + 0.6,
                             'line': {
@@ -232,23 +344,22 @@ def plotActivityHorizontally(activeCellsColumn, highlightTouch):
                     )
 
     # Legend for y-axis and appropriate title
-    fig['layout']['annotations'].append({
+    fig.add_annotation({
         'font': {'size': 24},
         'xanchor': 'center',
         'yanchor': 'bottom',
-        'text': ['', figureName, '',
-                 '<b>Three cortical columns</b>'][numColumns],
+        'text': figureTitle(args, numColumns),
         'xref': 'paper',
         'yref': 'paper',
         'x': 0.5,
         'y': 1.1,
         'showarrow': False,
     })
-    fig['layout']['annotations'].append({
+    fig.add_annotation({
         'font': {'size': 20},
         'xanchor': 'center',
         'yanchor': 'bottom',
-        'text': xAxisTitle,  # also checked
+        'text': args.xaxistitle,  # also checked
         'xref': 'paper',
         'yref': 'paper',
         'x': 0.5,
@@ -258,69 +369,246 @@ def plotActivityHorizontally(activeCellsColumn, highlightTouch):
     layout = {
         'width': 600,
         'font': {'size': 18},
-        'yaxis': {
-            'title': yAxisTitle,  # checked
-            # 'title': numTouches,  # checked
-            'range': [0, numTouches],
-            'showgrid': False,
-        },
         'shapes': shapes,
     }
 
     if numColumns == 1:
         layout.update(height=320)
     else:
-        layout.update(height=700)
+        layout.update(height=100 + 200 * numColumns)
 
     for c in range(numColumns):
-        fig.append_trace(data, 1, c + 1)
-        fig['layout']['yaxis' + str(c + 1)].update({
-            'title': "",
+        if args.mode == 'heatmap':
+            data = activityHeatmap(activeCellsColumn, numTouches, c, True, minCell, maxCell)
+        fig.append_trace(data, c + 1, 1)
+        fig['layout']['xaxis' + str(c + 1)].update({
             'range': [minCell, maxCell],
             'showgrid': False,
             'showticklabels': True,
-        }),
+        })
+        fig['layout']['yaxis' + str(c + 1)].update({
+            'title': args.yaxistitle if c == 0 else "",  # checked
+            'range': [0, numTouches],
+            'showgrid': False,
+        })
 
     fig['layout'].update(layout)
 
     # Save plots as HTM and/or PDF
-    basename = args.graphename + str(numColumns)
-    plotly.offline.plot(fig, filename=basename + '.html', auto_open=True)
-
-    # Can't save image files in offline mode
-    if plotlyAPIKey is not None:
-        plotly.plotly.image.save_as(fig, filename=basename + '.pdf', scale=4)
-
-
-dataSets = []
-allCells = []
-cell = []
-# with open("C:\\Users\\ataul\\source\\repos\\NeoCortex\\Python\\ColumnActivityDiagram\\sampleOne.txt") as datafile:
-with open(filename, 'r') as datafile:
-    csv_reader = csv.reader(datafile, skipinitialspace=False,
-                            delimiter=',', quoting=csv.QUOTE_NONE)
-    for row in csv_reader:
-        
-        if len(row)>0 and (row[-1] == '' or row[-1] == ' ' or row[-1] == ','):
-            del row[-1]
-        for i in row:
-            if i == '':
-                del row[i]
-            j = i.strip()
-            cell.append(int(j))
-            allCells.append(int(j))
-        dataSets.append([set(cell)])
-        cell = []
-
-
-maxCell = max(allCells)+100
-minCell = min(allCells)-100
-
-# print(len(dataSets))
-
-if args.axis == 'x':
-    plotActivityHorizontally(dataSets, highlight_touch)
-else:
-    plotActivityVertically(dataSets, highlight_touch)
-
-# if args.maxCellRange:
+    basename = outputBasename(args.graphename, numColumns)
+    plotly.offline.plot(fig, filename=basename + '.html',
+                        auto_open=not args.noopen and figexport.hasDisplay())
+
+    # Save plots as PNG/SVG/PDF
+    figexport.writeImages(fig, basename, args.export, scale=4)
+
+
+def outputBasename(graphName, numColumns=1):
+    return graphName + str(numColumns)
+
+
+def renderedOutputs(graphName):
+    """
+    Outputs of earlier renderings of graphName, with any number of columns.
+    """
+    prefix = os.path.basename(graphName)
+    return [fileName for fileName in glob.glob(glob.escape(graphName) + '*.html')
+            if os.path.basename(fileName)[len(prefix):-len('.html')].isdigit()]
+
+
+def readRows(fileName, args, startCycle):
+    if args.cache:
+        return sdrio.iterTraceRows(sdrcache.loadSdrTrace(fileName), startCycle)
+    return sdrio.iterSdrRows(fileName, startCycle)
+
+
+def splitColumns(rows, numRows):
+    """
+    Splits rows with the column id in front of the cells into one list of rows
+    per column. The t-th row of a column is its cycle t. Reading stops as soon
+    as every column has numRows rows.
+
+    @return (tuple) sorted column ids, the rows of every column and the index
+            of the column of the first row
+    """
+    columns = {}
+    for row in rows:
+        if len(row) == 0:
+            continue
+        columnRows = columns.setdefault(int(row[0]), [])
+        if len(columnRows) < numRows:
+            columnRows.append(row[1:])
+        elif all(len(other) >= numRows for other in columns.values()):
+            break
+    ids = sorted(columns)
+    first = ids.index(next(iter(columns))) if len(columns) > 0 else 0
+    return ids, [columns[columnId] for columnId in ids], first
+
+
+def readColumns(args):
+    """
+    Reads the activity of all cortical columns with one pass over every file,
+    one file per column or, with --columnid, all columns in one file.
+
+    @return (tuple) one SdrTrace per column, the column names and the stability
+            analyzer of the column of the first row (None without -ht auto)
+    """
+    # Touches 0..maxcycles are plotted, the rest of the file is never read.
+    numRows = args.startcycle + (args.maxcycles + 1) * args.downsample
+    if args.columnid:
+        ids, columnRows, analyzed = splitColumns(
+            itertools.chain.from_iterable(readRows(fileName, args, 0) for fileName in args.filename), numRows)
+        columnRows = [iter(rows[args.startcycle:]) for rows in columnRows]
+        names = ['Column %d' % columnId for columnId in ids]
+    else:
+        columnRows = [readRows(fileName, args, args.startcycle) for fileName in args.filename]
+        names = ['Column %d' % (c + 1) for c in range(len(columnRows))]
+        analyzed = 0
+
+    analyzer = None
+    if args.highlighttouch == 'auto' and len(columnRows) > 0:
+        # The stability of the column of the first row is detected in the same pass over the file.
+        analyzer = spstability.StabilityAnalyzer(1, args.stablecycles, args.minoverlap)
+        columnRows[analyzed] = spstability.trackStability(columnRows[analyzed], analyzer)
+    traces = [sdrio.windowRows(rows, args.maxcycles + 1, args.downsample, args.aggregate)
+              for rows in columnRows]
+    return traces, names, analyzer
+
+
+def renderFile(args):
+    """
+    Reads the activity files args.filename and renders them.
+
+    @return (tuple) seconds spent for reading and for rendering
+    """
+    print(', '.join(args.filename))
+    start = time.time()
+
+    traces, columnNames, analyzer = readColumns(args)
+    if len(traces) == 0:
+        raise ValueError('No rows with a column id found.')
+    # the cell range of the plot is taken from the active cells
+    if all(trace.maxCell is None for trace in traces):
+        raise ValueError('no activity in %s' % ', '.join(args.filename))
+
+    parsed = time.time()
+    plotColumns(traces, columnNames, analyzer, args)
+    return parsed - start, time.time() - parsed
+
+
+def plotColumns(traces, columnNames, analyzer, args):
+    """
+    Plots one SdrTrace per cortical column.
+    """
+    # touch t of column c is dataSets[t][c], all panels are built from it
+    numTouches = max(len(trace.offsets) - 1 for trace in traces)
+    columnRows = [sdrio.sdrRows(trace) for trace in traces]
+    empty = np.empty(0, dtype=np.int32)
+    dataSets = [[rows[t] if t < len(rows) else empty for rows in columnRows]
+                for t in range(numTouches)]
+
+    highlightTouch = args.highlighttouch
+    if highlightTouch == 'auto':
+        # None if the SDR does not get stable inside of the plotted window
+        highlightTouch = None
+        if analyzer.stableCycle is not None:
+            highlightTouch = analyzer.stableCycle // args.downsample
+            print("stable after cycle %d" % (args.startcycle + analyzer.stableCycle))
+
+    maxCell = max(trace.maxCell for trace in traces if trace.maxCell is not None)+100
+    minCell = min(trace.minCell for trace in traces if trace.minCell is not None)-100
+    if args.maxcellrange is not None:
+        maxCell = args.maxcellrange
+    if args.mincellrange is not None:
+        minCell = args.mincellrange
+
+    if args.axis == 'x':
+        plotActivityHorizontally(dataSets, highlightTouch, args, minCell, maxCell, columnNames)
+    else:
+        plotActivityVertically(dataSets, highlightTouch, args, minCell, maxCell, columnNames)
+
+
+def renderBatchFile(args):
+    # a broken file must not stop the batch, its traceback is printed in the summary
+    try:
+        readTime, renderTime = renderFile(args)
+        return args.filename[0], 'rendered', readTime, renderTime, None
+    except ValueError as error:
+        # invalid input, the message says enough
+        return args.filename[0], 'failed', 0, 0, '%s\n' % error
+    except Exception:
+        return args.filename[0], 'failed', 0, 0, traceback.format_exc()
+
+
+def batchJobs(args):
+    """
+    Creates the arguments of every input file found by --dir/--glob. Inputs
+    whose output is newer than the input are skipped like make does.
+    """
+    pattern = args.glob if args.glob is not None else '*_plotly-input.csv'
+    if args.dir is not None:
+        pattern = os.path.join(args.dir, pattern)
+
+    jobs = []
+    skipped = []
+    for fileName in sorted(glob.glob(pattern, recursive=True)):
+        fileArgs = copy.copy(args)
+        fileArgs.filename = [fileName]
+        fileArgs.noopen = True
+        outDir = args.outdir if args.outdir is not None else os.path.dirname(fileName)
+        fileArgs.graphename = os.path.join(outDir, os.path.splitext(os.path.basename(fileName))[0])
+
+        # The number of columns in the output name is known after reading only
+        outputs = renderedOutputs(fileArgs.graphename)
+        if not args.force and len(outputs) > 0 and \
+                max(os.path.getmtime(output) for output in outputs) >= os.path.getmtime(fileName):
+            skipped.append(fileName)
+        else:
+            jobs.append(fileArgs)
+    return jobs, skipped
+
+
+def renderBatch(args):
+    jobs, skipped = batchJobs(args)
+    if args.outdir is not None:
+        os.makedirs(args.outdir, exist_ok=True)
+
+    start = time.time()
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for result in executor.map(renderBatchFile, jobs):
+            results.append(result)
+
+    print("")
+    print("%8s %8s  %-10s %s" % ('read[s]', 'plot[s]', 'status', 'file'))
+    for fileName, status, readTime, renderTime, _ in results:
+        print("%8.2f %8.2f  %-10s %s" % (readTime, renderTime, status, fileName))
+    for fileName in skipped:
+        print("%8s %8s  %-10s %s" % ('', '', 'up to date', fileName))
+    failed = [result for result in results if result[4] is not None]
+    print("%d rendered, %d failed, %d up to date, %.2f s total" %
+          (len(results) - len(failed), len(failed), len(skipped), time.time() - start))
+
+    for fileName, _, _, _, trace in failed:
+        print("", file=sys.stderr)
+        print("%s failed:" % fileName, file=sys.stderr)
+        print(trace, file=sys.stderr, end='')
+    return len(failed) == 0
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    if args.dir is not None or args.glob is not None:
+        if not renderBatch(args):
+            sys.exit(1)
+    elif args.filename is None or args.graphename is None:
+        parser.error('--filename and --graphename are required without --dir/--glob')
+    elif args.follow:
+        import live_figure
+        live_figure.followFiles(args)
+    else:
+        try:
+            renderFile(args)
+        except ValueError as error:
+            sys.exit('%s' % error)
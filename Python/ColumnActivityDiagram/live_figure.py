@@ -0,0 +1,374 @@
+########################################################################################
+# Live tail mode of draw_figure.py (--follow).
+# A background thread reads the lines the experiment appends to the activity files
+# (sdrio.SdrFollower, every line is parsed once) and keeps the last maxcycles + 1
+# plotted cycles of every column. A local HTTP server serves a page which polls for
+# the cycles added since its last request and appends them to the plot with
+# Plotly.extendTraces, so a refresh costs the new cycles only. The plot shows a
+# sliding window of the last maxcycles cycles, every active cell is one marker
+# (the incremental counterpart of -m heatmap).
+#
+# Server:
+#   /              the live figure
+#   /rows?since=N  JSON with the cycles added after sequence number N
+#   /plotly.min.js plotly.js of the installed plotly package (works offline)
+#
+# python draw_figure.py -fn ActiveColumns_plotly-input.csv -gn live -mc 1000 -ht auto -yt column -xt cycle -st singlecolumn -fign CortialColumn -fo
+# python draw_figure.py -fn l2columns.csv -cid -gn live -mc 300 -yt cell -xt cycle -st 'column 1' -fign CortialColumn -fo -i 0.5 -port 8052 -u 5000
+########################################################################################
+
+import collections
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import webbrowser
+import numpy as np
+import plotly.offline
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import sdrio
+import spstability
+import figexport
+
+
+class ActivityFollower(object):
+    """
+    Collects the plotted cycles from the lines appended to the files. Only the
+    last maxcycles + 1 cycles of every column are kept. Every plotted cycle gets
+    a sequence number, so the cycles added after a sequence number are found
+    without looking at the older ones.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.followers = [sdrio.SdrFollower(fileName) for fileName in args.filename]
+        # sequence number of the last plotted cycle and of the newest dropped one
+        self.sequence = 0
+        self.dropped = 0
+        self.reset()
+
+    def reset(self):
+        for follower in self.followers:
+            follower.reset()
+        # the column of the first row is analyzed like in readColumns, it never changes
+        self.analyzedColumn = None
+        self.analyzer = None
+        if self.args.highlighttouch == 'auto':
+            self.analyzer = spstability.StabilityAnalyzer(1, self.args.stablecycles, self.args.minoverlap)
+        self.inputCycles = {}
+        self.groups = {}
+        self.windows = collections.OrderedDict()
+
+    def _add(self, columnId, activeCells):
+        if self.analyzedColumn is None:
+            self.analyzedColumn = columnId
+        cycle = self.inputCycles.get(columnId, 0)
+        if self.args.until is not None and cycle >= self.args.until:
+            return
+        self.inputCycles[columnId] = cycle + 1
+        if cycle < self.args.startcycle:
+            return
+
+        if self.analyzer is not None and columnId == self.analyzedColumn:
+            self.analyzer.update(activeCells)
+
+        # downsampling like sdrio.downsampleRows, one cycle at a time
+        t = cycle - self.args.startcycle
+        step = self.args.downsample
+        if step <= 1:
+            self._emit(columnId, t, activeCells)
+        elif self.args.aggregate == 'nth':
+            if t % step == 0:
+                self._emit(columnId, t // step, activeCells)
+        else:
+            group = self.groups.setdefault(columnId, [])
+            group.append(activeCells)
+            if len(group) == step:
+                self._emit(columnId, t // step, np.unique(np.concatenate(group)))
+                self.groups[columnId] = []
+
+    def _emit(self, columnId, cycle, activeCells):
+        if columnId not in self.windows:
+            self.windows[columnId] = collections.deque(maxlen=self.args.maxcycles + 1)
+        window = self.windows[columnId]
+        if len(window) == window.maxlen:
+            # the windows drop at different speeds, keep the newest dropped cycle of all
+            self.dropped = max(self.dropped, window[0][0])
+        self.sequence += 1
+        self.windows[columnId].append((self.sequence, cycle, activeCells))
+
+    def update(self):
+        """
+        Reads the appended lines of all files.
+
+        @return (int) number of read lines
+        """
+        numLines = 0
+        for c, follower in enumerate(self.followers):
+            while True:
+                rows = follower.readNew()
+                if rows is None:
+                    print("%s was truncated, following from the beginning" % follower.fileName)
+                    self.reset()
+                    # every cycle plotted so far is dropped
+                    self.sequence += 1
+                    self.dropped = self.sequence
+                    return numLines
+                if len(rows) == 0:
+                    break
+                numLines += len(rows)
+                for row in rows:
+                    if self.args.columnid:
+                        if len(row) > 0:
+                            self._add(int(row[0]), row[1:])
+                    else:
+                        self._add(c, row)
+        return numLines
+
+    def columnIds(self):
+        return sorted(self.windows)
+
+    def columnNames(self):
+        if self.args.columnid:
+            return ['Column %d' % columnId for columnId in self.columnIds()]
+        return ['Column %d' % (columnId + 1) for columnId in self.columnIds()]
+
+    def rowsSince(self, since):
+        """
+        Cycles added after the sequence number since. If older cycles were
+        dropped from the window since then (or the files were truncated) the
+        whole window is returned and reset is True.
+
+        @return (dict) the answer of /rows
+        """
+        ids = self.columnIds()
+        reset = since < self.dropped
+        if reset:
+            since = -1
+        rows = []
+        for index, columnId in enumerate(ids):
+            newRows = []
+            # the windows are ordered by the sequence number, the new cycles are at the end
+            for sequence, cycle, activeCells in reversed(self.windows[columnId]):
+                if sequence <= since:
+                    break
+                newRows.append([index, int(cycle), np.asarray(activeCells).tolist()])
+            rows.extend(reversed(newRows))
+
+        stableCycle = self.args.highlighttouch if isinstance(self.args.highlighttouch, int) else None
+        if self.analyzer is not None and self.analyzer.stableCycle is not None:
+            stableCycle = self.analyzer.stableCycle // max(1, self.args.downsample)
+        return {'sequence': self.sequence, 'reset': bool(reset), 'columns': self.columnNames(),
+                'stableCycle': stableCycle, 'rows': rows}
+
+
+_page = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>%(title)s</title>
+<script src="plotly.min.js"></script></head>
+<body><div id="plot" style="width: 100%%; height: 95vh;"></div>
+<script>
+const settings = %(settings)s;
+const plot = document.getElementById('plot');
+let sequence = -1, columns = null, counts = [], totals = [], lastCycle = 0, stableDrawn = false;
+
+function axisName(axis, c) {
+  return axis + (c === 0 ? '' : String(c + 1));
+}
+
+async function newPlot() {
+  // cycles on x (vertical, default) or on y (-a x), one panel per column with shared axes
+  const horizontal = settings.horizontal;
+  const n = columns.length;
+  const traces = [], layout = {
+    title: {text: n === 1 ? settings.graphName : '<b>' + n + ' cortical columns</b>'},
+    showlegend: false, annotations: [],
+    grid: {rows: horizontal ? n : 1, columns: horizontal ? 1 : n, pattern: 'independent'},
+  };
+  for (let c = 0; c < n; c++) {
+    const x = axisName('x', c), y = axisName('y', c);
+    traces.push({type: 'scattergl', mode: 'markers', x: [], y: [], xaxis: x, yaxis: y,
+                 marker: {symbol: 'square', size: 4, color: 'rgb(68, 68, 68)'}});
+    const cycleAxis = {showgrid: false};
+    const cellAxis = {showgrid: false};
+    if (settings.cellRange !== null) cellAxis.range = settings.cellRange;
+    if (c > 0) {
+      cycleAxis.matches = horizontal ? 'y' : 'x';
+      cellAxis.matches = horizontal ? 'x' : 'y';
+    }
+    layout[axisName('xaxis', c)] = horizontal ? cellAxis : cycleAxis;
+    layout[axisName('yaxis', c)] = horizontal ? cycleAxis : cellAxis;
+    layout.annotations.push({text: c === 0 ? settings.subplotTitle : columns[c], showarrow: false,
+                             xref: x + ' domain', yref: y + ' domain', x: 0.5, y: 1.0,
+                             xanchor: 'center', yanchor: 'bottom'});
+  }
+  layout[horizontal ? 'xaxis' : 'yaxis'].title = {text: settings.yTitle};
+  layout[horizontal ? 'yaxis' : 'xaxis'].title = {text: settings.xTitle};
+  counts = columns.map(() => []);
+  totals = columns.map(() => 0);
+  lastCycle = 0;
+  stableDrawn = false;
+  await Plotly.newPlot(plot, traces, layout);
+}
+
+function drawStable(cycle) {
+  // rectangle over the whole plotted cell range of every panel
+  const shapes = columns.map((name, c) => {
+    const x = axisName('x', c), y = axisName('y', c);
+    const shape = {type: 'rect', line: {color: 'rgba(255, 0, 0, 0.5)', width: 3}};
+    if (settings.horizontal) {
+      Object.assign(shape, {xref: x + ' domain', yref: y, x0: 0, x1: 1, y0: cycle, y1: cycle + 0.6});
+    } else {
+      Object.assign(shape, {xref: x, yref: y + ' domain', x0: cycle, x1: cycle + 0.6, y0: 0, y1: 1});
+    }
+    return shape;
+  });
+  Plotly.relayout(plot, {shapes: shapes});
+  stableDrawn = true;
+}
+
+async function poll() {
+  try {
+    const answer = await (await fetch('rows?since=' + sequence)).json();
+    if (answer.columns.length === 0) {
+      setTimeout(poll, settings.interval);
+      return;
+    }
+    if (columns !== null && !answer.reset && answer.columns.join('|') !== columns.join('|')) {
+      // a new column appeared, the panels are built again from the whole window
+      sequence = -1;
+      columns = null;
+      setTimeout(poll, 0);
+      return;
+    }
+    if (columns === null || answer.reset) {
+      columns = answer.columns;
+      await newPlot();
+    }
+    if (answer.rows.length > 0) {
+      const xs = columns.map(() => []), ys = columns.map(() => []);
+      for (const [c, cycle, cells] of answer.rows) {
+        for (const cell of cells) {
+          xs[c].push(settings.horizontal ? cell : cycle);
+          ys[c].push(settings.horizontal ? cycle : cell);
+        }
+        counts[c].push([cycle, cells.length]);
+        totals[c] += cells.length;
+        lastCycle = Math.max(lastCycle, cycle);
+      }
+      // sliding window: the points of cycles older than maxcycles are dropped
+      const first = Math.max(0, lastCycle - settings.maxCycles);
+      for (let c = 0; c < columns.length; c++) {
+        while (counts[c].length > 0 && counts[c][0][0] < first) {
+          totals[c] -= counts[c].shift()[1];
+        }
+      }
+      const indices = columns.map((name, c) => c);
+      const maxPoints = totals.map(total => Math.max(1, total));
+      await Plotly.extendTraces(plot, {x: xs, y: ys}, indices, {x: maxPoints, y: maxPoints});
+      const range = {};
+      range[(settings.horizontal ? 'yaxis' : 'xaxis') + '.range'] = [first, Math.max(lastCycle + 1, first + settings.maxCycles)];
+      Plotly.relayout(plot, range);
+    }
+    if (answer.stableCycle !== null && !stableDrawn) drawStable(answer.stableCycle);
+    sequence = answer.sequence;
+  } catch (error) {
+    console.log(error);
+  }
+  setTimeout(poll, settings.interval);
+}
+
+poll();
+</script></body></html>
+"""
+
+
+class LiveHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves the page, plotly.js and the new cycles of self.server.follower.
+    """
+
+    def _send(self, content, contentType):
+        self.send_response(200)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path == '/':
+            self._send(self.server.page, 'text/html; charset=utf-8')
+        elif path == '/plotly.min.js':
+            self._send(self.server.plotlyJs, 'application/javascript')
+        elif path == '/rows':
+            try:
+                since = int(dict(item.split('=', 1) for item in query.split('&') if '=' in item).get('since', -1))
+            except ValueError:
+                self.send_error(400)
+                return
+            with self.server.lock:
+                answer = self.server.follower.rowsSince(since)
+            self._send(json.dumps(answer).encode(), 'application/json')
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LiveServer(http.server.ThreadingHTTPServer):
+    """
+    HTTP server of the live figure. A background thread reads the files every
+    interval seconds.
+    """
+
+    def __init__(self, address, follower, page, interval):
+        http.server.ThreadingHTTPServer.__init__(self, address, LiveHandler)
+        self.follower = follower
+        self.page = page
+        self.plotlyJs = plotly.offline.get_plotlyjs().encode()
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.reader = threading.Thread(target=self._read, daemon=True)
+
+    def _read(self):
+        while True:
+            start = time.time()
+            with self.lock:
+                numLines = self.follower.update()
+            if numLines > 0:
+                print("%d lines read in %.3f s, %d cycles plotted" %
+                      (numLines, time.time() - start, self.follower.sequence))
+            time.sleep(self.interval)
+
+
+def followFiles(args):
+    """
+    Serves the live figure of args.filename until it is stopped with Ctrl+C.
+    """
+    follower = ActivityFollower(args)
+    cellRange = None
+    if args.mincellrange is not None and args.maxcellrange is not None:
+        cellRange = [args.mincellrange, args.maxcellrange]
+    settings = {
+        'graphName': args.graphename, 'subplotTitle': args.subplottitle,
+        'xTitle': args.xaxistitle, 'yTitle': args.yaxistitle,
+        'horizontal': args.axis == 'x', 'maxCycles': args.maxcycles,
+        'interval': int(args.interval * 1000), 'cellRange': cellRange,
+    }
+    page = _page % {'title': args.graphename, 'settings': json.dumps(settings)}
+
+    server = LiveServer(('127.0.0.1', args.port), follower, page.encode(), args.interval)
+    server.reader.start()
+    url = 'http://127.0.0.1:%d/' % server.server_address[1]
+    print("serving %s" % url)
+    if not args.noopen and figexport.hasDisplay():
+        webbrowser.open(url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
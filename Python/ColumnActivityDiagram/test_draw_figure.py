@@ -0,0 +1,120 @@
+########################################################################################
+# Tests of draw_figure.py, the figures are written to a temporary folder, run from this
+# folder with:
+# python -m unittest test_draw_figure
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import draw_figure
+
+
+class DrawFigureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, name, rows):
+        fileName = os.path.join(self.folder, name)
+        with open(fileName, 'w') as file:
+            file.writelines(''.join('%d, ' % cell for cell in row) + '\n' for row in rows)
+        return fileName
+
+    def parse(self, *options):
+        return draw_figure.parser.parse_args(list(options) + ['-yt', 'cell', '-xt', 'cycle', '-st', 'a',
+                                                              '-fign', 'b', '-no'])
+
+    def testActivityMatrix(self):
+        # touch t of column c is dataSets[t][c]
+        dataSets = [[[3, 5], [4]], [[], [4, 9]], [[1, 5, 12], []], [[5], [5]]]
+        matrix = draw_figure.activityMatrix(dataSets, 2, 0, 2, 6)
+        # touches 0..2 and cells 2..6, cells outside of the range are dropped
+        self.assertEqual(matrix.tolist(), [[0, 1, 0, 1, 0], [0, 0, 0, 0, 0], [0, 0, 0, 1, 0]])
+        self.assertEqual(draw_figure.activityMatrix(dataSets, 10, 1, 4, 9).shape, (4, 6))
+        self.assertEqual(draw_figure.activityMatrix([], 5, 0, 0, 3).shape, (0, 4))
+
+    def testActivityHeatmap(self):
+        dataSets = [[[3, 5]], [[4]]]
+        vertical = draw_figure.activityHeatmap(dataSets, 1, 0, False, 3, 5)
+        horizontal = draw_figure.activityHeatmap(dataSets, 1, 0, True, 3, 5)
+        # cycles on the x-axis of the vertical plot, on the y-axis of the horizontal one
+        self.assertEqual([list(row) for row in vertical.z], [[1, 0], [0, 1], [1, 0]])
+        self.assertEqual([list(row) for row in horizontal.z], [[1, 0, 1], [0, 1, 0]])
+        self.assertEqual((vertical.x0, vertical.y0), (0.3, 3.5))
+        self.assertEqual((horizontal.x0, horizontal.y0), (3.5, 0.3))
+
+    def testSplitColumns(self):
+        rows = [[2, 10, 11], [], [1, 5], [2, 12], [1], [2, 13], [1, 6]]
+        ids, columnRows, first = draw_figure.splitColumns(iter(rows), 2)
+        self.assertEqual(ids, [1, 2])
+        self.assertEqual(columnRows, [[[5], []], [[10, 11], [12]]])
+        # the first row belongs to column 2
+        self.assertEqual(first, 1)
+
+    def testReadColumns(self):
+        fileName = self.write('columns.csv', [[3, 7, 8], [1, 4], [3, 9], [1, 4, 5], [3], [1, 6]])
+        traces, names, analyzer = draw_figure.readColumns(self.parse('-fn', fileName, '-mc', '1', '-cid'))
+        self.assertEqual(names, ['Column 1', 'Column 3'])
+        self.assertEqual([trace.offsets.tolist() for trace in traces], [[0, 1, 3], [0, 2, 3]])
+        self.assertEqual([(trace.minCell, trace.maxCell) for trace in traces], [(4, 5), (7, 9)])
+        self.assertIsNone(analyzer)
+
+    def testRenderColumns(self):
+        fileNames = [self.write('column%d.csv' % c, [[c, c + 1], [c + 2]]) for c in range(3)]
+        graphName = os.path.join(self.folder, 'figure')
+        draw_figure.renderFile(self.parse('-fn', *fileNames, '-gn', graphName, '-mc', '5', '-m', 'heatmap'))
+        self.assertEqual(draw_figure.renderedOutputs(graphName), [graphName + '3.html'])
+
+    def testNoActivity(self):
+        fileNames = [self.write('empty%d.csv' % c, [[], []]) for c in range(2)]
+        args = self.parse('-fn', *fileNames, '-gn', os.path.join(self.folder, 'figure'), '-mc', '5')
+        with self.assertRaises(ValueError) as context:
+            draw_figure.renderFile(args)
+        self.assertEqual(str(context.exception), 'no activity in %s' % ', '.join(fileNames))
+        self.assertEqual(draw_figure.renderBatchFile(args)[1:],
+                         ('failed', 0, 0, 'no activity in %s\n' % ', '.join(fileNames)))
+
+    def testBatch(self):
+        os.makedirs(os.path.join(self.folder, 'sub'))
+        inputs = [self.write('a_plotly-input.csv', [[1, 2], [3]]),
+                  self.write(os.path.join('sub', 'b_plotly-input.csv'), [[4], [5, 6]]),
+                  self.write('c_plotly-input.csv', [[]])]
+        self.write('other.csv', [[1]])
+
+        args = self.parse('-d', self.folder, '-g', '**/*_plotly-input.csv', '-mc', '5', '-w', '2')
+        jobs, skipped = draw_figure.batchJobs(args)
+        self.assertEqual(sorted(job.filename[0] for job in jobs), sorted(inputs))
+        self.assertEqual(skipped, [])
+        self.assertTrue(all(job.noopen for job in jobs))
+
+        # the file without active cells fails, the others are rendered next to their input
+        self.assertFalse(draw_figure.renderBatch(args))
+        for fileName in inputs[:2]:
+            self.assertTrue(os.path.exists(os.path.splitext(fileName)[0] + '1.html'))
+
+        # rendered files are up to date, the failed one is tried again
+        jobs, skipped = draw_figure.batchJobs(args)
+        self.assertEqual([job.filename[0] for job in jobs], [inputs[2]])
+        self.assertEqual(sorted(skipped), sorted(inputs[:2]))
+        args.force = True
+        self.assertEqual(len(draw_figure.batchJobs(args)[0]), 3)
+
+    def testBatchOutdir(self):
+        fileName = self.write('a_plotly-input.csv', [[1, 2], [3]])
+        outDir = os.path.join(self.folder, 'figures')
+        # the default pattern, one worker
+        args = self.parse('-d', self.folder, '-od', outDir, '-mc', '5', '-w', '1', '-m', 'heatmap')
+        self.assertTrue(draw_figure.renderBatch(args))
+        self.assertEqual(os.listdir(outDir), ['a_plotly-input1.html'])
+        # nothing is written next to the input
+        self.assertEqual(sorted(os.listdir(self.folder)), ['a_plotly-input.csv', 'figures'])
+
+
+if __name__ == '__main__':
+    unittest.main()
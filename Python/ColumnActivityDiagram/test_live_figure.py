@@ -0,0 +1,82 @@
+########################################################################################
+# Tests of the sliding window of live_figure.py, run from this folder with:
+# python -m unittest test_live_figure
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import draw_figure
+import live_figure
+
+
+class LiveFigureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.fileNames = [os.path.join(self.folder, 'column%d.csv' % c) for c in range(2)]
+        for fileName in self.fileNames:
+            open(fileName, 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def follower(self, *options):
+        args = draw_figure.parser.parse_args(['-fn'] + self.fileNames + list(options) +
+                                             ['-yt', 'cell', '-xt', 'cycle', '-st', 'a', '-fign', 'b', '-fo'])
+        return live_figure.ActivityFollower(args)
+
+    def append(self, column, rows):
+        with open(self.fileNames[column], 'a') as file:
+            file.writelines(''.join('%d, ' % cell for cell in row) + '\n' for row in rows)
+
+    def testRowsSince(self):
+        follower = self.follower('-mc', '2')
+        self.append(0, [[1, 2], [3]])
+        self.append(1, [[5]])
+        self.assertEqual(follower.update(), 3)
+        answer = follower.rowsSince(0)
+        self.assertEqual((answer['sequence'], answer['reset']), (3, False))
+        self.assertEqual(answer['columns'], ['Column 1', 'Column 2'])
+        self.assertEqual(answer['rows'], [[0, 0, [1, 2]], [0, 1, [3]], [1, 0, [5]]])
+
+        self.append(1, [[6]])
+        follower.update()
+        self.assertEqual(follower.rowsSince(3)['rows'], [[1, 1, [6]]])
+        self.assertEqual(follower.rowsSince(4)['rows'], [])
+
+    def testSlidingWindow(self):
+        follower = self.follower('-mc', '1')
+        self.append(0, [[1]])
+        self.append(1, [[1], [2], [3]])
+        follower.update()
+        # the second column dropped the cycle with sequence number 2
+        self.assertEqual(follower.dropped, 2)
+        self.assertEqual([cycle for _, cycle, _ in follower.windows[1]], [1, 2])
+
+        # the first column drops an older cycle later, a client at 1 still has to reload
+        self.append(0, [[2], [3]])
+        follower.update()
+        self.assertEqual(follower.dropped, 2)
+        answer = follower.rowsSince(1)
+        self.assertTrue(answer['reset'])
+        self.assertEqual([row[:2] for row in answer['rows']], [[0, 1], [0, 2], [1, 1], [1, 2]])
+        self.assertFalse(follower.rowsSince(answer['sequence'])['reset'])
+
+    def testTruncatedFile(self):
+        follower = self.follower('-mc', '5')
+        self.append(0, [[1], [2]])
+        follower.update()
+        sequence = follower.sequence
+        with open(self.fileNames[0], 'w') as file:
+            file.write('7,\n')
+        follower.update()
+        self.assertTrue(follower.rowsSince(sequence)['reset'])
+        follower.update()
+        self.assertEqual(follower.rowsSince(-1)['rows'], [[0, 0, [7]]])
+
+
+if __name__ == '__main__':
+    unittest.main()
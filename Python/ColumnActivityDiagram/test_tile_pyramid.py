@@ -0,0 +1,93 @@
+########################################################################################
+# Tests of the levels and tiles of tile_pyramid.py against pooling of the whole activity
+# matrix, run from this folder with:
+# python -m unittest test_tile_pyramid
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import tile_pyramid
+
+
+def pool(matrix, level, how):
+    # pads the matrix to whole 2^level x 2^level blocks of inactive cells
+    size = 2 ** level
+    rows = -(-matrix.shape[0] // size)
+    cols = -(-matrix.shape[1] // size)
+    padded = np.zeros((rows * size, cols * size), dtype=np.int64)
+    padded[:matrix.shape[0], :matrix.shape[1]] = matrix
+    blocks = padded.reshape(rows, size, cols, size)
+    return blocks.max(axis=(1, 3)) if how == 'max' else blocks.sum(axis=(1, 3))
+
+
+class TilePyramidTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.folder, 'activity.csv')
+        rng = np.random.default_rng(3)
+        # odd sizes: 37 cycles of cells 5..49
+        self.matrix = (rng.random((37, 45)) < 0.2).astype(np.int64)
+        with open(self.fileName, 'w') as file:
+            for row in self.matrix:
+                file.write(''.join('%d, ' % (cell + 5) for cell in np.flatnonzero(row)) + '\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testLevels(self):
+        for how in ['max', 'count']:
+            meta = tile_pyramid.buildPyramid(self.fileName, how, tileSize=8, force=True)
+            folder = tile_pyramid.pyramidDir(self.fileName)
+            # the last level fits into one tile
+            self.assertEqual(len(meta['levels']), 4)
+            for number in range(1, len(meta['levels'])):
+                level = np.load(tile_pyramid.levelPath(folder, number))
+                np.testing.assert_array_equal(level, pool(self.matrix, number, how))
+                self.assertEqual(meta['levels'][number]['maxValue'], level.max())
+            self.assertEqual([name for name in os.listdir(folder) if 'tmp' in name], [])
+
+    @unittest.skipIf(os.name == 'nt', 'Windows has no permission bits')
+    def testFileMode(self):
+        umask = os.umask(0o022)
+        try:
+            tile_pyramid.buildPyramid(self.fileName, tileSize=8)
+        finally:
+            os.umask(umask)
+        folder = tile_pyramid.pyramidDir(self.fileName)
+        for name in os.listdir(folder):
+            self.assertEqual(os.stat(os.path.join(folder, name)).st_mode & 0o777, 0o644, name)
+
+    def testTiles(self):
+        pyramid = tile_pyramid.TilePyramid(self.fileName, 'count', tileSize=8)
+        for number in range(len(pyramid.meta['levels'])):
+            pooled = pool(self.matrix, number, 'count')
+            for row in range(-(-pooled.shape[0] // 8)):
+                for col in range(-(-pooled.shape[1] // 8)):
+                    tile = pyramid.tile(number, row, col)
+                    self.assertEqual(tile.shape, (8, 8))
+                    part = pooled[row * 8:(row + 1) * 8, col * 8:(col + 1) * 8]
+                    np.testing.assert_array_equal(tile[:part.shape[0], :part.shape[1]], part)
+                    self.assertEqual(tile.sum(), part.sum())
+        # scaled by the largest count of the level
+        pooled = pool(self.matrix, 1, 'count')
+        np.testing.assert_array_equal(pyramid.intensities(1, 0, 0), pooled[:8, :8] * 255 // pooled.max())
+        with self.assertRaises(IndexError):
+            pyramid.tile(4, 0, 0)
+
+    def testUpToDate(self):
+        meta = tile_pyramid.buildPyramid(self.fileName, tileSize=8)
+        levelFile = tile_pyramid.levelPath(tile_pyramid.pyramidDir(self.fileName), 1)
+        modified = os.path.getmtime(levelFile)
+        self.assertEqual(tile_pyramid.buildPyramid(self.fileName, tileSize=8), meta)
+        self.assertEqual(os.path.getmtime(levelFile), modified)
+        # another tile size is another pyramid
+        self.assertEqual(len(tile_pyramid.buildPyramid(self.fileName, tileSize=16)['levels']), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,403 @@
+########################################################################################
+# Level of detail tile pyramid of the activity matrix (cycle x cell) of draw_figure.py
+# and a small local HTTP server, which returns only the tiles of the visible window.
+#
+# Level 0 is the trace itself (the memory mapped binary cache of sdrcache.py), level L
+# pools blocks of 2^L x 2^L cycles and cells:
+#   max:   1 if any cell of the block is active
+#   count: number of active cells of the block
+# Levels 1.. are stored as memory mapped .npy files in the folder
+# .sdrcache/<name>.pyramid next to the trace and are built in chunks of cycles, so
+# neither building nor serving holds a level in memory. The pyramid is rebuilt when
+# the trace changes.
+#
+# Server:
+#   /                          viewer, drag to pan, wheel to zoom (shift: cells only,
+#                              ctrl: cycles only)
+#   /meta.json                 size of the matrix and of the levels
+#   /tile/<L>/<row>/<col>.bin  tile as tileSize x tileSize uint8 intensities (0..255),
+#                              rows are cycles
+#   /tile/<L>/<row>/<col>.npy  tile with the pooled values
+#
+# python tile_pyramid.py -fn sample.txt -s
+# python tile_pyramid.py -fn "../../Results/Spatial Pooler Stability/ActiveColumns_plotly-input.csv" -p count
+# python tile_pyramid.py -fn trace.csv -s -port 8050 -ts 512
+########################################################################################
+
+import argparse
+import functools
+import html
+import http.server
+import io
+import json
+import math
+import os
+import re
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import sdrcache
+
+# bytes of the temporary counts of one chunk while building level 1
+ChunkBytes = 1 << 27
+
+
+def pyramidDir(fileName, cacheDir=None):
+    return sdrcache.cachePaths(fileName, cacheDir)['meta'][:-len('.meta.json')] + '.pyramid'
+
+
+def levelPath(folder, level):
+    return os.path.join(folder, 'level%d.npy' % level)
+
+
+def levelDtype(level, pool):
+    if pool == 'max':
+        return np.uint8
+    maxCount = 4 ** level
+    if maxCount <= np.iinfo(np.uint8).max:
+        return np.uint8
+    if maxCount <= np.iinfo(np.uint16).max:
+        return np.uint16
+    return np.uint32
+
+
+def _openLevel(folder, level, shape, pool):
+    # unique temporary file, moved to levelPath when the level is complete
+    return np.lib.format.open_memmap(sdrcache.tempPath(levelPath(folder, level), '.tmp.npy'), mode='w+',
+                                     dtype=levelDtype(level, pool), shape=shape)
+
+
+def _buildLevel1(trace, folder, pool, minCell, numCycles, numCells):
+    shape = ((numCycles + 1) // 2, (numCells + 1) // 2)
+    level = _openLevel(folder, 1, shape, pool)
+    # even number of cycles per chunk, the counts of a chunk take at most ChunkBytes
+    chunk = max(2, 2 * (ChunkBytes // (8 * shape[1]) // 2))
+    for start in range(0, numCycles, chunk):
+        stop = min(start + chunk, numCycles)
+        lengths = np.diff(trace.offsets[start:stop + 1])
+        rows = np.repeat(np.arange(stop - start, dtype=np.int64) // 2, lengths)
+        cols = (np.asarray(trace.indices[trace.offsets[start]:trace.offsets[stop]], dtype=np.int64)
+                - minCell) // 2
+        numRows = (stop - start + 1) // 2
+        counts = np.bincount(rows * shape[1] + cols, minlength=numRows * shape[1])
+        counts = counts.reshape(numRows, shape[1])
+        level[start // 2:start // 2 + numRows] = counts > 0 if pool == 'max' else counts
+    return level
+
+
+def _buildNextLevel(previous, folder, number, pool):
+    shape = ((previous.shape[0] + 1) // 2, (previous.shape[1] + 1) // 2)
+    level = _openLevel(folder, number, shape, pool)
+    chunk = max(2, 2 * (ChunkBytes // (8 * previous.shape[1]) // 2))
+    for start in range(0, previous.shape[0], chunk):
+        block = np.asarray(previous[start:start + chunk], dtype=level.dtype)
+        # odd sizes are padded with inactive cells
+        padded = np.zeros((2 * ((len(block) + 1) // 2), 2 * shape[1]), dtype=level.dtype)
+        padded[:block.shape[0], :block.shape[1]] = block
+        blocks = padded.reshape(len(padded) // 2, 2, shape[1], 2)
+        level[start // 2:start // 2 + len(blocks)] = \
+            blocks.max(axis=(1, 3)) if pool == 'max' else blocks.sum(axis=(1, 3))
+    return level
+
+
+def buildPyramid(fileName, pool='max', tileSize=256, cacheDir=None, force=False):
+    """
+    Builds the levels of the pyramid down to the level that fits into one tile.
+    Nothing is done if the pyramid of the trace is up to date.
+
+    @param pool     (str) 'max' or 'count'
+    @param tileSize (int) the last level has at most tileSize cycles and cells
+
+    @return (dict) the meta data of the pyramid
+    """
+    trace = sdrcache.loadSdrTrace(fileName, cacheDir)
+    folder = pyramidDir(fileName, cacheDir)
+    metaPath = os.path.join(folder, 'meta.json')
+    info = sdrcache._sourceInfo(fileName, 'pyramid', None, False, 0)
+    info.update(pool=pool, tileSize=tileSize)
+    meta = None
+    if os.path.exists(metaPath):
+        with open(metaPath) as file:
+            meta = json.load(file)
+    if not force and sdrcache._isValid(meta, info):
+        return meta
+
+    os.makedirs(folder, exist_ok=True)
+    numCycles = len(trace.offsets) - 1
+    minCell = trace.minCell if trace.minCell is not None else 0
+    maxCell = trace.maxCell if trace.maxCell is not None else 0
+    numCells = maxCell - minCell + 1
+    numLevels = 1 + max(0, int(math.ceil(math.log2(max(numCycles, numCells, 1) / float(tileSize)))))
+
+    meta = dict(info)
+    meta.update(numCycles=numCycles, numCells=numCells, minCell=minCell,
+                levels=[{'numCycles': numCycles, 'numCells': numCells, 'maxValue': 1}])
+    for number in range(1, numLevels):
+        if number == 1:
+            level = _buildLevel1(trace, folder, pool, minCell, numCycles, numCells)
+        else:
+            level = _buildNextLevel(np.load(levelPath(folder, number - 1), mmap_mode='r'),
+                                    folder, number, pool)
+        meta['levels'].append({'numCycles': level.shape[0], 'numCells': level.shape[1],
+                               'maxValue': int(level.max()) if level.size > 0 else 0})
+        # the file is renamed after it is unmapped (Windows can not rename mapped files)
+        level.flush()
+        tmpPath = level.filename
+        del level
+        sdrcache.replaceFile(tmpPath, levelPath(folder, number))
+
+    sdrcache._saveMeta(metaPath, meta)
+    return meta
+
+
+class TilePyramid(object):
+    """
+    Cuts tiles out of the memory mapped levels. Level 0 is cut out of the trace,
+    only the cycles of the tile are read.
+    """
+
+    def __init__(self, fileName, pool='max', tileSize=256, cacheDir=None):
+        self.meta = buildPyramid(fileName, pool, tileSize, cacheDir)
+        self.tileSize = tileSize
+        self.trace = sdrcache.loadSdrTrace(fileName, cacheDir)
+        folder = pyramidDir(fileName, cacheDir)
+        self.levels = [None] + [np.load(levelPath(folder, number), mmap_mode='r')
+                                for number in range(1, len(self.meta['levels']))]
+
+    def _baseTile(self, row, col):
+        size = self.tileSize
+        numCycles = self.meta['numCycles']
+        start = min(row * size, numCycles)
+        stop = min(start + size, numCycles)
+        offsets = self.trace.offsets[start:stop + 1]
+        cells = np.asarray(self.trace.indices[offsets[0]:offsets[-1]], dtype=np.int64) \
+            - self.meta['minCell'] - col * size
+        rows = np.repeat(np.arange(stop - start), np.diff(offsets))
+        inTile = (cells >= 0) & (cells < size)
+        tile = np.zeros((size, size), dtype=np.uint8)
+        tile[rows[inTile], cells[inTile]] = 1
+        return tile
+
+    def tile(self, level, row, col):
+        """
+        @return (array) tileSize x tileSize values of the tile, zero outside of the matrix
+        """
+        if level < 0 or level >= len(self.meta['levels']):
+            raise IndexError('Level %d does not exist.' % level)
+        if level == 0:
+            return self._baseTile(row, col)
+        size = self.tileSize
+        values = self.levels[level][row * size:(row + 1) * size, col * size:(col + 1) * size]
+        tile = np.zeros((size, size), dtype=values.dtype)
+        tile[:values.shape[0], :values.shape[1]] = values
+        return tile
+
+    def intensities(self, level, row, col):
+        """
+        Tile scaled to 0..255 by the largest value of the level.
+        """
+        tile = self.tile(level, row, col).astype(np.uint32)
+        maxValue = max(1, self.meta['levels'][level]['maxValue'])
+        return (tile * 255 // maxValue).astype(np.uint8)
+
+
+_tileUrl = re.compile(r'^/tile/(\d+)/(\d+)/(\d+)\.(bin|npy)$')
+
+_viewer = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>%(title)s</title>
+<style>body { margin: 0; font: 14px sans-serif; } canvas { display: block; cursor: grab; }
+#info { position: absolute; left: 8px; top: 4px; background: rgba(255, 255, 255, 0.8); }</style>
+</head><body><div id="info"></div><canvas id="canvas"></canvas>
+<script>
+const canvas = document.getElementById('canvas');
+const context = canvas.getContext('2d');
+const info = document.getElementById('info');
+const bitmaps = new Map();
+let meta = null, view = null, drag = null, maxBitmaps = 512;
+
+function resize() {
+  canvas.width = window.innerWidth;
+  canvas.height = window.innerHeight;
+}
+
+function currentLevel() {
+  // a pooled block covers at least one pixel along both axes, so the number of
+  // visible tiles depends on the size of the window only
+  const level = Math.ceil(Math.log2(1 / Math.min(view.sx, view.sy)));
+  return Math.max(0, Math.min(meta.levels.length - 1, level));
+}
+
+async function loadTile(key, level, row, col) {
+  const size = meta.tileSize;
+  const response = await fetch('tile/' + key + '.bin');
+  const values = new Uint8Array(await response.arrayBuffer());
+  // cycles on the x-axis, cells upwards
+  const image = context.createImageData(size, size);
+  for (let t = 0; t < size; t++) {
+    for (let c = 0; c < size; c++) {
+      const p = 4 * ((size - 1 - c) * size + t);
+      image.data[p] = image.data[p + 1] = image.data[p + 2] = 68;
+      image.data[p + 3] = values[t * size + c];
+    }
+  }
+  bitmaps.set(key, await createImageBitmap(image));
+  // the client keeps a bounded number of tiles as well
+  if (bitmaps.size > maxBitmaps) {
+    bitmaps.delete(bitmaps.keys().next().value);
+  }
+  draw();
+}
+
+function draw() {
+  const level = currentLevel();
+  const span = meta.tileSize * Math.pow(2, level);
+  const levelInfo = meta.levels[level];
+  context.clearRect(0, 0, canvas.width, canvas.height);
+  context.imageSmoothingEnabled = false;
+  const rows = Math.ceil(levelInfo.numCycles / meta.tileSize);
+  const cols = Math.ceil(levelInfo.numCells / meta.tileSize);
+  const row0 = Math.max(0, Math.floor(view.cycle / span));
+  const row1 = Math.min(rows - 1, Math.floor((view.cycle + canvas.width / view.sx) / span));
+  const col0 = Math.max(0, Math.floor(view.cell / span));
+  const col1 = Math.min(cols - 1, Math.floor((view.cell + canvas.height / view.sy) / span));
+  // the visible tiles always fit, otherwise they would evict each other while loading
+  maxBitmaps = Math.max(512, 2 * (row1 - row0 + 1) * (col1 - col0 + 1));
+  for (let row = row0; row <= row1; row++) {
+    for (let col = col0; col <= col1; col++) {
+      const key = level + '/' + row + '/' + col;
+      const bitmap = bitmaps.get(key);
+      if (bitmap === undefined) {
+        bitmaps.set(key, null);
+        loadTile(key, level, row, col);
+      } else if (bitmap !== null) {
+        const x = (row * span - view.cycle) * view.sx;
+        const y = canvas.height - ((col + 1) * span - view.cell) * view.sy;
+        context.drawImage(bitmap, x, y, span * view.sx, span * view.sy);
+      }
+    }
+  }
+  info.textContent = 'cycles ' + Math.round(view.cycle) + '..' +
+    Math.round(view.cycle + canvas.width / view.sx) + ', cells ' +
+    Math.round(meta.minCell + view.cell) + '..' +
+    Math.round(meta.minCell + view.cell + canvas.height / view.sy) + ', level ' + level;
+}
+
+canvas.addEventListener('mousedown', event => { drag = [event.clientX, event.clientY]; });
+window.addEventListener('mouseup', () => { drag = null; });
+window.addEventListener('mousemove', event => {
+  if (drag === null) return;
+  view.cycle -= (event.clientX - drag[0]) / view.sx;
+  view.cell += (event.clientY - drag[1]) / view.sy;
+  drag = [event.clientX, event.clientY];
+  draw();
+});
+canvas.addEventListener('wheel', event => {
+  event.preventDefault();
+  const factor = event.deltaY < 0 ? 1.25 : 0.8;
+  // zoom around the mouse position
+  const cycle = view.cycle + event.clientX / view.sx;
+  const cell = view.cell + (canvas.height - event.clientY) / view.sy;
+  if (!event.shiftKey) view.sx *= factor;
+  if (!event.ctrlKey) view.sy *= factor;
+  view.cycle = cycle - event.clientX / view.sx;
+  view.cell = cell - (canvas.height - event.clientY) / view.sy;
+  draw();
+}, { passive: false });
+window.addEventListener('resize', () => { resize(); draw(); });
+
+fetch('meta.json').then(response => response.json()).then(data => {
+  meta = data;
+  resize();
+  view = { cycle: 0, cell: 0, sx: canvas.width / Math.max(1, meta.numCycles),
+           sy: canvas.height / Math.max(1, meta.numCells) };
+  draw();
+});
+</script></body></html>
+"""
+
+
+class TileHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves the viewer, the meta data and single tiles of self.server.pyramid.
+    """
+
+    def _send(self, content, contentType):
+        self.send_response(200)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        pyramid = self.server.pyramid
+        path = self.path.split('?')[0]
+        if path == '/':
+            self._send((_viewer % {'title': html.escape(self.server.title)}).encode(), 'text/html; charset=utf-8')
+        elif path == '/meta.json':
+            meta = dict(pyramid.meta, tileSize=pyramid.tileSize)
+            self._send(json.dumps(meta).encode(), 'application/json')
+        else:
+            match = _tileUrl.match(path)
+            if match is None:
+                self.send_error(404)
+                return
+            try:
+                content = self.server.tileBytes(int(match.group(1)), int(match.group(2)),
+                                                int(match.group(3)), match.group(4))
+            except IndexError as e:
+                self.send_error(404, str(e))
+                return
+            self._send(content, 'application/octet-stream')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TileServer(http.server.ThreadingHTTPServer):
+    """
+    HTTP server of a pyramid. The encoded tiles are kept in a LRU cache of
+    cacheSize tiles, so the memory of the server stays bounded.
+    """
+
+    def __init__(self, address, pyramid, title='', cacheSize=1024):
+        http.server.ThreadingHTTPServer.__init__(self, address, TileHandler)
+        self.pyramid = pyramid
+        self.title = title
+        self.tileBytes = functools.lru_cache(maxsize=cacheSize)(self._tileBytes)
+
+    def _tileBytes(self, level, row, col, format):
+        if format == 'bin':
+            return self.pyramid.intensities(level, row, col).tobytes()
+        buffer = io.BytesIO()
+        np.save(buffer, self.pyramid.tile(level, row, col))
+        return buffer.getvalue()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tile pyramid of an activity file and local tile server')
+    parser.add_argument('--filename', '-fn', required=True, help='SDR activity file, one row per cycle')
+    parser.add_argument('--pool', '-p', choices=['max', 'count'], default='max',
+                        help='max: any active cell of a block, count: number of active cells of a block')
+    parser.add_argument('--tilesize', '-ts', type=int, default=256, help='Cycles and cells per tile')
+    parser.add_argument('--force', '-f', action='store_true', help='Build even if the pyramid is up to date')
+    parser.add_argument('--serve', '-s', action='store_true', help='Serve the tiles after building')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', '-port', type=int, default=8050)
+    parser.add_argument('--cachesize', '-cs', type=int, default=1024, help='Tiles kept in memory by the server')
+    args = parser.parse_args()
+
+    start = time.time()
+    meta = buildPyramid(args.filename, args.pool, args.tilesize, force=args.force)
+    print("%d cycles x %d cells, %d levels, %.2f s" %
+          (meta['numCycles'], meta['numCells'], len(meta['levels']), time.time() - start))
+
+    if args.serve:
+        pyramid = TilePyramid(args.filename, args.pool, args.tilesize)
+        server = TileServer((args.host, args.port), pyramid, os.path.basename(args.filename), args.cachesize)
+        print("serving http://%s:%d/" % (args.host, args.port))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
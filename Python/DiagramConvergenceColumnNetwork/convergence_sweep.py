@@ -0,0 +1,191 @@
+"""
+Runs the L4/L2 convergence experiment of generate_convergence_activity_figure.py
+for many configurations (number of columns, objects, points) and seeds in a
+process pool.
+
+Every run is a separate task with its own seeds, derived from the run index:
+experimentSeed = --seed + i, machineSeed = --machineseed + i,
+sensationSeed = --sensationseed + i. Runs with saved traces (see
+generate_convergence_activity_figure.py) are replayed instead of trained.
+
+The convergence touch of a run is the first touch where column 1 of L2 has
+sdrSize active cells (the red rectangle of the activity figure). The runs are
+written to the runs table as soon as they finish, the summary table holds
+per configuration the mean convergence touch and its confidence interval
+across the seeds. Runs which never converge are counted but not averaged.
+A run which fails is reported and written with NaN values, the other runs go
+on; failed runs are counted separately in the summary.
+
+python convergence_sweep.py -c 1 2 3 4 5 -n 10
+python convergence_sweep.py -c 3 --objects 10 20 50 -n 20 -w 8 -s summary.csv
+"""
+
+import argparse
+import concurrent.futures
+import itertools
+import math
+import os
+import sys
+import time
+import traceback
+import numpy as np
+import scipy.stats
+
+import generate_convergence_activity_figure as convergence
+
+RunColumns = ['numColumns', 'numObjects', 'numPoints', 'seedIndex',
+              'touchMultiColumn', 'touchSingleColumn', 'numTouches']
+SummaryColumns = ['numColumns', 'numObjects', 'numPoints', 'runs', 'failedRuns',
+                  'convergedMultiColumn', 'meanMultiColumn', 'ciMultiColumn',
+                  'convergedSingleColumn', 'meanSingleColumn', 'ciSingleColumn']
+
+
+def runParams(numColumns, numObjects, numPoints, seedIndex, baseSeeds):
+    """
+    Parameters of one run, the seeds are fixed by the index of the run.
+    """
+    params = dict(convergence.DefaultParams)
+    params.update(numColumns=numColumns, numObjects=numObjects, numPoints=numPoints,
+                  numLocations=numPoints,
+                  machineSeed=baseSeeds['machineSeed'] + seedIndex,
+                  experimentSeed=baseSeeds['experimentSeed'] + seedIndex,
+                  sensationSeed=baseSeeds['sensationSeed'] + seedIndex)
+    return params
+
+
+def runConfiguration(params, traceFolder):
+    """
+    Runs (or replays) one experiment.
+
+    @return (tuple) convergence touch of the multi and single column experiment
+            (None if not converged) and the number of touches
+    """
+    fileName = convergence.tracePath(params, traceFolder)
+    traces = convergence.loadTraces(fileName, params)
+    if traces is None:
+        traces = convergence.runExperiment(params)
+        convergence.saveTraces(fileName, params, traces)
+
+    return (convergence.convergenceTouch(traces['l2ActiveCellsMultiColumn'],
+                                         traces['sdrSizeMultiColumn']),
+            convergence.convergenceTouch(traces['l2ActiveCellsSingleColumn'],
+                                         traces['sdrSizeSingleColumn']),
+            len(traces['l2ActiveCellsMultiColumn']))
+
+
+def meanConfidence(touches, confidence):
+    """
+    Mean and half width of the confidence interval (Student's t) of the
+    convergence touches, runs which did not converge (NaN) are left out.
+
+    @return (tuple) number of converged runs, mean and half width
+    """
+    touches = touches[~np.isnan(touches)]
+    if len(touches) == 0:
+        return 0, np.nan, np.nan
+    if len(touches) == 1:
+        return 1, touches[0], np.nan
+    sem = touches.std(ddof=1) / math.sqrt(len(touches))
+    return len(touches), touches.mean(), sem * scipy.stats.t.ppf((1 + confidence) / 2, len(touches) - 1)
+
+
+def summarize(runs, confidence=0.95):
+    """
+    Aggregates the runs table per configuration.
+
+    @param runs (dict) one array per column of RunColumns
+
+    @return (dict) one array per column of SummaryColumns
+    """
+    keys = np.column_stack([runs['numColumns'], runs['numObjects'], runs['numPoints']])
+    configurations, inverse = np.unique(keys, axis=0, return_inverse=True)
+    summary = {name: [] for name in SummaryColumns}
+    for i, (numColumns, numObjects, numPoints) in enumerate(configurations):
+        # failed runs have no number of touches
+        failed = (inverse.ravel() == i) & np.isnan(runs['numTouches'])
+        rows = (inverse.ravel() == i) & ~failed
+        summary['numColumns'].append(numColumns)
+        summary['numObjects'].append(numObjects)
+        summary['numPoints'].append(numPoints)
+        summary['runs'].append(np.count_nonzero(rows))
+        summary['failedRuns'].append(np.count_nonzero(failed))
+        for experiment in ['MultiColumn', 'SingleColumn']:
+            converged, mean, ci = meanConfidence(runs['touch' + experiment][rows], confidence)
+            summary['converged' + experiment].append(converged)
+            summary['mean' + experiment].append(mean)
+            summary['ci' + experiment].append(ci)
+    return {name: np.array(values) for name, values in summary.items()}
+
+
+def formatRow(values):
+    return ','.join('' if isinstance(value, float) and math.isnan(value) else '%g' % value
+                    for value in values) + '\n'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convergence of the L4/L2 experiment over many seeds')
+    parser.add_argument('--columns', '-c', type=int, nargs='+', default=[1, 2, 3],
+                        help='Numbers of cortical columns')
+    parser.add_argument('--objects', type=int, nargs='+', default=[convergence.DefaultParams['numObjects']])
+    parser.add_argument('--points', type=int, nargs='+', default=[convergence.DefaultParams['numPoints']],
+                        help='Numbers of points (and locations) per object')
+    parser.add_argument('--numseeds', '-n', type=int, default=10, help='Runs per configuration')
+    parser.add_argument('--seed', type=int, default=convergence.DefaultParams['experimentSeed'],
+                        help='Seed of the L4L2 experiments of the first run')
+    parser.add_argument('--machineseed', type=int, default=convergence.DefaultParams['machineSeed'],
+                        help='Seed of the random objects of the first run')
+    parser.add_argument('--sensationseed', type=int, default=convergence.DefaultParams['sensationSeed'],
+                        help='Seed of the order of the sensations of the first run')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Level of the confidence intervals')
+    parser.add_argument('--workers', '-w', type=int, help='Number of parallel processes')
+    parser.add_argument('--traces', '-t', default=convergence.TraceFolder,
+                        help='Folder of the saved traces, default: traces next to this script')
+    parser.add_argument('--runs', '-r', default='convergence_runs.csv', help='Table of all runs')
+    parser.add_argument('--summary', '-s', default='convergence_summary.csv',
+                        help='Table with mean and confidence interval per configuration')
+    args = parser.parse_args()
+
+    baseSeeds = {'experimentSeed': args.seed, 'machineSeed': args.machineseed,
+                 'sensationSeed': args.sensationseed}
+    tasks = list(itertools.product(args.columns, args.objects, args.points, range(args.numseeds)))
+
+    start = time.time()
+    results = []
+    failed = 0
+    # One process per run, so no state of the experiment leaks into the next run.
+    # max_tasks_per_child needs Python 3.11, older versions reuse the processes.
+    poolArgs = {'max_tasks_per_child': 1} if sys.version_info >= (3, 11) else {}
+    with open(args.runs, 'w') as runsFile, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=args.workers, **poolArgs) as executor:
+        runsFile.write(','.join(RunColumns) + '\n')
+        futures = {executor.submit(runConfiguration, runParams(*task, baseSeeds), args.traces): task
+                   for task in tasks}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                touchMulti, touchSingle, numTouches = future.result()
+            except Exception:
+                # a failed run must not stop the sweep, it is written with NaN values
+                failed += 1
+                print("run %s failed:" % dict(zip(RunColumns, futures[future])), file=sys.stderr)
+                traceback.print_exc()
+                touchMulti = touchSingle = None
+                numTouches = np.nan
+            row = futures[future] + (np.nan if touchMulti is None else touchMulti,
+                                     np.nan if touchSingle is None else touchSingle, numTouches)
+            runsFile.write(formatRow(row))
+            runsFile.flush()
+            results.append(row)
+            print("%d/%d runs, %d failed, %.1f s" % (len(results), len(tasks), failed, time.time() - start))
+
+    results.sort()
+    runs = {name: np.array([row[i] for row in results], dtype=float)
+            for i, name in enumerate(RunColumns)}
+    summary = summarize(runs, args.confidence)
+    with open(args.summary, 'w') as file:
+        file.write(','.join(SummaryColumns) + '\n')
+        for row in zip(*[summary[name] for name in SummaryColumns]):
+            file.write(formatRow([float(value) for value in row]))
+    print("%d configurations written to '%s'" % (len(summary['runs']), args.summary))
+    if failed > 0:
+        print("%d runs failed, see the tracebacks above" % failed, file=sys.stderr)
+        sys.exit(1)
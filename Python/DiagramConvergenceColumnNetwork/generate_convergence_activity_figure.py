@@ -22,30 +22,70 @@
 
 """
 This file plots activity of single vs multiple columns as they converge.
+
+The experiment and the plots are separate stages. The inference traces of an
+experiment are saved to traces/convergence_<key>.npz next to this script, where
+the key is a hash of the experiment parameters (including the seeds). Plotting
+the same parameters again replays the saved traces, the experiments are trained
+only if a parameter changes (or with --force). Replaying does not need
+htmresearch.
+
+python generate_convergence_activity_figure.py
+python generate_convergence_activity_figure.py --objects 20 --seed 2
+python generate_convergence_activity_figure.py --force
+python generate_convergence_activity_figure.py --export pdf png
 """
 
+import argparse
+import hashlib
+import json
 import os
 import random
+import sys
+import time
+import numpy as np
 
 import plotly
 import plotly.graph_objs as go
-from htmresearch.frameworks.layers.l2_l4_inference import L4L2Experiment
-from htmresearch.frameworks.layers.object_machine_factory import (
-    createObjectMachine
-)
-
-# Plotly requires a valid user to be able to save High Res images
-plotlyUser = os.environ.get('PLOTLY_USERNAME')
-plotlyAPIKey = os.environ.get('PLOTLY_API_KEY')
-if plotlyAPIKey is not None:
-    plotly.plotly.sign_in(plotlyUser, plotlyAPIKey)
+import plotly.subplots
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import figexport
+import sdrcache
+import sdrio
+
+# Images are rendered locally by kaleido, see figexport.py. Without --export the
+# PDFs are written only if kaleido and Chrome are installed.
+exportFormats = ['pdf'] if figexport.isAvailable() else []
+exportRequired = False
+
+DefaultParams = {
+    'numColumns': 3,
+    'numFeatures': 3,
+    'numPoints': 10,
+    'numLocations': 10,
+    'numObjects': 10,
+    'numRptsPerSensation': 2,
+    'numInputBits': 20,
+    'sensorInputSize': 1024,
+    'externalInputSize': 1024,
+    'machineSeed': 40,
+    'experimentSeed': 1,
+    'sensationSeed': 12,
+}
+
+# default folder of the saved traces, independent of the working directory
+TraceFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traces')
+
+TraceNames = ['l2ActiveCellsMultiColumn', 'l2ActiveCellsSingleColumn',
+              'objectL2Representations']
 
 
 def plotActivity(l2ActiveCellsMultiColumn, highlightTouch):
     maxTouches = 15
     numTouches = min(maxTouches, len(l2ActiveCellsMultiColumn))
     numColumns = len(l2ActiveCellsMultiColumn[0])
-    fig = plotly.tools.make_subplots(
+    fig = plotly.subplots.make_subplots(
         rows=1, cols=numColumns, shared_yaxes=True,
         subplot_titles=('Column 1', 'Column 2', 'Column 3')[0:numColumns]
     )
@@ -65,8 +105,8 @@ def plotActivity(l2ActiveCellsMultiColumn, highlightTouch):
                             'yref': 'y1',
                             'x0': t,
                             'x1': t + 0.6,
-                            'y0': cell,
-                            'y1': cell + 1,
+                            'y0': int(cell),
+                            'y1': int(cell) + 1,
                             'line': {
                                 # 'color': 'rgba(128, 0, 128, 1)',
                                 'width': 2,
@@ -92,7 +132,7 @@ def plotActivity(l2ActiveCellsMultiColumn, highlightTouch):
                     )
 
     # Legend for x-axis and appropriate title
-    fig['layout']['annotations'].append({
+    fig.add_annotation({
         'font': {'size': 20},
         'xanchor': 'center',
         'yanchor': 'bottom',
@@ -103,7 +143,7 @@ def plotActivity(l2ActiveCellsMultiColumn, highlightTouch):
         'y': -0.15,
         'showarrow': False,
     })
-    fig['layout']['annotations'].append({
+    fig.add_annotation({
         'font': {'size': 24},
         'xanchor': 'center',
         'yanchor': 'bottom',
@@ -144,26 +184,25 @@ def plotActivity(l2ActiveCellsMultiColumn, highlightTouch):
 
     # Save plots as HTM and/or PDF
     basename = 'plots/activity_c' + str(numColumns)
-    plotly.offline.plot(fig, filename=basename + '.html', auto_open=True)
+    plotly.offline.plot(fig, filename=basename + '.html',
+                        auto_open=figexport.hasDisplay())
 
-    # Can't save image files in offline mode
-    if plotlyAPIKey is not None:
-        plotly.plotly.image.save_as(fig, filename=basename + '.pdf', scale=4)
+    figexport.writeImages(fig, basename, exportFormats, scale=4, required=exportRequired)
 
 
-def plotL2ObjectRepresentations(exp1):
+def plotL2ObjectRepresentations(objectL2Representations):
     shapes = []
-    numObjects = len(exp1.objectL2Representations)
+    numObjects = len(objectL2Representations)
     for obj in range(numObjects):
-        activeCells = exp1.objectL2Representations[obj][0]
+        activeCells = objectL2Representations[obj][0]
         for cell in activeCells:
             shapes.append(
                 {
                     'type': 'rect',
                     'x0': obj,
                     'x1': obj + 0.75,
-                    'y0': cell,
-                    'y1': cell + 2,
+                    'y0': int(cell),
+                    'y1': int(cell) + 2,
                     'line': {
                         # 'color': 'rgba(128, 0, 128, 1)',
                         'width': 2,
@@ -205,7 +244,7 @@ def plotL2ObjectRepresentations(exp1):
         },
         'shapes': shapes,
         'annotations': [{
-            'xanchor': 'middle',
+            'xanchor': 'center',
             'yanchor': 'bottom',
             'text': 'Target object',
             'x': 1,
@@ -232,35 +271,41 @@ def plotL2ObjectRepresentations(exp1):
         'layout': layout,
     }
     plotPath = plotly.offline.plot(fig, filename='plots/shapes-rectangle.html',
-                                   auto_open=True)
-    print "url=", plotPath
+                                   auto_open=figexport.hasDisplay())
+    print("url=", plotPath)
 
-    # Can't save image files in offline mode
-    if plotlyAPIKey is not None:
-        plotly.plotly.image.save_as(fig,
-                                    filename='plots/target_object_representations.pdf',
-                                    scale=4)
+    figexport.writeImages(fig, 'plots/target_object_representations',
+                          exportFormats, scale=4, required=exportRequired)
 
 
-def runExperiment():
+def runExperiment(params):
     """
     We will run two experiments side by side, with either single column
     or 3 columns
+
+    @param params (dict) experiment parameters, see DefaultParams
+
+    @return (dict) the traces of TraceNames and the sdrSize of both experiments
     """
-    numColumns = 3
-    numFeatures = 3
-    numPoints = 10
-    numLocations = 10
-    numObjects = 10
-    numRptsPerSensation = 2
+    from htmresearch.frameworks.layers.l2_l4_inference import L4L2Experiment
+    from htmresearch.frameworks.layers.object_machine_factory import (
+        createObjectMachine
+    )
+
+    numColumns = params['numColumns']
+    numFeatures = params['numFeatures']
+    numPoints = params['numPoints']
+    numLocations = params['numLocations']
+    numObjects = params['numObjects']
+    numRptsPerSensation = params['numRptsPerSensation']
 
     objectMachine = createObjectMachine(
         machineType="simple",
-        numInputBits=20,
-        sensorInputSize=1024,
-        externalInputSize=1024,
-        numCorticalColumns=3,
-        seed=40
+        numInputBits=params['numInputBits'],
+        sensorInputSize=params['sensorInputSize'],
+        externalInputSize=params['externalInputSize'],
+        numCorticalColumns=numColumns,
+        seed=params['machineSeed']
     )
     objectMachine.createRandomObjects(numObjects, numPoints=numPoints,
                                       numLocations=numLocations,
@@ -280,19 +325,19 @@ def runExperiment():
     # or 3 columns
     exp3 = L4L2Experiment(
         'three_column',
-        numCorticalColumns=3,
-        seed=1
+        numCorticalColumns=numColumns,
+        seed=params['experimentSeed']
     )
 
     exp1 = L4L2Experiment(
         'single_column',
         numCorticalColumns=1,
-        seed=1
+        seed=params['experimentSeed']
     )
 
-    print "train single column "
+    print("train single column ")
     exp1.learnObjects(objectsSingleColumn)
-    print "train multi-column "
+    print("train multi-column ")
     exp3.learnObjects(objects)
 
     # test on the first object
@@ -303,28 +348,28 @@ def runExperiment():
     # We need to set the seed to get specific convergence points for the red
     # rectangle in the graph.
     objectSensations = {}
-    random.seed(12)
+    random.seed(params['sensationSeed'])
     for c in range(numColumns):
         objectCopy = [pair for pair in obj]
         random.shuffle(objectCopy)
         # stay multiple steps on each sensation
         sensations = []
         for pair in objectCopy:
-            for _ in xrange(numRptsPerSensation):
+            for _ in range(numRptsPerSensation):
                 sensations.append(pair)
         objectSensations[c] = sensations
 
     sensationStepsSingleColumn = []
     sensationStepsMultiColumn = []
-    for step in xrange(len(objectSensations[0])):
+    for step in range(len(objectSensations[0])):
         pairs = [
-            objectSensations[col][step] for col in xrange(numColumns)
+            objectSensations[col][step] for col in range(numColumns)
         ]
         sdrs = objectMachine._getSDRPairs(pairs)
         sensationStepsMultiColumn.append(sdrs)
         sensationStepsSingleColumn.append({0: sdrs[0]})
 
-    print "inference: multi-columns "
+    print("inference: multi-columns ")
     exp3.sendReset()
     l2ActiveCellsMultiColumn = []
     L2ActiveCellNVsTimeMultiColumn = []
@@ -336,7 +381,7 @@ def runExperiment():
             activeCellNum += len(exp3.getL2Representations()[c])
         L2ActiveCellNVsTimeMultiColumn.append(activeCellNum / numColumns)
 
-    print "inference: single column "
+    print("inference: single column ")
     exp1.sendReset()
     l2ActiveCellsSingleColumn = []
     L2ActiveCellNVsTimeSingleColumn = []
@@ -346,23 +391,125 @@ def runExperiment():
         L2ActiveCellNVsTimeSingleColumn.append(
             len(exp1.getL2Representations()[0]))
 
-    # Used to figure out where to put the red rectangle!
-    sdrSize = exp1.config["L2Params"]["sdrSize"]
-    singleColumnHighlight = next(
-        (idx for idx, value in enumerate(l2ActiveCellsSingleColumn)
-         if len(value[0]) == sdrSize), None)
-    sdrSize = exp3.config["L2Params"]["sdrSize"]
-    multiColumnHighlight = next(
-        (idx for idx, value in enumerate(l2ActiveCellsMultiColumn)
-         if len(value[0]) == sdrSize), None)
+    return {
+        'l2ActiveCellsMultiColumn': l2ActiveCellsMultiColumn,
+        'l2ActiveCellsSingleColumn': l2ActiveCellsSingleColumn,
+        'objectL2Representations': [exp1.objectL2Representations[obj]
+                                    for obj in range(numObjects)],
+        'sdrSizeMultiColumn': exp3.config["L2Params"]["sdrSize"],
+        'sdrSizeSingleColumn': exp1.config["L2Params"]["sdrSize"],
+    }
 
-    plotActivity(l2ActiveCellsMultiColumn, multiColumnHighlight)
-    plotActivity(l2ActiveCellsSingleColumn, singleColumnHighlight)
-    plotL2ObjectRepresentations(exp1)
 
+def tracePath(params, folder=TraceFolder):
+    """
+    File of the traces of an experiment, named by a hash of the parameters.
+    """
+    key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(folder, 'convergence_%s.npz' % key)
 
-def generateFigure():
-    runExperiment()
 
+def saveTraces(fileName, params, traces):
+    """
+    Saves the traces as CSR arrays (see sdrio.py), one row per step and column.
+    """
+    arrays = {'params': json.dumps(params, sort_keys=True),
+              'sdrSizeMultiColumn': traces['sdrSizeMultiColumn'],
+              'sdrSizeSingleColumn': traces['sdrSizeSingleColumn']}
+    for name in TraceNames:
+        steps = traces[name]
+        numColumns = len(steps[0]) if len(steps) > 0 else 0
+        trace = sdrio.rowsToTrace(np.array(sorted(steps[t][c]), dtype=np.int32)
+                                  for t in range(len(steps)) for c in range(numColumns))
+        arrays[name + 'Cells'] = trace.indices
+        arrays[name + 'Offsets'] = trace.offsets
+        arrays[name + 'Columns'] = numColumns
+
+    def write(tmpPath):
+        with open(tmpPath, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+
+    # runs of the sweep with the same parameters may save the same file at once
+    os.makedirs(os.path.dirname(fileName) or '.', exist_ok=True)
+    sdrcache._replace(sdrcache.tempPath(fileName), fileName, write)
+
+
+def loadTraces(fileName, params):
+    """
+    Loads the traces saved by saveTraces.
 
-generateFigure()
+    @return (dict) the traces, or None if the file is missing or was saved with
+            other parameters
+    """
+    if not os.path.exists(fileName):
+        return None
+    with np.load(fileName) as arrays:
+        if str(arrays['params']) != json.dumps(params, sort_keys=True):
+            return None
+        traces = {'sdrSizeMultiColumn': int(arrays['sdrSizeMultiColumn']),
+                  'sdrSizeSingleColumn': int(arrays['sdrSizeSingleColumn'])}
+        for name in TraceNames:
+            numColumns = int(arrays[name + 'Columns'])
+            rows = sdrio.sdrRows(sdrio.SdrTrace(arrays[name + 'Cells'],
+                                                arrays[name + 'Offsets'], None, None))
+            traces[name] = [rows[t:t + numColumns] for t in range(0, len(rows), numColumns)]
+    return traces
+
+
+def convergenceTouch(l2ActiveCells, sdrSize):
+    """
+    First step where column 1 has converged to a representation of sdrSize cells.
+    Used to figure out where to put the red rectangle!
+    """
+    return next((idx for idx, value in enumerate(l2ActiveCells)
+                 if len(value[0]) == sdrSize), None)
+
+
+def generateFigure(params, traceFolder=TraceFolder, force=False):
+    fileName = tracePath(params, traceFolder)
+    traces = None if force else loadTraces(fileName, params)
+    if traces is None:
+        traces = runExperiment(params)
+        saveTraces(fileName, params, traces)
+        print("traces saved to %s" % fileName)
+    else:
+        print("replaying %s" % fileName)
+
+    start = time.time()
+    plotActivity(traces['l2ActiveCellsMultiColumn'],
+                 convergenceTouch(traces['l2ActiveCellsMultiColumn'],
+                                  traces['sdrSizeMultiColumn']))
+    plotActivity(traces['l2ActiveCellsSingleColumn'],
+                 convergenceTouch(traces['l2ActiveCellsSingleColumn'],
+                                  traces['sdrSizeSingleColumn']))
+    plotL2ObjectRepresentations(traces['objectL2Representations'])
+    print("plots: %.2f s" % (time.time() - start))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Activity of single vs multiple columns as they converge')
+    parser.add_argument('--objects', type=int, default=DefaultParams['numObjects'])
+    parser.add_argument('--machineseed', type=int, default=DefaultParams['machineSeed'],
+                        help='Seed of the random objects')
+    parser.add_argument('--seed', type=int, default=DefaultParams['experimentSeed'],
+                        help='Seed of the L4L2 experiments')
+    parser.add_argument('--sensationseed', type=int, default=DefaultParams['sensationSeed'],
+                        help='Seed of the order of the sensations')
+    parser.add_argument('--traces', '-t', default=TraceFolder,
+                        help='Folder of the saved traces, default: traces next to this script')
+    parser.add_argument('--force', '-f', action='store_true',
+                        help='Run the experiments even if the traces are saved')
+    parser.add_argument('--export', '-e', nargs='*', choices=figexport.Formats,
+                        help='Image formats, rendered locally (default: pdf if kaleido and Chrome are installed)')
+    args = parser.parse_args()
+
+    if args.export is not None:
+        exportFormats = args.export
+        exportRequired = True
+
+    params = dict(DefaultParams)
+    params.update(numObjects=args.objects,
+                  machineSeed=args.machineseed, experimentSeed=args.seed,
+                  sensationSeed=args.sensationseed)
+    generateFigure(params, args.traces, args.force)
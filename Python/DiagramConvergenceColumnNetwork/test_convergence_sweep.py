@@ -0,0 +1,46 @@
+########################################################################################
+# Tests of the summary of convergence_sweep.py, run from this folder with:
+# python -m unittest test_convergence_sweep
+########################################################################################
+
+import math
+import unittest
+import numpy as np
+import scipy.stats
+
+import convergence_sweep
+
+nan = np.nan
+
+
+class ConvergenceSweepTest(unittest.TestCase):
+
+    def testMeanConfidence(self):
+        touches = np.array([4.0, nan, 6.0, 8.0])
+        converged, mean, ci = convergence_sweep.meanConfidence(touches, 0.95)
+        self.assertEqual((converged, mean), (3, 6.0))
+        self.assertAlmostEqual(ci, 2.0 / math.sqrt(3) * scipy.stats.t.ppf(0.975, 2))
+        self.assertEqual(convergence_sweep.meanConfidence(np.array([5.0]), 0.95)[:2], (1, 5.0))
+        self.assertEqual(convergence_sweep.meanConfidence(np.array([nan]), 0.95)[0], 0)
+
+    def testSummarizeFailedRuns(self):
+        # numColumns, numObjects, numPoints, seedIndex, touchMultiColumn, touchSingleColumn, numTouches
+        rows = [(1, 10, 10, 0, 3, 5, 20),
+                (1, 10, 10, 1, nan, 7, 20),
+                (1, 10, 10, 2, nan, nan, nan),
+                (2, 10, 10, 0, 2, 4, 20)]
+        runs = {name: np.array([row[i] for row in rows], dtype=float)
+                for i, name in enumerate(convergence_sweep.RunColumns)}
+        summary = convergence_sweep.summarize(runs)
+        self.assertEqual(summary['numColumns'].tolist(), [1, 2])
+        self.assertEqual(summary['runs'].tolist(), [2, 1])
+        self.assertEqual(summary['failedRuns'].tolist(), [1, 0])
+        self.assertEqual(summary['convergedMultiColumn'].tolist(), [1, 1])
+        self.assertEqual(summary['meanSingleColumn'].tolist(), [6.0, 4.0])
+
+    def testFormatRow(self):
+        self.assertEqual(convergence_sweep.formatRow([1, nan, 2.5]), '1,,2.5\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
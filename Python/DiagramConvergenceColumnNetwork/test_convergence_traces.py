@@ -0,0 +1,56 @@
+########################################################################################
+# Tests of the saved traces of generate_convergence_activity_figure.py (no htmresearch
+# needed), run from this folder with:
+# python -m unittest test_convergence_traces
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import generate_convergence_activity_figure as convergence
+
+# two steps of two columns, the cells of a step are sets like in the experiment
+Traces = {
+    'l2ActiveCellsMultiColumn': [[{3, 1}, {2}], [{1, 2, 3}, set()]],
+    'l2ActiveCellsSingleColumn': [[{5}], [{4, 5, 6}]],
+    'objectL2Representations': [[{7, 8}]],
+    'sdrSizeMultiColumn': 3,
+    'sdrSizeSingleColumn': 3,
+}
+
+
+class ConvergenceTracesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.params = dict(convergence.DefaultParams)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testRoundTrip(self):
+        fileName = convergence.tracePath(self.params, os.path.join(self.folder, 'traces'))
+        convergence.saveTraces(fileName, self.params, Traces)
+        self.assertEqual(os.listdir(os.path.dirname(fileName)), [os.path.basename(fileName)])
+
+        traces = convergence.loadTraces(fileName, self.params)
+        for name in convergence.TraceNames:
+            self.assertEqual([[sorted(cells) for cells in step] for step in traces[name]],
+                             [[sorted(cells) for cells in step] for step in Traces[name]])
+        self.assertEqual(convergence.convergenceTouch(traces['l2ActiveCellsMultiColumn'], 3), 1)
+        self.assertEqual(convergence.convergenceTouch(traces['l2ActiveCellsSingleColumn'], 4), None)
+
+        # other parameters are another experiment
+        self.params['experimentSeed'] += 1
+        self.assertIsNone(convergence.loadTraces(fileName, self.params))
+        self.assertNotEqual(convergence.tracePath(self.params, self.folder), fileName)
+
+    def testTraceFolder(self):
+        self.assertEqual(os.path.dirname(convergence.tracePath(self.params)),
+                         os.path.join(os.path.dirname(os.path.abspath(convergence.__file__)), 'traces'))
+
+
+if __name__ == '__main__':
+    unittest.main()
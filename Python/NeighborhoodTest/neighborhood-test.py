@@ -2,18 +2,21 @@
 # Representing of neigborhood
 # Example:
 # python ./NeighborhoodTest/neighborhood-test.py ./NeighborhoodTest/resultfile.csv
+# Rows parsed once and then loaded from the binary cache (see sdrcache.py):
+# python ./NeighborhoodTest/neighborhood-test.py ./NeighborhoodTest/resultfile.csv -c
 ########################################################################################
 
 
-import plotly
 import csv
+import os
 import sys
-plotly.__version__
 import numpy as np
-import plotly.plotly as py
-import plotly.tools as tls
+import matplotlib.colors
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import sdrcache
+
 bubbles_mpl = plt.figure()
 defColor='blue'
 defActiveColor = 'green'
@@ -22,51 +25,54 @@ defBubblSize=10
 yScale =1
 maxRows=70 * yScale
 
+# color index 0, 1 and 2 of every point
+palette = matplotlib.colors.to_rgba_array([defColor, defActiveColor, defCenterColor])
+
 print("Neigborhood Results")
 print(len(sys.argv))
 
 for arg in sys.argv:
      print(arg)
 
-if len(sys.argv) != 2:
+useCache = '-c' in sys.argv[1:]
+fileArgs = [arg for arg in sys.argv[1:] if arg != '-c']
+if len(fileArgs) != 1:
     print("WARNING: Start with argumnet. I.E.: 'python neighborhood-test.py .\resultfile.csv'")
     fileName = "./NeighborhoodTest/default.csv"
 else:
-    fileName = sys.argv[1]
+    fileName = fileArgs[0]
 
 print("Loading file '" + fileName + "'")
 
-isFirstRow = True
-i = 0
-numOfPoints = 0
+colorRows = []
 
 with open(fileName, 'r') as csvfile:
     file = csv.reader(csvfile, delimiter='|')
-    for row in file:
-      
-        if isFirstRow:
-            numOfPoints =  int(row[0])       
-            colors = [defColor for point in range(numOfPoints)]        
-            plt.axis([0,numOfPoints + 2, 0, maxRows + 2])
-            isFirstRow=False
-            plt.title('Neighborhoods. Radius = ' + row[2] )
-            print("Plot for radius=" + row[2] + ", cells=" + str(numOfPoints))
-            row = next(file, None)
-           
-        yVals = [3 + yScale*i for indx in range(numOfPoints)]   
-       
-        xVals = [xIndx for xIndx in range(numOfPoints)]   
-
-        bubbleSizes = [defBubblSize for num in row]
+    header = next(file)
+    numOfPoints =  int(header[0])
+    plt.axis([0,numOfPoints + 2, 0, maxRows + 2])
+    plt.title('Neighborhoods. Radius = ' + header[2] )
+    print("Plot for radius=" + header[2] + ", cells=" + str(numOfPoints))
 
-        colors = ['blue' for num in range(numOfPoints)]
+    if useCache:
+        table = sdrcache.loadTable(fileName, '|', skipRows=1)
+        rows = (table.values[table.offsets[r]:table.offsets[r + 1]].astype(np.int64)
+                for r in range(len(table.offsets) - 1))
+    else:
+        rows = (np.array([int(indx) for indx in row if indx.strip()]) for row in file if len(row) > 0)
 
-        for indx in row:
-            colors[int(indx)] = defActiveColor 
+    for indices in rows:
+        # empty and delimiter only rows have no center
+        if len(indices) == 0:
+            continue
+        colors = np.zeros(numOfPoints, dtype=np.int8)
+        colors[indices] = 1
+        colors[indices[0]] = 2
+        colorRows.append(colors)
 
-        colors[int(row[0])] = defCenterColor
+# All rows are drawn by one scatter, row i at y = 3 + yScale*i.
+colorIndices = np.array(colorRows).reshape(-1, numOfPoints)
+yVals, xVals = np.indices(colorIndices.shape)
+plt.scatter(xVals.ravel(), 3 + yScale*yVals.ravel(), s=defBubblSize, c=palette[colorIndices.ravel()])
 
-        plt.scatter(xVals,yVals, s=bubbleSizes, c= colors)
-        i=i+1
-    
-plt.show()
\ No newline at end of file
+plt.show()
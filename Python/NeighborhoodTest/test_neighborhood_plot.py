@@ -0,0 +1,40 @@
+########################################################################################
+# Runs neighborhood-test.py without a display (Agg backend), run from this folder with:
+# python -m unittest test_neighborhood_plot
+########################################################################################
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+Script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'neighborhood-test.py')
+
+
+class NeighborhoodPlotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.folder, 'result.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def runScript(self, *args):
+        environment = dict(os.environ, MPLBACKEND='Agg')
+        return subprocess.run([sys.executable, Script, self.fileName] + list(args), env=environment,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+
+    def testEmptyRows(self):
+        with open(self.fileName, 'w') as file:
+            file.write('8|8|1|header\n0|0|1\n\n|\n3|2|3|4\n||\n7|6|7\n')
+        for args in [[], ['-c']]:
+            result = self.runScript(*args)
+            self.assertEqual(result.returncode, 0, result.stdout)
+            self.assertIn('Plot for radius=1, cells=8', result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
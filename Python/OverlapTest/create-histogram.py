@@ -4,67 +4,55 @@
 # 'python create-histogram.py <Number of Points on X>, <name of data> <data file1>,.., <name of data> <data file N>"
 # Example: 
 # python ./OverlapTest/create-histogram.py graph1 28 data1 ./OverlapTest/default1-data.txt data2 ./OverlapTest/default2-data.txt
+# Large files are streamed in blocks, -r sets the range of the bins, -w the number of files read in parallel:
+# python ./OverlapTest/create-histogram.py graph1 50 run1 overlaps1.txt run2 overlaps2.txt -r 0 2048 -w 4
 ####################################################################################################################################
 
 
-import plotly
-import csv
+import argparse
+import os
 import sys
 import numpy as np
-import plotly.plotly as py
-import plotly.tools as tls
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import streamhist
 
-fileArgs = []
-numOfPoints = 10
 
+# Workers of the process pool import this file again, so it only runs as script.
+if __name__ == '__main__':
+    if len(sys.argv) <= 2:
+        print("WARNING: Start with argumnet. I.E.: 'python create-histogram.py 28, data1, .\dataFile1.txt, data2, .\dataFile2.txt'")
+        print("'python create-histogram.py <title> <Number of Points on X>, <name of data> <data file1>,.., <name of data> <data file N>")
+        sys.argv = "./OverlapTest/create-histogram.py", "graph1", "28", "data1", "./OverlapTest/default1-data.txt", "data2", "./OverlapTest/default2-data.txt"
 
-if len(sys.argv) <= 2:
-    print("WARNING: Start with argumnet. I.E.: 'python create-histogram.py 28, data1, .\dataFile1.txt, data2, .\dataFile2.txt'")
-    print("'python create-histogram.py <title> <Number of Points on X>, <name of data> <data file1>,.., <name of data> <data file N>")
-    sys.argv = "./OverlapTest/create-histogram.py", "graph1", "28", "data1", "./OverlapTest/default1-data.txt", "data2", "./OverlapTest/default2-data.txt"
+    print(sys.argv)
 
-print(sys.argv)
+    parser = argparse.ArgumentParser(description='Histogram of several data files')
+    parser.add_argument('title', help='Title of the figure')
+    parser.add_argument('numOfPoints', type=int, help='Number of bin edges on X')
+    parser.add_argument('data', nargs='+', help='Pairs of <name of data> <data file>')
+    parser.add_argument('--range', '-r', type=float, nargs=2, help='Range of the bins, default is min/max of all files')
+    parser.add_argument('--workers', '-w', type=int, help='Number of files read in parallel')
+    args = parser.parse_args(list(sys.argv[1:]))
 
-numOfPoints = int(sys.argv[2])
-paramIndx = 0
-currTuppleArr = None
+    if len(args.data) % 2 != 0:
+        parser.error('every data file needs a name')
+    fileArgs = list(zip(args.data[0::2], args.data[1::2]))
 
-for i in range(3, len(sys.argv)):
-    prm = paramIndx % 2
-    if prm == 0:
-        currTuppleArr = []
-    
-    currTuppleArr.append(sys.argv[i])
+    # The files are streamed, the bins cover the values of all files.
+    bins, counts = streamhist.histograms([file[1] for file in fileArgs], args.numOfPoints,
+                                         args.range, args.workers)
 
-    if prm == 1:   
-        tpl = (currTuppleArr[0], currTuppleArr[1])              
-        fileArgs.append(tpl)
-        currTuppleArr = None
-
-    paramIndx += 1
-
-
-isFirst = True
-bins = None
-for file in fileArgs:
-    dt = np.loadtxt(file[1], comments="#", delimiter=",", unpack=False)
-    
-    if isFirst:
-        bins = np.linspace(min(dt), max(dt), numOfPoints)             
-        isFirst = False
-
-    print(dt)
-    plt.hist(dt, bins, alpha=0.5, label=file[0])
-
-
-plt.legend(loc='upper right')
-plt.xlabel("Values")
-plt.ylabel("Frequency")
-plt.title(sys.argv[1])
-plt.show()
-plt.savefig("figure")
-plt.close()
+    for file, fileCounts in zip(fileArgs, counts):
+        print("%s: %d values" % (file[1], fileCounts.sum()))
+        plt.hist(bins[:-1], bins, weights=fileCounts, alpha=0.5, label=file[0])
 
 
+    plt.legend(loc='upper right')
+    plt.xlabel("Values")
+    plt.ylabel("Frequency")
+    plt.title(args.title)
+    plt.savefig("figure")
+    plt.show()
+    plt.close()
@@ -1,12 +1,9 @@
+import os
+import sys
 import numpy as np
-from decimal import *
 
-def factorial(n):
-    fact = 1
-    for i in range(1,n+1): 
-        fact = fact * i 
-    
-    return Decimal(fact)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import sdrmath
 
 f = 0.02
 
@@ -14,16 +11,17 @@ lines = open("./sparse.txt", 'w')
 
 n=16
 w=1
-print(factorial(n)/(factorial(w)*factorial(n-w)))
+print(sdrmath.exactBinomial(n, w))
 
-for x in range(500, 4096, 100):
+xs = np.arange(500, 4096, 100)
+ws = (xs * f).astype(int)
+logRes = sdrmath.logBinomial(xs, ws)
 
-    n = x
-    w = int(x * f)
+for x, w, logR in zip(xs, ws, logRes):
 
-    res = factorial(n)/(factorial(w)*factorial(n-w))
-    text = "%d | %10.3E\n" % (x, res) 
-    print("%d %d %10.3E" % (x, w, res))
+    res = sdrmath.formatLog(logR)
+    text = "%d | %s\n" % (x, res) 
+    print("%d %d %s" % (x, w, res))
     lines.write(text)
 
-lines.close()
\ No newline at end of file
+lines.close()
@@ -1,26 +1,19 @@
+import os
+import sys
 import numpy as np
-from decimal import *
 
-def factorial(n):
-    fact = 1
-    for i in range(1,n+1): 
-        fact = fact * i 
-    
-    return Decimal(fact)
-
-def  nNadk(n, k):    
-    return factorial(n)/(factorial(k)*factorial(n-k))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import sdrmath
 
 # a: Active bits
 # n: Bits
 # q: Threshold
-def errProbability(n, a, q):   
-    a=int(a)
-    f1 = nNadk(a, q) 
-    f2 = nNadk(n-a, a-q) 
-    f3 = nNadk(n, a) 
-    res = (f1*f2)/f3
-    return res
+# Probability of an overlap of exactly q bits, computed in log space.
+def logErrProbability(n, a, q):
+    return sdrmath.logOverlapProbability(n, int(a), q)
+
+def errProbability(n, a, q, exact=False):
+    return sdrmath.overlapProbability(n, int(a), q, exact=exact)
 
 print(" EXPERIMENT False Positives ")
 
@@ -32,20 +25,21 @@ for n in range(512, 5000, 512):
     a = int(n * f)
     b = int(a/3)
     # 30% of possible active bits are used as a threshold. 
-    for q in range(a, b, -1):
-       #print("%d %d %d %10.3E" % (n, a, q, errProbability(n, a, q)))
-       print("%d %d %10.3E" % (n, q, errProbability(n, a, q)))
+    qs = np.arange(a, b, -1)
+    for q, logErr in zip(qs, logErrProbability(n, a, qs)):
+       #print("%d %d %d %s" % (n, a, q, sdrmath.formatLog(logErr)))
+       print("%d %d %s" % (n, q, sdrmath.formatLog(logErr)))
     
 lines = open("./sparse.txt", 'w')
 
-for x in range(100, 4096, 500):
+xs = np.arange(100, 4096, 500)
+ws = (xs * f).astype(int)
 
-    n = x
-    w = int(x * f)
+for x, w, logRes in zip(xs, ws, sdrmath.logBinomial(xs, ws)):
 
-    res = factorial(n)/(factorial(w)*factorial(n-w))
-    text = "%d | %10.3E\n" % (x, res) 
-    print("%d %d %10.3E" % (x, w, res))
+    res = sdrmath.formatLog(logRes)
+    text = "%d | %s\n" % (x, res) 
+    print("%d %d %s" % (x, w, res))
     lines.write(text)
 
 lines.close()
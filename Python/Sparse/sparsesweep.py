@@ -0,0 +1,114 @@
+########################################################################################
+# Parameter sweep of SDR false positive probability and union capacity.
+# Evaluates the grid n x sparsity (or active bits) x threshold in chunks of n values
+# across a process pool and writes one table (.csv or .npz) with the columns:
+#   n, sparsity, a, theta, log10FalsePositive, unionCapacity
+# log10FalsePositive: log10 of the probability that a random SDR with a active bits
+#                     overlaps a stored SDR with at least theta bits.
+# unionCapacity:      number of SDRs that can be stored in a union before a random
+#                     SDR matches it with a probability above --maxerror (inf: no limit).
+# Examples:
+# python sparsesweep.py -o sweep.csv
+# python sparsesweep.py -nmin 1024 -nmax 65536 -ns 1024 -s 0.01 0.02 0.05 -mt 0.3 -o sweep.npz
+# python sparsesweep.py -nmin 2048 -nmax 2048 -a 20 40 80 -o fixedbits.csv
+########################################################################################
+
+import argparse
+import concurrent.futures
+import math
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import sdrmath
+
+Columns = ['n', 'sparsity', 'a', 'theta', 'log10FalsePositive', 'unionCapacity']
+
+
+def sweepChunk(ns, sparsities, activeBits, minThreshold, maxError):
+    """
+    Evaluates the grid for some values of n.
+
+    @param ns           (list)  numbers of bits
+    @param sparsities   (list)  sparsities, a = int(n * sparsity)
+    @param activeBits   (list)  active bits, used instead of sparsities if not empty
+    @param minThreshold (float) smallest threshold as fraction of a
+    @param maxError     (float) false positive probability that limits the capacity
+
+    @return (dict) one array per column
+    """
+    rows = {name: [] for name in Columns}
+    for n in ns:
+        if len(activeBits) > 0:
+            pairs = [(float(a) / n, int(a)) for a in activeBits]
+        else:
+            pairs = [(f, int(n * f)) for f in sparsities]
+
+        for f, a in pairs:
+            if a < 1 or a > n:
+                continue
+            # thresholds from a down to minThreshold * a, like sparseerrorpropability.py
+            thetas = np.arange(max(1, int(math.ceil(a * minThreshold))), a + 1)
+            rows['n'].append(np.full(len(thetas), n))
+            rows['sparsity'].append(np.full(len(thetas), f))
+            rows['a'].append(np.full(len(thetas), a))
+            rows['theta'].append(thetas)
+
+    if len(rows['n']) == 0:
+        return {name: np.empty(0) for name in Columns}
+
+    table = {name: np.concatenate(rows[name]) for name in ['n', 'sparsity', 'a', 'theta']}
+    logP = sdrmath.logFalsePositiveProbability(table['n'], table['a'], table['theta'])
+    table['log10FalsePositive'] = logP / math.log(10)
+    table['unionCapacity'] = sdrmath.unionCapacity(
+        table['n'], table['a'], table['theta'], maxError)
+    return table
+
+
+def writeTable(fileName, table):
+    if fileName.lower().endswith('.npz'):
+        np.savez_compressed(fileName, **table)
+    else:
+        data = np.column_stack([table[name] for name in Columns])
+        np.savetxt(fileName, data, delimiter=',', header=','.join(Columns), comments='',
+                   fmt=['%d', '%.6g', '%d', '%d', '%.6f', '%.0f'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sweep SDR false positive probability and capacity')
+    parser.add_argument('--nmin', '-nmin', help='Smallest number of bits', type=int, default=512)
+    parser.add_argument('--nmax', '-nmax', help='Largest number of bits', type=int, default=65536)
+    parser.add_argument('--nstep', '-ns', help='Step of the number of bits', type=int, default=512)
+    parser.add_argument('--sparsity', '-s', help='Sparsities', type=float, nargs='+', default=[0.02])
+    parser.add_argument('--activebits', '-a', help='Active bits (instead of sparsities)',
+                        type=int, nargs='+', default=[])
+    parser.add_argument('--minthreshold', '-mt', help='Smallest threshold as fraction of the active bits',
+                        type=float, default=1.0 / 3)
+    parser.add_argument('--maxerror', '-me', help='False positive probability limiting the union capacity',
+                        type=float, default=1e-9)
+    parser.add_argument('--chunk', '-c', help='Number of n values per task', type=int, default=4)
+    parser.add_argument('--workers', '-w', help='Number of parallel processes', type=int)
+    parser.add_argument('--out', '-o', help='Output file (.csv or .npz)', default='sparsesweep.csv')
+    args = parser.parse_args()
+
+    start = time.time()
+    ns = list(range(args.nmin, args.nmax + 1, args.nstep))
+    # Larger n have more thresholds, interleaving balances the chunks.
+    numChunks = max(1, (len(ns) + args.chunk - 1) // args.chunk)
+    chunks = [ns[i::numChunks] for i in range(numChunks)]
+
+    parts = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(sweepChunk, chunk, args.sparsity, args.activebits,
+                                   args.minthreshold, args.maxerror) for chunk in chunks]
+        for future in futures:
+            parts.append(future.result())
+
+    table = {name: np.concatenate([part[name] for part in parts]) for name in Columns}
+    order = np.lexsort((table['theta'], table['a'], table['sparsity'], table['n']))
+    table = {name: values[order] for name, values in table.items()}
+
+    writeTable(args.out, table)
+    print("%d rows written to '%s' in %.2f s" % (len(order), args.out, time.time() - start))
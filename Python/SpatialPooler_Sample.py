@@ -1,10 +1,22 @@
+############################################
+# Spatial Pooler sample with the NumPy Spatial Pooler of spatialpooler.py
+# (the nupic spatial pooler does not install on Python 3 anymore).
+# Learns MNIST images (or random inputs), prints the throughput in inputs per second
+# and plots the overlap of the active columns against the noise of the inputs.
+# python SpatialPooler_Sample.py -i ../source/UnitTestsProject/MnistPng28x28_smallerdataset/training -e 2
+# python SpatialPooler_Sample.py -n 1000 -c 64 64 -lb 100 -o noise.png
+############################################
+
+import argparse
+import glob
+import os
+import time
 import matplotlib
 import numpy as np
-import random
 
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-from nupic.algorithms.spatial_pooler import SpatialPooler as SP
+from spatialpooler import SpatialPooler as SP
 
 def percentOverlap(x1, x2, size):
   """
@@ -22,4 +34,78 @@ def percentOverlap(x1, x2, size):
   percentOverlap = 0
   if minX1X2 > 0:
     percentOverlap = float(np.dot(x1, x2))/float(minX1X2)
-  return percentOverlap
\ No newline at end of file
+  return percentOverlap
+
+
+def readImages(folder, maxImages=None):
+  """
+  Reads the PNG images of a MNIST folder (one sub folder per digit) as binary vectors.
+
+  @return (tuple) inputs (one row per image) and the image dimensions
+  """
+  fileNames = sorted(glob.glob(os.path.join(folder, '*', '*.png')) or glob.glob(os.path.join(folder, '*.png')))
+  if maxImages is not None:
+    fileNames = fileNames[:maxImages]
+  if len(fileNames) == 0:
+    raise IOError("No images in '%s'." % folder)
+  images = [plt.imread(fileName) for fileName in fileNames]
+  images = [image.mean(axis=2) if image.ndim == 3 else image for image in images]
+  return (np.array(images) > 0.5).reshape(len(images), -1).astype(np.uint8), list(images[0].shape)
+
+
+def addNoise(inputs, noiseLevel, rng):
+  """
+  Flips the given fraction of the bits of every input.
+  """
+  flip = rng.random(inputs.shape) < noiseLevel
+  return np.where(flip, 1 - inputs, inputs)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Spatial Pooler throughput and noise robustness')
+  parser.add_argument('--images', '-i', help='MNIST folder with PNG images, random inputs if not given')
+  parser.add_argument('--numinputs', '-n', type=int, default=1000, help='Number of inputs (images or random)')
+  parser.add_argument('--inputsize', '-s', type=int, default=1024, help='Size of the random inputs')
+  parser.add_argument('--columns', '-c', type=int, nargs='+', default=[2048], help='Column dimensions')
+  parser.add_argument('--density', '-d', type=float, default=0.02, help='Density of the active columns')
+  parser.add_argument('--epochs', '-e', type=int, default=1)
+  parser.add_argument('--learnbatch', '-lb', type=int, default=1,
+                      help='Inputs learned at once, 1 is the sequential algorithm')
+  parser.add_argument('--seed', type=int, default=42)
+  parser.add_argument('--output', '-o', default='SpatialPooler noise robustness.png')
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(args.seed)
+  if args.images is not None:
+    inputs, inputDimensions = readImages(args.images, args.numinputs)
+  else:
+    inputs = (rng.random((args.numinputs, args.inputsize)) < 0.1).astype(np.uint8)
+    inputDimensions = [args.inputsize]
+
+  start = time.time()
+  sp = SP(inputDimensions, args.columns, potentialRadius=-1, potentialPct=0.5, globalInhibition=True,
+          localAreaDensity=args.density, stimulusThreshold=0, seed=args.seed)
+  print("init %d columns, %d inputs: %.2f s" % (sp.numColumns, sp.numInputs, time.time() - start))
+
+  for epoch in range(args.epochs):
+    start = time.time()
+    sp.compute(inputs, learn=True, learnBatch=args.learnbatch)
+    elapsed = time.time() - start
+    print("epoch %d learning: %.1f inputs/s" % (epoch, len(inputs) / elapsed))
+
+  start = time.time()
+  activeColumns = sp.compute(inputs, learn=False).astype(np.uint8)
+  print("inference: %.1f inputs/s" % (len(inputs) / (time.time() - start)))
+
+  noiseLevels = np.linspace(0, 1, 21)
+  overlaps = []
+  for noiseLevel in noiseLevels:
+    noisyColumns = sp.compute(addNoise(inputs, noiseLevel, rng), learn=False).astype(np.uint8)
+    overlaps.append(np.mean([percentOverlap(a, b, sp.numColumns)
+                             for a, b in zip(activeColumns, noisyColumns)]))
+
+  plt.plot(noiseLevels, overlaps)
+  plt.title("Spatial Pooler noise robustness")
+  plt.xlabel("Noise level (fraction of flipped input bits)")
+  plt.ylabel("Overlap of active columns")
+  plt.savefig(args.output)
@@ -0,0 +1,189 @@
+########################################################################################
+# Replay of the per-column active duty cycles and boost factors of a recorded trace.
+# Streams an activity file (ActiveColumns_*_plotly-input.csv, cellState_*.csv) in
+# blocks and updates the active duty cycle of every column like SpatialPooler.cs:
+#   period    = min(DutyCyclePeriod, iteration)
+#   dutyCycle = ((period - 1) * dutyCycle + active) / period
+# A block of m cycles is applied at once (r = (period - 1) / period):
+#   dutyCycle = r^m * dutyCycle + sum(r^(m - 1 - t) * active(t)) / period
+# so the state is one float per column, whatever the length of the file.
+# Boost factors follow BoostByActivationFrequency with the global minimal duty cycle
+# (MinPctActiveDutyCycles * largest duty cycle) of UpdateMinDutyCyclesGlobal.
+# Columns below the minimal duty cycle are 'starving' (boosted), columns above
+# --dominance times the mean duty cycle are 'dominating'.
+# Examples:
+# python boostreplay.py "../Results/Spatial Pooler Stability/.../ActiveColumns_MaxBoost_5_MinOverl_1_4_plotly-input.csv" -o columns.csv
+# python boostreplay.py cellState_....csv -cpc 25 -n 2048 -every 500 -r report.csv
+########################################################################################
+
+import argparse
+import numpy as np
+
+import sdrio
+import boostsim
+
+Statuses = ['ok', 'starving', 'dominating']
+
+
+class DutyCycleReplay(object):
+    """
+    Active duty cycles of all columns, updated block by block.
+
+    @param numColumns     (int) number of columns, grows if a larger column index is seen
+    @param period         (int) DutyCyclePeriod
+    @param cellsPerColumn (int) cells of a column, > 1 for cell traces
+    """
+
+    def __init__(self, numColumns=0, period=1000, cellsPerColumn=1):
+        self.period = period
+        self.cellsPerColumn = cellsPerColumn
+        self.activeDutyCycles = np.zeros(numColumns)
+        self.cycle = 0
+
+    def update(self, indices, offsets):
+        """
+        Applies a CSR block of cycles (see sdrio.parseSdrBlock).
+        """
+        numRows = len(offsets) - 1
+        if numRows <= 0:
+            return
+        rowIds = np.repeat(np.arange(numRows), np.diff(offsets))
+        columns = np.asarray(indices, dtype=np.int64) // self.cellsPerColumn
+        if self.cellsPerColumn > 1 and len(columns) > 0:
+            # a column with several active cells is active once
+            keys = np.unique(rowIds * (int(columns.max()) + 1) + columns)
+            rowIds, columns = np.divmod(keys, int(columns.max()) + 1)
+
+        if len(columns) > 0 and columns.max() >= len(self.activeDutyCycles):
+            grown = np.zeros(int(columns.max()) + 1)
+            grown[:len(self.activeDutyCycles)] = self.activeDutyCycles
+            self.activeDutyCycles = grown
+
+        # The first period - 1 cycles use the shorter period min(period, iteration).
+        warmup = min(max(self.period - 1 - self.cycle, 0), numRows)
+        if warmup > 0:
+            inWarmup = rowIds < warmup
+            self._average(columns[inWarmup], warmup)
+        if warmup < numRows:
+            inSteady = rowIds >= warmup
+            self._decay(columns[inSteady], rowIds[inSteady] - warmup, numRows - warmup)
+
+    def _average(self, columns, numRows):
+        # period == iteration: the duty cycle is the mean of all cycles so far
+        counts = np.bincount(columns, minlength=len(self.activeDutyCycles))
+        end = self.cycle + numRows
+        self.activeDutyCycles = (self.cycle * self.activeDutyCycles + counts) / end
+        self.cycle = end
+
+    def _decay(self, columns, rowIds, numRows):
+        decay = (self.period - 1.0) / self.period
+        weights = decay ** (numRows - 1 - np.arange(numRows))
+        sums = np.bincount(columns, weights=weights[rowIds], minlength=len(self.activeDutyCycles))
+        self.activeDutyCycles = decay ** numRows * self.activeDutyCycles + sums / self.period
+        self.cycle += numRows
+
+    def minDutyCycle(self, minPctActiveDutyCycles):
+        if len(self.activeDutyCycles) == 0:
+            return 0.0
+        return float(boostsim.minDutyCycles(minPctActiveDutyCycles, self.activeDutyCycles.max()))
+
+    def boostFactors(self, maxBoost=10.0, minPctActiveDutyCycles=0.001):
+        """
+        Boost factor every column would receive with the current duty cycles.
+        """
+        return boostsim.boostFactors(self.activeDutyCycles,
+                                     self.minDutyCycle(minPctActiveDutyCycles), maxBoost)
+
+    def classify(self, minPctActiveDutyCycles=0.001, dominance=10.0):
+        """
+        @return (array) index into Statuses for every column
+        """
+        status = np.zeros(len(self.activeDutyCycles), dtype=np.int8)
+        status[self.activeDutyCycles < self.minDutyCycle(minPctActiveDutyCycles)] = 1
+        mean = self.activeDutyCycles.mean() if len(self.activeDutyCycles) > 0 else 0.0
+        if mean > 0:
+            status[self.activeDutyCycles > dominance * mean] = 2
+        return status
+
+
+def replayFile(fileName, replay, every=None, maxBoost=10.0, minPctActiveDutyCycles=0.001,
+               dominance=10.0, reportFile=None):
+    """
+    Streams a trace through the replay.
+
+    @param every      (int) cycles between two lines of the report, None: only at the end
+    @param reportFile (str) optional CSV with the column statistics over time
+
+    @return (DutyCycleReplay) the replay
+    """
+    report = open(reportFile, 'w') if reportFile is not None else None
+    try:
+        if report is not None:
+            report.write("cycle,meanDutyCycle,maxDutyCycle,minDutyCycle,starving,dominating,maxBoostFactor\n")
+
+        def writeReport():
+            if report is None:
+                return
+            status = replay.classify(minPctActiveDutyCycles, dominance)
+            boosts = replay.boostFactors(maxBoost, minPctActiveDutyCycles)
+            duty = replay.activeDutyCycles
+            report.write("%d,%.6g,%.6g,%.6g,%d,%d,%.4f\n" % (
+                replay.cycle, duty.mean() if len(duty) else 0, duty.max() if len(duty) else 0,
+                replay.minDutyCycle(minPctActiveDutyCycles),
+                np.count_nonzero(status == 1), np.count_nonzero(status == 2),
+                boosts.max() if len(boosts) else 1.0))
+
+        for indices, offsets in sdrio.iterSdrBlocks(fileName):
+            if every is None:
+                replay.update(indices, offsets)
+                continue
+            # split the block at the report cycles
+            while len(offsets) > 1:
+                numRows = min(every - replay.cycle % every, len(offsets) - 1)
+                replay.update(indices[:offsets[numRows]], offsets[:numRows + 1])
+                indices = indices[offsets[numRows]:]
+                offsets = offsets[numRows:] - offsets[numRows]
+                if replay.cycle % every == 0:
+                    writeReport()
+
+        if every is None or replay.cycle % every != 0:
+            writeReport()
+    finally:
+        if report is not None:
+            report.close()
+    return replay
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay of column duty cycles and boost factors')
+    parser.add_argument('filename', help='File with one SDR per line')
+    parser.add_argument('--columns', '-n', type=int, default=0, help='Number of columns')
+    parser.add_argument('--cellspercolumn', '-cpc', type=int, default=1,
+                        help='Cells per column, the file contains cell indices if > 1')
+    parser.add_argument('--period', '-p', type=int, default=1000, help='DutyCyclePeriod')
+    parser.add_argument('--maxboost', '-mb', type=float, default=10.0, help='MaxBoost')
+    parser.add_argument('--minpctactive', '-mpa', type=float, default=0.001,
+                        help='MinPctActiveDutyCycles')
+    parser.add_argument('--dominance', '-dom', type=float, default=10.0,
+                        help='Columns above this multiple of the mean duty cycle are dominating')
+    parser.add_argument('--every', '-every', type=int, help='Cycles between two report lines')
+    parser.add_argument('--report', '-r', help='CSV with the column statistics over time')
+    parser.add_argument('--out', '-o', help='CSV with duty cycle, boost and status of every column')
+    args = parser.parse_args()
+
+    replay = DutyCycleReplay(args.columns, args.period, args.cellspercolumn)
+    replayFile(args.filename, replay, args.every, args.maxboost, args.minpctactive,
+               args.dominance, args.report)
+
+    status = replay.classify(args.minpctactive, args.dominance)
+    boosts = replay.boostFactors(args.maxboost, args.minpctactive)
+    if args.out is not None:
+        with open(args.out, 'w') as file:
+            file.write("column,activeDutyCycle,boostFactor,status\n")
+            for column in range(len(status)):
+                file.write("%d,%.6g,%.4f,%s\n" % (column, replay.activeDutyCycles[column],
+                                                  boosts[column], Statuses[status[column]]))
+
+    print("%d cycles, %d columns: %d starving, %d dominating, largest boost %.3f" % (
+        replay.cycle, len(status), np.count_nonzero(status == 1), np.count_nonzero(status == 2),
+        boosts.max() if len(boosts) else 1.0))
@@ -0,0 +1,150 @@
+########################################################################################
+# Vectorized simulation of the Spatial Pooler duty cycles and boost factors.
+# Same formulas as SpatialPooler.cs of NeoCortexApi:
+#   CalcEventFrequency:          dutyCycle := ((period - 1) * dutyCycle + newValue) / period
+#   BoostByActivationFrequency:  boost = (1 - maxBoost) / minDuty * dutyCycle + maxBoost,
+#                                1 for dutyCycle >= minDuty
+# A constant input has the closed form (geometric sum, r = (period - 1) / period):
+#   dutyCycle(t) = input + (initial - input) * r^t
+# and any input sequence is an IIR filter, so whole parameter grids are computed at
+# once. Curves are cached per parameter tuple, repeated plotting costs nothing.
+# The cache lives in memory and lasts as long as the process (e.g. an interactive
+# session or a notebook that plots several grids). Every run of boostgraph.py starts
+# empty; the curves are not written to disk like the traces of sdrcache.py, because
+# computing a whole grid takes well under a millisecond.
+# Example:
+#   import boostsim
+#   cycles, curves = boostsim.dutyCycleGrid([50, 125, 200], [5, 100], 200)
+########################################################################################
+
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+# (overlap, period, numCycles, initial) -> read only duty cycle curve, per process
+_dutyCycleCache = {}
+
+# (maxBoost, minDutyCycle, dutyCycles) -> read only boost curve, per process
+_boostCache = {}
+
+
+def dutyCycles(inputs, periods, numCycles, initial=0.0):
+    """
+    Duty cycles of constant inputs over numCycles cycles (cycle 0 is the
+    initial value). All arguments except numCycles broadcast against each other.
+
+    @param inputs  (array) new value of every cycle, e.g. the overlap or 1/0
+    @param periods (array) duty cycle periods, >= 1
+
+    @return (array) shape of the broadcast arguments + (numCycles,)
+    """
+    inputs, periods, initial = np.broadcast_arrays(
+        np.asarray(inputs, dtype=np.float64), np.asarray(periods, dtype=np.float64),
+        np.asarray(initial, dtype=np.float64))
+    decay = (periods - 1) / periods
+    t = np.arange(numCycles)
+    return inputs[..., None] + (initial - inputs)[..., None] * decay[..., None] ** t
+
+
+def filterDutyCycles(inputs, period, initial=0.0):
+    """
+    Duty cycles of an arbitrary input sequence, computed as IIR filter along
+    the last axis (one row per column or per parameter set).
+
+    @param inputs  (array) new values, the last axis are the cycles
+    @param period  (float) duty cycle period
+    @param initial (array) duty cycles before the first input
+
+    @return (array) duty cycle after every input, same shape as inputs
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    decay = (period - 1.0) / period
+    initial = np.broadcast_to(np.asarray(initial, dtype=np.float64), inputs.shape[:-1])
+    if lfilter is not None:
+        res, _ = lfilter([1.0 / period], [1.0, -decay], inputs, axis=-1,
+                         zi=(decay * initial)[..., None])
+        return res
+
+    res = np.empty(inputs.shape)
+    current = np.array(initial)
+    for t in range(inputs.shape[-1]):
+        current = decay * current + inputs[..., t] / period
+        res[..., t] = current
+    return res
+
+
+def boostFactors(dutyCycles, minDutyCycles, maxBoost):
+    """
+    Boost factors of BoostByActivationFrequency, linear between
+    (0, maxBoost) and (minDutyCycle, 1), 1 above. Broadcasts all arguments.
+    """
+    dutyCycles, minDutyCycles, maxBoost = np.broadcast_arrays(
+        np.asarray(dutyCycles, dtype=np.float64), np.asarray(minDutyCycles, dtype=np.float64),
+        np.asarray(maxBoost, dtype=np.float64))
+    slope = np.zeros(dutyCycles.shape)
+    # ArrayUtils.Divide(..., 0, 0) of the C# code: division by 0 gives 0
+    np.divide(1 - maxBoost, minDutyCycles, out=slope, where=minDutyCycles != 0)
+    return np.where(dutyCycles >= minDutyCycles, 1.0, slope * dutyCycles + maxBoost)
+
+
+def _readOnly(array):
+    array.flags.writeable = False
+    return array
+
+
+def dutyCycleGrid(overlaps, periods, numCycles, initial=0.0):
+    """
+    Duty cycle curves of every (overlap, period) combination. Only the
+    combinations which are not cached yet are computed, all in one call.
+
+    @return (tuple) cycles 0..numCycles-1 and the curves, shape
+                    (len(overlaps), len(periods), numCycles)
+    """
+    keys = [(float(o), float(p), int(numCycles), float(initial))
+            for o in overlaps for p in periods]
+    missing = sorted(set(k for k in keys if k not in _dutyCycleCache))
+    if len(missing) > 0:
+        values = np.array([k[:2] for k in missing])
+        curves = dutyCycles(values[:, 0], values[:, 1], numCycles, initial)
+        for key, curve in zip(missing, curves):
+            _dutyCycleCache[key] = _readOnly(curve)
+
+    curves = np.array([_dutyCycleCache[k] for k in keys])
+    return np.arange(numCycles), curves.reshape(len(overlaps), len(periods), numCycles)
+
+
+def boostGrid(maxBoosts, minDutyCycles, dutyCycleAxis):
+    """
+    Boost curves over dutyCycleAxis of every (maxBoost, minDutyCycle)
+    combination, cached per combination like dutyCycleGrid.
+
+    @return (array) shape (len(maxBoosts), len(minDutyCycles), len(dutyCycleAxis))
+    """
+    dutyCycleAxis = np.asarray(dutyCycleAxis, dtype=np.float64)
+    axisKey = tuple(dutyCycleAxis.tolist())
+    keys = [(float(b), float(m), axisKey) for b in maxBoosts for m in minDutyCycles]
+    missing = sorted(set(k for k in keys if k not in _boostCache))
+    if len(missing) > 0:
+        values = np.array([k[:2] for k in missing])
+        curves = boostFactors(dutyCycleAxis, values[:, 1, None], values[:, 0, None])
+        for key, curve in zip(missing, curves):
+            _boostCache[key] = _readOnly(curve)
+
+    curves = np.array([_boostCache[k] for k in keys])
+    return curves.reshape(len(maxBoosts), len(minDutyCycles), len(dutyCycleAxis))
+
+
+def minDutyCycles(minPctDutyCycles, maxDutyCycle):
+    """
+    Minimal duty cycles of UpdateMinDutyCyclesGlobal: the percentage of the
+    largest duty cycle of the column.
+    """
+    return np.multiply(minPctDutyCycles, maxDutyCycle)
+
+
+def clearCache():
+    _dutyCycleCache.clear()
+    _boostCache.clear()
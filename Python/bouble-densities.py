@@ -2,63 +2,63 @@
 # All columns have same overlap
 # inhibition radius 3
 # density takes values: 0.10, 0.20, 0.33, 0,5
+# The winners are computed by inhibition.py (same as InhibitColumnsLocal of the SpatialPooler).
+# python bouble-densities.py
+# python bouble-densities.py -t 2
+# Sweep of radius x density, one figure per radius like in Results/Inhibition:
+# python bouble-densities.py -t 2 -r 1 2 3 4 -d 0.1 0.2 0.3 0.4 0.5 -o "../Results/Inhibition"
 ############################################
 
 
-import plotly
-plotly.__version__
+import argparse
+import os
 import numpy as np
-import plotly.plotly as py
-import plotly.tools as tls
+import matplotlib.colors
 import matplotlib.pyplot as plt
 
-bubbles_mpl = plt.figure()
-
-k=90
-yScale =3
-x = [0,1,2,3,4,5,6,7,8,9]
+import inhibition
 
 # TEST 1
-inhibits = [1, 2, 7, 0.1, 3, 4, 16, 1, 1.5, 1.7]
-res1 = [0.10, [2, 6]]
-res2 = [0.20, [2,6]]
-res3 = [0.30, [2,6]]
-res4 = [0.40, [2,5,6,9]]
-res5 = [0.50, [1,2,4,5,6,9]]
+inhibits1 = [1, 2, 7, 0.1, 3, 4, 16, 1, 1.5, 1.7]
 
 # TEST 2
-# inhibits = [ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1 ]
-# res1 = [0.10, [1, 5]]
-# res2 = [0.20, [0,4,8]]
-# res3 = [0.30, [0,1,4,5,8]]
-# res4 = [0.40, [0,1,3,4,5,8,9]]
-# res5 = [0.50, [0,1,2,3,4,5,6,8]]
-
-res = [res1,res2,res3, res4, res5]
-
-clr = ['blue' for num in x]
-
-sizedIhibits = [num * k for num in inhibits]
-
-plt.axis([-1, len(inhibits) + 1, 0, yScale * len(res) + 2])
+inhibits2 = [ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1 ]
 
-plt.title('radius=3')
+parser = argparse.ArgumentParser(description='Winners of the local inhibition for several densities')
+parser.add_argument('--test', '-t', type=int, choices=[1, 2], default=1,
+                    help='1: different overlaps, 2: all columns have same overlap')
+parser.add_argument('--radius', '-r', type=int, nargs='+', default=[3])
+parser.add_argument('--densities', '-d', type=float, nargs='+', default=[0.1, 0.2, 0.3, 0.4, 0.5])
+parser.add_argument('--outdir', '-o', help='Save the figures into this folder instead of showing them')
+args = parser.parse_args()
 
-i = 0
-for r in res:    
-    plt.annotate("density=%f" % r[0], xy=(len(res),yScale *i + 4.4))
-    yVals = np.empty(len(inhibits))
-    yVals.fill(3 + yScale*i)   
-
-    clr = ['blue' for num in x]
-
-    print(res[0])
-
-    for indx in r[1]:
-        clr[indx] = 'green' 
-
-    plt.scatter(x,yVals, s=sizedIhibits, c= clr)
-    i=i+1
-
-    
-plt.show()
\ No newline at end of file
+k=90
+yScale =3
+inhibits = np.array(inhibits1 if args.test == 1 else inhibits2)
+x = np.arange(len(inhibits))
+colors = matplotlib.colors.to_rgba_array(['blue', 'green'])
+
+# The hard coded results of the original experiment were computed without wrap around.
+# One call per density, each call finds the winners of all columns; the calls give one row per density.
+for radius in args.radius:
+    winners = np.array([inhibition.inhibitColumnsLocal(inhibits, [len(inhibits)], radius, density, wrap=False)
+                        for density in args.densities])
+
+    bubbles_mpl = plt.figure()
+    plt.axis([-1, len(inhibits) + 1, 0, yScale * len(args.densities) + 2])
+    plt.title('radius=%d' % radius)
+
+    for i, density in enumerate(args.densities):
+        plt.annotate("density=%f" % density, xy=(len(args.densities),yScale *i + 4.4))
+        print(density, np.flatnonzero(winners[i]).tolist())
+
+    yVals, xVals = np.indices(winners.shape)
+    plt.scatter(x[xVals.ravel()], 3 + yScale*yVals.ravel(), s=np.tile(inhibits * k, len(args.densities)),
+                c=colors[winners.ravel().astype(int)])
+
+    if args.outdir is not None:
+        os.makedirs(args.outdir, exist_ok=True)
+        plt.savefig(os.path.join(args.outdir, "Inhibition radius%d test%d.png" % (radius, args.test)))
+        plt.close()
+    else:
+        plt.show()
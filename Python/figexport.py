@@ -0,0 +1,109 @@
+########################################################################################
+# Local static export of plotly figures to PNG, SVG or PDF.
+# Works offline and without a display, it replaces the plotly cloud image service
+# (plotly.plotly.image.save_as), which needed PLOTLY_API_KEY and the network.
+#
+# Requires kaleido and a local Chrome/Chromium:
+#   pip install kaleido
+#   plotly_get_chrome      (only if no Chrome is installed)
+#
+# The renderer (a headless browser) is started on the first export and shared by all
+# following exports of the same process, also by every worker of a process pool.
+########################################################################################
+
+import multiprocessing.util
+import os
+import sys
+import plotly.io as pio
+
+Formats = ['png', 'svg', 'pdf']
+
+_rendererStarted = False
+
+
+def _hasBrowser():
+    from choreographer.browsers.chromium import Chromium
+    return os.environ.get('BROWSER_PATH') is not None or \
+        Chromium.find_browser(skip_local=False) is not None
+
+
+def isAvailable():
+    """
+    Returns True if kaleido is installed and finds a Chrome/Chromium.
+    """
+    try:
+        import kaleido
+        return _hasBrowser()
+    except ImportError:
+        return False
+
+
+def hasDisplay():
+    """
+    Returns False on headless Linux machines, where opening a browser makes no sense.
+    """
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+
+def _stopRenderer():
+    global _rendererStarted
+    import kaleido
+    kaleido.stop_sync_server(silence_warnings=True)
+    _rendererStarted = False
+
+
+def _startRenderer():
+    global _rendererStarted
+    if _rendererStarted:
+        return
+
+    try:
+        import kaleido
+        import choreographer
+    except ImportError:
+        raise RuntimeError("Static export requires kaleido: 'pip install kaleido'.")
+
+    # The sync server would wait forever for a browser that does not exist.
+    if not _hasBrowser():
+        raise RuntimeError("Static export requires Chrome, install it with 'plotly_get_chrome'.")
+
+    # Without a running sync server kaleido starts a new browser for every figure.
+    kaleido.start_sync_server(silence_warnings=True)
+    _rendererStarted = True
+
+    # Unlike atexit, multiprocessing finalizers also run in pool workers.
+    multiprocessing.util.Finalize(None, _stopRenderer, exitpriority=10)
+
+
+def writeImages(fig, basename, formats, scale=4, width=None, height=None, required=True):
+    """
+    Writes a figure as basename.<format> for every requested format.
+
+    @param fig      (dict or go.Figure) the figure
+    @param basename (str)   output path without extension
+    @param formats  (list)  any of 'png', 'svg' and 'pdf'
+    @param scale    (float) scale factor of the image size
+    @param required (bool)  False: skip the images with a warning if the renderer
+                            is not available instead of raising a RuntimeError
+
+    @return (list) names of the written files
+    """
+    fileNames = []
+    for format in formats:
+        if format not in Formats:
+            raise ValueError("Unknown image format '%s'." % format)
+
+        try:
+            _startRenderer()
+        except RuntimeError as e:
+            if required:
+                raise
+            print("%s: images skipped, %s" % (basename, e), file=sys.stderr)
+            return fileNames
+        fileName = basename + '.' + format
+        pio.write_image(fig, fileName, format=format, scale=scale,
+                        width=width, height=height)
+        fileNames.append(fileName)
+    return fileNames
@@ -0,0 +1,148 @@
+########################################################################################
+# Local inhibition of the Spatial Pooler for all columns and many inputs at once.
+# Same winners as SpatialPooler.InhibitColumnsLocalOriginal of NeoCortexApi: a column
+# with overlap >= stimulusThreshold wins if fewer than
+#   numActive = int(0.5 + density * neighborhoodSize)
+# columns of its neighborhood have a higher overlap, i.e. if its overlap is at least the
+# numActive-th largest overlap of the neighborhood. The C# loop adds winnerDelta to every
+# winner, so a neighbor processed before the column and with an overlap less than
+# winnerDelta below it counts as higher if it has won. All columns are counted by one
+# vectorized rank count over the cached neighborhoods of neighborhood.py, the columns
+# where earlier winners decide are resolved by a few vectorized passes.
+# Example:
+#   winners = inhibition.inhibitColumnsLocal(overlaps, [64, 64], radius=5, density=0.02)
+########################################################################################
+
+import numpy as np
+
+import neighborhood
+
+# Number of (input, center, neighbor) comparisons evaluated at once.
+_chunkPairs = 1 << 22
+
+
+def inhibitionDensity(numActiveColumnsPerInhArea, radius, dimensions, maxDensity=0.5):
+    """
+    Density of CalcInhibitionDensity for a given inhibition radius.
+    """
+    numColumns = int(np.prod(dimensions))
+    area = min(numColumns, (2 * radius + 1) ** len(dimensions))
+    return min(float(numActiveColumnsPerInhArea) / area, maxDensity)
+
+
+def _winnerDelta(overlaps):
+    delta = overlaps.max(axis=1) / 1000.0
+    delta[delta == 0] = 0.001
+    return delta
+
+
+def _resolveUndecided(winners, undecided, higher, numActive, pairRows, pairCenters, neighbors):
+    """
+    Decides the columns whose result depends on earlier winners. For every
+    undecided column the earlier near neighbors (the pairs) known to win give
+    a lower bound and those still undecided an upper bound of the higher
+    columns. A column wins if even the upper bound is below numActive and loses
+    if the lower bound is not. The first undecided column of every input only
+    depends on decided columns, so every pass decides at least one column per
+    input, like the C# loop but for all columns of a pass at once. Only the
+    bounds of the columns depending on the columns decided by a pass are updated.
+    """
+    numColumns = winners.shape[1]
+    rows, columns = np.nonzero(undecided)
+    # np.nonzero returns the undecided columns sorted by row * numColumns + column
+    owners = np.searchsorted(rows * numColumns + columns, pairRows * numColumns + pairCenters)
+
+    limit = numActive[columns] - higher[rows, columns]
+    known = np.bincount(owners, winners[pairRows, neighbors], minlength=len(columns)).astype(np.int64)
+    pending = np.bincount(owners, undecided[pairRows, neighbors], minlength=len(columns)).astype(np.int64)
+    # pairs sorted by the column they depend on
+    keys = pairRows * numColumns + neighbors
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    dependents = owners[order]
+
+    open = np.ones(len(columns), dtype=bool)
+    candidates = np.arange(len(columns))
+    while len(candidates) > 0:
+        wins = known[candidates] + pending[candidates] < limit[candidates]
+        won = candidates[wins]
+        decided = candidates[wins | (known[candidates] >= limit[candidates])]
+        open[decided] = False
+        winners[rows[won], columns[won]] = True
+        undecided[rows[decided], columns[decided]] = False
+
+        # the columns depending on the decided ones get new bounds
+        decidedKeys = rows[decided] * numColumns + columns[decided]
+        starts = np.searchsorted(keys, decidedKeys, 'left')
+        counts = np.searchsorted(keys, decidedKeys, 'right') - starts
+        affected = dependents[np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))]
+        candidates, inverse, numDecided = np.unique(affected, return_inverse=True, return_counts=True)
+        pending[candidates] -= numDecided
+        known[candidates] += np.bincount(inverse, np.repeat(winners[rows[decided], columns[decided]], counts),
+                                         minlength=len(candidates)).astype(np.int64)
+        candidates = candidates[open[candidates]]
+
+
+def inhibitColumnsLocal(overlaps, dimensions, radius, density, stimulusThreshold=0.0, wrap=True):
+    """
+    Winners of the local inhibition.
+
+    @param overlaps          (array) overlaps of the columns, one row per input for batches
+    @param dimensions        (list)  column dimensions
+    @param radius            (int)   inhibition radius
+    @param density           (float) fraction of the columns of a neighborhood that may win
+    @param stimulusThreshold (float) smallest overlap of a winner
+    @param wrap              (bool)  neighborhoods wrap around (HtmConfig.WrapAround)
+
+    @return (array) boolean winner mask with the shape of overlaps
+    """
+    overlaps = np.asarray(overlaps, dtype=np.float64)
+    single = overlaps.ndim == 1
+    overlaps = np.atleast_2d(overlaps)
+    numInputs, numColumns = overlaps.shape
+
+    nbs = neighborhood.neighborhoods(dimensions, radius, wrap)
+    sizes = np.diff(nbs.offsets)
+    numActive = (0.5 + density * sizes).astype(np.int64)
+    delta = _winnerDelta(overlaps)[:, None]
+    eligible = overlaps >= stimulusThreshold
+
+    higher = np.zeros(overlaps.shape, dtype=np.int64)
+    maybe = np.zeros(overlaps.shape, dtype=np.int64)
+    pairs = []
+    maxSize = int(sizes.max()) if numColumns > 0 else 1
+    chunk = max(1, _chunkPairs // (maxSize * numInputs))
+    for start in range(0, numColumns, chunk):
+        end = min(start + chunk, numColumns)
+        neighbors = nbs.indices[nbs.offsets[start]:nbs.offsets[end]]
+        starts = nbs.offsets[start:end] - nbs.offsets[start]
+        centers = np.repeat(np.arange(start, end), sizes[start:end])
+
+        neighborOverlaps = overlaps[:, neighbors]
+        centerOverlaps = overlaps[:, centers]
+        higher[:, start:end] = np.add.reduceat(neighborOverlaps > centerOverlaps, starts, axis=1)
+        # earlier columns, which become higher if they win (tie break)
+        near = (neighbors < centers) & eligible[:, neighbors] & \
+            (neighborOverlaps <= centerOverlaps) & (neighborOverlaps + delta > centerOverlaps)
+        maybe[:, start:end] = np.add.reduceat(near, starts, axis=1)
+
+        # the near pairs of columns where earlier winners decide
+        open = eligible[:, start:end] & (higher[:, start:end] < numActive[start:end]) & \
+            (higher[:, start:end] + maybe[:, start:end] >= numActive[start:end])
+        pairRows, pairIndices = np.nonzero(near & open[:, centers - start])
+        pairs.append((pairRows, centers[pairIndices], neighbors[pairIndices]))
+
+    winners = eligible & (higher + maybe < numActive)
+    undecided = eligible & ~winners & (higher < numActive)
+
+    if np.any(undecided):
+        _resolveUndecided(winners, undecided, higher, numActive, *[np.concatenate(arrays) for arrays in zip(*pairs)])
+    return winners[0] if single else winners
+
+
+def activeColumns(overlaps, dimensions, radius, density, stimulusThreshold=0.0, wrap=True):
+    """
+    Indices of the winning columns of one overlap vector, like the C# result.
+    """
+    return np.flatnonzero(inhibitColumnsLocal(overlaps, dimensions, radius, density,
+                                              stimulusThreshold, wrap))
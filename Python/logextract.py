@@ -0,0 +1,275 @@
+########################################################################################
+# Extracts the results from the text dumps of the C# experiments.
+# The logs under Results/TM-TestResults and Results/Performance mix debugger output
+# ('dotnet.exe' (CoreCLR: ...) Loaded ..., The thread ... has exited) with results.
+# Files are read line by line with precompiled patterns, the noise is dropped and the
+# results are stored as typed columns in the binary cache of sdrcache.py:
+#  - TM cycles ("-------------- 3 ---------------", "W: ...", "P: ...",
+#    "Current Input: 3 | Predicted Input: 4", "Inference mode"):
+#      cycle, input, predictedInput, inference and the winner and predictive cells
+#      (CSR arrays winnerCells/winnerCellsOffsets and predictiveCells/...Offsets)
+#  - cell rows without label ("1290, 1291, 1292, ..."): cellRows/cellRowsOffsets and
+#      cellRowLabel, the plain number above the block of rows (NaN if there is none)
+#  - timings ("1000 | 2933", plain numbers below a header like "Compute time:"):
+#      run (separator "----- 1 -----" of Performance logs), section, parameter, time
+# Input labels with decimal commas (1,1) are read as numbers (1.1).
+# Analysis scripts load the tables with loadLog(), the log is parsed only once.
+# Examples:
+# python logextract.py "../Results/TM-TestResults" "../Results/Performance"
+# python logextract.py "../Results/Performance/Init 4096 columns.txt" -p
+########################################################################################
+
+import argparse
+import re
+import sys
+import time
+import numpy as np
+
+import sdrcache
+import sdrio
+
+TableKind = 'log'
+
+_noise = re.compile(rb"'[^']*' \((?:CoreCLR|Win32)[^)]*\):[^\n]*|The (?:thread|program) [^\n]*?has exited with code[^)\n]*\)\.?")
+_separator = re.compile(rb'^\s*-{3,}\s*(\S+?)\s*-{3,}\s*$')
+_winners = re.compile(rb'^\s*W:(.*)$')
+_predictive = re.compile(rb'^\s*P:(.*)$')
+_inputs = re.compile(rb'^\s*Current Input:\s*(\S+)\s*\|?\s*Predicted Input:\s*(\S+)', re.IGNORECASE)
+_inference = re.compile(rb'^\s*Inference mode\s*$')
+_cellRow = re.compile(rb'^\s*\d+\s*,[\d,\s]*$')
+_timing = re.compile(rb'^\s*(-?\d+(?:[.,]\d+)?)\s*\|\s*(-?\d+(?:[.,]\d+)?)\s*$')
+_number = re.compile(rb'^\s*(-?\d+(?:[.,]\d+)?)\s*$')
+_section = re.compile(rb'^\s*([A-Za-z][^:|]*?)\s*:\s*(-?\d+(?:[.,]\d+)?)?\s*$')
+# known debug output of the TM tests which is not extracted
+_skipped = re.compile(rb'^\s*(?:\*\*\s*\d+\s*\*\*|Item length:|cnt:|NewBorn stage:|Missmatch |\[[\d,*\s]*\]|Stop Learning)')
+
+
+def _toFloat(token):
+    try:
+        return float(token.replace(b',', b'.'))
+    except ValueError:
+        return np.nan
+
+
+def _cells(payloads):
+    # one CSR row per payload
+    if len(payloads) == 0:
+        return np.empty(0, dtype=np.int32), np.zeros(1, dtype=np.int64)
+    return sdrio.parseSdrBlock(b'\n'.join(payloads) + b'\n')
+
+
+class LogExtractor(object):
+    """
+    Collects the records of one log, line by line.
+    """
+
+    def __init__(self):
+        self.cycles = []
+        self.cycleInputs = []
+        self.predictedInputs = []
+        self.inference = []
+        self.winnerRows = []
+        self.predictiveRows = []
+        self.cellRows = []
+        self.cellRowLabels = []
+        self.runs = []
+        self.sections = []
+        self.parameters = []
+        self.times = []
+        self.sectionNames = ['']
+        self.run = 0
+        self.section = 0
+        self.dropped = 0
+        self.unknown = 0
+        self._header = None
+        self._number = None
+        self._label = np.nan
+
+    def _startCycle(self, header):
+        number = _toFloat(header) if header is not None else np.nan
+        if not np.isfinite(number):
+            number = self.cycles[-1] + 1 if len(self.cycles) > 0 else 0
+        self.cycles.append(int(number))
+        self.cycleInputs.append(np.nan)
+        self.predictedInputs.append(np.nan)
+        self.inference.append(False)
+        self.winnerRows.append(b'')
+        self.predictiveRows.append(b'')
+
+    def _cycle(self):
+        # records of a TM cycle start with the first record after a separator
+        if self._header is not None:
+            self._startCycle(self._header)
+            self._header = None
+        elif len(self.cycleInputs) == 0:
+            self._startCycle(None)
+
+    def _addTiming(self, parameter, value):
+        if self._header is not None:
+            # a separator followed by timings starts a new run of a Performance log
+            number = _toFloat(self._header)
+            self.run = int(number) if np.isfinite(number) else self.run + 1
+            self._header = None
+        self.runs.append(self.run)
+        self.sections.append(self.section)
+        self.parameters.append(parameter)
+        self.times.append(value)
+
+    def _setSection(self, name):
+        name = name.decode(errors='replace')
+        if name not in self.sectionNames:
+            self.sectionNames.append(name)
+        self.section = self.sectionNames.index(name)
+
+    def _flushNumber(self):
+        # a plain number is the label of following cell rows or a timing
+        if self._number is not None:
+            self._addTiming(np.nan, self._number)
+            self._number = None
+
+    def addLine(self, line):
+        if b"'" in line or b'The ' in line:
+            cleaned = _noise.sub(b'', line)
+            if cleaned != line:
+                self.dropped += 1
+                line = cleaned
+        if len(line.strip()) == 0:
+            return
+        if _cellRow.match(line):
+            if self._number is not None:
+                self._label = self._number
+                self._number = None
+            self.cellRows.append(line)
+            self.cellRowLabels.append(self._label)
+            return
+        self._flushNumber()
+        if _skipped.match(line):
+            self.dropped += 1
+            return
+
+        match = _separator.match(line)
+        if match:
+            self._header = match.group(1)
+            return
+        match = _winners.match(line)
+        if match:
+            self._cycle()
+            self.winnerRows[-1] = match.group(1)
+            return
+        match = _predictive.match(line)
+        if match:
+            self._cycle()
+            self.predictiveRows[-1] = match.group(1)
+            return
+        match = _inputs.match(line)
+        if match:
+            self._cycle()
+            self.cycleInputs[-1] = _toFloat(match.group(1))
+            self.predictedInputs[-1] = _toFloat(match.group(2))
+            return
+        if _inference.match(line):
+            self._cycle()
+            self.inference[-1] = True
+            return
+        match = _timing.match(line)
+        if match:
+            self._addTiming(_toFloat(match.group(1)), _toFloat(match.group(2)))
+            return
+        match = _number.match(line)
+        if match:
+            self._number = _toFloat(match.group(1))
+            return
+        match = _section.match(line)
+        if match:
+            self._setSection(match.group(1))
+            if match.group(2) is not None:
+                self._addTiming(np.nan, _toFloat(match.group(2)))
+            return
+        self.unknown += 1
+
+    def columns(self):
+        """
+        @return (tuple) dict of typed columns and the meta data
+        """
+        self._flushNumber()
+        winners, winnerOffsets = _cells(self.winnerRows)
+        predictive, predictiveOffsets = _cells(self.predictiveRows)
+        cellRows, cellRowsOffsets = _cells(self.cellRows)
+        columns = {
+            'cycle': np.array(self.cycles, dtype=np.int64),
+            'input': np.array(self.cycleInputs, dtype=np.float64),
+            'predictedInput': np.array(self.predictedInputs, dtype=np.float64),
+            'inference': np.array(self.inference, dtype=bool),
+            'winnerCells': winners,
+            'winnerCellsOffsets': winnerOffsets,
+            'predictiveCells': predictive,
+            'predictiveCellsOffsets': predictiveOffsets,
+            'cellRows': cellRows,
+            'cellRowsOffsets': cellRowsOffsets,
+            'cellRowLabel': np.array(self.cellRowLabels, dtype=np.float64),
+            'run': np.array(self.runs, dtype=np.int32),
+            'section': np.array(self.sections, dtype=np.int32),
+            'parameter': np.array(self.parameters, dtype=np.float64),
+            'time': np.array(self.times, dtype=np.float64),
+        }
+        meta = {'sections': self.sectionNames, 'droppedLines': self.dropped,
+                'unknownLines': self.unknown}
+        return columns, meta
+
+
+def extractLog(fileName):
+    """
+    Streams a log through the LogExtractor.
+
+    @return (tuple) dict of typed columns and the meta data
+    """
+    extractor = LogExtractor()
+    with open(fileName, 'rb') as file:
+        for line in file:
+            extractor.addLine(line.rstrip(b'\r\n'))
+    return extractor.columns()
+
+
+def loadLog(fileName, cacheDir=None, force=False):
+    """
+    Tables of a log, extracted once and then memory mapped from the cache.
+
+    @return (tuple) dict of columns (see module header) and the meta data
+    """
+    return sdrcache.loadColumns(fileName, TableKind, extractLog, cacheDir, force)
+
+
+def cycleCells(columns, name, cycle):
+    """
+    Cells of one row of a CSR column, e.g. cycleCells(columns, 'winnerCells', 3)
+    are the winner cells of the fourth extracted cycle.
+    """
+    offsets = columns[name + 'Offsets']
+    return columns[name][offsets[cycle]:offsets[cycle + 1]]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract results from the logs of the C# experiments')
+    parser.add_argument('paths', nargs='+', help='Log files or folders (searched recursively)')
+    parser.add_argument('--extensions', '-e', default='.txt',
+                        help='Comma separated extensions of files searched in folders')
+    parser.add_argument('--force', '-f', action='store_true', help='Extract even if the cache is up to date')
+    parser.add_argument('--print', '-p', action='store_true', help='Print the timings')
+    args = parser.parse_args()
+
+    extensions = [ext.strip().lower() for ext in args.extensions.split(',')]
+    for fileName in sdrcache._sourceFiles(args.paths, extensions):
+        start = time.time()
+        try:
+            columns, meta = loadLog(fileName, force=args.force)
+        except (IOError, ValueError) as e:
+            print("failed      %s: %s" % (fileName, e), file=sys.stderr)
+            continue
+        print("%8.3f s  %s: %d cycles, %d cell rows, %d timings, %d noise lines dropped" %
+              (time.time() - start, fileName, len(columns['cycle']), len(columns['cellRowsOffsets']) - 1,
+               len(columns['time']), meta['droppedLines']))
+        if args.print:
+            for run, section, parameter, value in zip(columns['run'], columns['section'],
+                                                      columns['parameter'], columns['time']):
+                print("    run %d  %-20s %10s  %g" % (run, meta['sections'][section],
+                                                      '' if np.isnan(parameter) else '%g' % parameter, value))
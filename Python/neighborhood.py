@@ -0,0 +1,188 @@
+########################################################################################
+# Neighborhoods of all columns of an N-dimensional topology at once.
+# Same results as HtmCompute.GetNeighborhood (clipped at the borders) and
+# HtmCompute.GetWrappingNeighborhood (wrap around) of NeoCortexApi, including the
+# order of the neighbors (the last dimension changes fastest).
+# Neighborhoods are returned as CSR arrays (indices, offsets) like sdrio.SdrTrace:
+# the neighbors of column c are indices[offsets[c]:offsets[c + 1]]. They are cached
+# per (dimensions, radius, wrap, ordering).
+# The check mode compares the engine with the CSV dumps of the NeighborhoodTest of
+# SpatialPoolerResearchTests.cs ("center|neighbor|neighbor|...").
+# Examples:
+# python neighborhood.py NeighborhoodTest/neighborhood-test-rad*-center-from-64-to-0.csv
+# python neighborhood.py -d 256 256 -r 10 -w
+########################################################################################
+
+import argparse
+import collections
+import functools
+import glob
+import time
+import numpy as np
+
+Neighborhoods = collections.namedtuple('Neighborhoods', ['indices', 'offsets'])
+
+# Number of (center, neighbor) pairs generated at once.
+_chunkPairs = 1 << 22
+
+
+def coordinates(indices, dimensions, columnMajor=False):
+    """
+    Coordinates of flat column indices, one row per index.
+    """
+    return np.stack(np.unravel_index(indices, dimensions, order='F' if columnMajor else 'C'), axis=1)
+
+
+def flatIndices(coords, dimensions, columnMajor=False):
+    """
+    Flat indices of coordinates (last axis are the dimensions).
+    """
+    return np.ravel_multi_index(tuple(np.moveaxis(coords, -1, 0)), dimensions,
+                                order='F' if columnMajor else 'C')
+
+
+def _offsetsPerDimension(dimensions, radius, wrap):
+    if wrap:
+        # GetWrappingNeighborhood: never more positions than the dimension has
+        return [np.arange(-radius, min(-radius + dim - 1, radius) + 1) for dim in dimensions]
+    return [np.arange(-radius, radius + 1) for _ in dimensions]
+
+
+def _computeBlock(centers, dimensions, radius, wrap, columnMajor):
+    coords = coordinates(centers, dimensions, columnMajor)
+    steps = _offsetsPerDimension(dimensions, radius, wrap)
+    numDims = len(dimensions)
+
+    flat = np.zeros((len(centers),) + tuple(len(s) for s in steps), dtype=np.int64)
+    valid = np.ones(flat.shape, dtype=bool)
+    multiplier = 1
+    order = range(numDims) if columnMajor else reversed(range(numDims))
+    for d in order:
+        shape = [len(centers)] + [1] * numDims
+        shape[d + 1] = len(steps[d])
+        position = (coords[:, d:d + 1] + steps[d][None, :]).reshape(shape)
+        if wrap:
+            position = np.mod(position, dimensions[d])
+        else:
+            valid = valid & (position >= 0) & (position < dimensions[d])
+        flat = flat + multiplier * position
+        multiplier *= dimensions[d]
+
+    flat = flat.reshape(len(centers), -1)
+    valid = valid.reshape(len(centers), -1)
+    return flat[valid], valid.sum(axis=1)
+
+
+@functools.lru_cache(maxsize=32)
+def _neighborhoods(dimensions, radius, wrap, columnMajor):
+    numColumns = int(np.prod(dimensions))
+    size = int(np.prod([len(s) for s in _offsetsPerDimension(dimensions, radius, wrap)]))
+    chunk = max(1, _chunkPairs // max(size, 1))
+
+    indices = []
+    counts = []
+    for start in range(0, numColumns, chunk):
+        blockIndices, blockCounts = _computeBlock(np.arange(start, min(start + chunk, numColumns)),
+                                                  dimensions, radius, wrap, columnMajor)
+        indices.append(blockIndices.astype(np.int32))
+        counts.append(blockCounts)
+
+    offsets = np.zeros(numColumns + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(counts), out=offsets[1:])
+    indices = np.concatenate(indices) if len(indices) > 0 else np.empty(0, dtype=np.int32)
+    indices.flags.writeable = False
+    offsets.flags.writeable = False
+    return Neighborhoods(indices, offsets)
+
+
+def neighborhoods(dimensions, radius, wrap=False, columnMajor=False):
+    """
+    Neighborhoods of all columns, each one includes its center.
+
+    @param dimensions  (list) column dimensions, e.g. [64] or [128, 128]
+    @param radius      (int)  neighborhood radius in every dimension
+    @param wrap        (bool) wrap around the borders like GetWrappingNeighborhood
+    @param columnMajor (bool) column major ordering (IsMajorOrdering) of the flat indices
+
+    @return (Neighborhoods) read only CSR arrays, cached per arguments
+    """
+    return _neighborhoods(tuple(int(d) for d in dimensions), int(radius), bool(wrap), bool(columnMajor))
+
+
+def neighborhood(center, dimensions, radius, wrap=False, columnMajor=False):
+    """
+    Neighborhood of one column, see neighborhoods.
+    """
+    nbs = neighborhoods(dimensions, radius, wrap, columnMajor)
+    return nbs.indices[nbs.offsets[center]:nbs.offsets[center + 1]]
+
+
+def readNeighborhoodTest(fileName):
+    """
+    Reads a CSV dump of the NeighborhoodTest.
+
+    @return (tuple) number of columns, radius and a dict center -> neighbors
+    """
+    rows = {}
+    with open(fileName, 'r') as file:
+        header = file.readline().split('|')
+        for line in file:
+            tokens = [int(token) for token in line.strip().split('|') if token.strip()]
+            if len(tokens) > 0:
+                rows[tokens[0]] = np.array(tokens[1:], dtype=np.int64)
+    return int(header[0]), int(header[2]), rows
+
+
+def checkFile(fileName, dimensions=None, wrap=False, columnMajor=False):
+    """
+    Compares the neighborhoods of a CSV dump with the engine.
+
+    @param dimensions (list) topology of the dump, default is 1-D with the
+                             number of columns of the header
+
+    @return (list) (center, expected, computed) of every differing center
+    """
+    numColumns, radius, rows = readNeighborhoodTest(fileName)
+    if dimensions is None:
+        dimensions = [numColumns]
+    nbs = neighborhoods(dimensions, radius, wrap, columnMajor)
+
+    differences = []
+    for center, expected in sorted(rows.items()):
+        if center < 0 or center >= len(nbs.offsets) - 1:
+            differences.append((center, expected, None))
+            continue
+        computed = nbs.indices[nbs.offsets[center]:nbs.offsets[center + 1]]
+        if not np.array_equal(expected, computed):
+            differences.append((center, expected, computed))
+    return differences
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Neighborhoods of column topologies')
+    parser.add_argument('files', nargs='*', help='NeighborhoodTest CSV files to check')
+    parser.add_argument('--dimensions', '-d', type=int, nargs='+', help='Column dimensions')
+    parser.add_argument('--radius', '-r', type=int, default=5, help='Radius (without files)')
+    parser.add_argument('--wrap', '-w', action='store_true', help='Wrap around the borders')
+    parser.add_argument('--columnmajor', '-cm', action='store_true', help='Column major ordering')
+    args = parser.parse_args()
+
+    if len(args.files) == 0:
+        if args.dimensions is None:
+            parser.error('--dimensions is required without files')
+        start = time.time()
+        nbs = neighborhoods(args.dimensions, args.radius, args.wrap, args.columnmajor)
+        print("%d columns, %d neighbors in %.2f s" %
+              (len(nbs.offsets) - 1, len(nbs.indices), time.time() - start))
+    else:
+        failed = 0
+        for pattern in args.files:
+            for fileName in sorted(glob.glob(pattern)) or [pattern]:
+                differences = checkFile(fileName, args.dimensions, args.wrap, args.columnmajor)
+                print("%-8s %s" % ('ok' if len(differences) == 0 else 'FAILED', fileName))
+                for center, expected, computed in differences:
+                    print("    center %d: expected %s, computed %s" %
+                          (center, expected.tolist(), None if computed is None else computed.tolist()))
+                failed += len(differences) > 0
+        if failed > 0:
+            raise SystemExit(1)
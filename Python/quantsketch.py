@@ -0,0 +1,162 @@
+########################################################################################
+# Mergeable quantile sketch (DDSketch) for box plots of very long measurement series.
+# Values are counted in logarithmic bins, every quantile is returned with a relative
+# error below 'relativeAccuracy'. Memory depends on the range of the values and not on
+# their number, and sketches of the same accuracy can be merged (e.g. runs of several
+# machines). Count, sum, min and max are kept exactly.
+# Example:
+#   sketch = QuantileSketch(0.01)
+#   sketch.add(np.array([2632, 2933, 2540]))
+#   ax.bxp([sketch.boxStats('1000')])
+########################################################################################
+
+import json
+import math
+import numpy as np
+
+
+class QuantileSketch(object):
+    """
+    @param relativeAccuracy (float) maximal relative error of the quantiles
+    """
+
+    def __init__(self, relativeAccuracy=0.01):
+        self.relativeAccuracy = relativeAccuracy
+        self.gamma = (1 + relativeAccuracy) / (1 - relativeAccuracy)
+        self.logGamma = math.log(self.gamma)
+        # bin index -> count, for positive values and for the magnitude of negative values
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _addBins(self, bins, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.logGamma).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            bins[key] = bins.get(key, 0) + count
+
+    def add(self, values):
+        """
+        Adds a scalar or an array of values.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self._addBins(self.positive, values[values > 0])
+        self._addBins(self.negative, -values[values < 0])
+        self.zeros += int(np.count_nonzero(values == 0))
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        """
+        Adds all values of another sketch of the same accuracy.
+        """
+        if other.relativeAccuracy != self.relativeAccuracy:
+            raise ValueError("Sketches with different accuracies can not be merged.")
+        for bins, otherBins in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in otherBins.items():
+                bins[key] = bins.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _value(self, key):
+        # center of the bin (gamma^(key-1), gamma^key] with the smallest relative error
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _bins(self):
+        # all bins in ascending order of their values
+        negativeKeys = sorted(self.negative, reverse=True)
+        positiveKeys = sorted(self.positive)
+        values = np.array([-self._value(k) for k in negativeKeys] + [0.0] +
+                          [self._value(k) for k in positiveKeys])
+        counts = np.array([self.negative[k] for k in negativeKeys] + [self.zeros] +
+                          [self.positive[k] for k in positiveKeys])
+        nonEmpty = counts > 0
+        return np.clip(values[nonEmpty], self.min, self.max), counts[nonEmpty]
+
+    def quantiles(self, qs):
+        """
+        @param qs (list) quantiles between 0 and 1
+
+        @return (array) estimated values, nan for an empty sketch
+        """
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+
+        values, counts = self._bins()
+        cumulative = np.cumsum(counts)
+
+        ranks = qs * (self.count - 1)
+        index = np.searchsorted(cumulative, ranks, side='right')
+        return values[np.minimum(index, len(values) - 1)]
+
+    def mean(self):
+        return self.sum / self.count if self.count > 0 else np.nan
+
+    def boxStats(self, label=None, whis=1.5):
+        """
+        Statistics of one box for matplotlib's Axes.bxp. Like Axes.boxplot the
+        whiskers end at the most extreme (estimated) values within whis * IQR.
+        The raw data is not kept, so only min and max can be shown as fliers.
+        """
+        q1, med, q3 = self.quantiles([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        loLimit = q1 - whis * iqr
+        hiLimit = q3 + whis * iqr
+        values, _ = self._bins()
+        inside = values[(values >= loLimit) & (values <= hiLimit)]
+        whislo = min(inside.min(), q1) if len(inside) > 0 else q1
+        whishi = max(inside.max(), q3) if len(inside) > 0 else q3
+        fliers = [v for v in (self.min, self.max) if v < loLimit or v > hiLimit]
+        return {'label': label, 'med': med, 'q1': q1, 'q3': q3, 'whislo': whislo,
+                'whishi': whishi, 'mean': self.mean(), 'fliers': fliers}
+
+    def toDict(self):
+        return {'relativeAccuracy': self.relativeAccuracy,
+                'positive': {str(k): v for k, v in self.positive.items()},
+                'negative': {str(k): v for k, v in self.negative.items()},
+                'zeros': self.zeros, 'count': self.count, 'sum': self.sum,
+                'min': self.min if self.count > 0 else None,
+                'max': self.max if self.count > 0 else None}
+
+    @staticmethod
+    def fromDict(data):
+        sketch = QuantileSketch(data['relativeAccuracy'])
+        sketch.positive = {int(k): v for k, v in data['positive'].items()}
+        sketch.negative = {int(k): v for k, v in data['negative'].items()}
+        sketch.zeros = data['zeros']
+        sketch.count = data['count']
+        sketch.sum = data['sum']
+        if sketch.count > 0:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+
+def saveSketches(fileName, sketches):
+    """
+    Saves named sketches (a list of (name, sketch) tuples) as JSON.
+    """
+    with open(fileName, 'w') as file:
+        json.dump([{'name': name, 'sketch': sketch.toDict()} for name, sketch in sketches], file)
+
+
+def loadSketches(fileName):
+    """
+    @return (list) (name, sketch) tuples saved by saveSketches
+    """
+    with open(fileName, 'r') as file:
+        return [(item['name'], QuantileSketch.fromDict(item['sketch'])) for item in json.load(file)]
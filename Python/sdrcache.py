@@ -0,0 +1,314 @@
+########################################################################################
+# Binary cache of the text traces under Results/.
+# Every text file is converted once into memory-mappable .npy files stored in the
+# folder '.sdrcache' next to the source file:
+#   <name>.values.npy   flat array of all numbers (int32 for SDRs, float64 for tables)
+#   <name>.offsets.npy  row offsets, values of row t are values[offsets[t]:offsets[t + 1]]
+#   <name>.labels.npy   first column of every row (tables with labels only)
+#   <name>.meta.json    source path, mtime, size, delimiter and kind of the trace
+# Tables extracted from logs (see logextract.py) are stored column by column as
+# <name>.<column>.npy with the column names in the meta data.
+# The cache is rebuilt when the source file changes.
+#
+# Examples:
+# python sdrcache.py "../Results/Spatial Pooler Stability"
+# python sdrcache.py -k table -d "|" -l "./BoxPlot/mongo messages per second.txt"
+########################################################################################
+
+import argparse
+import collections
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+import sdrio
+
+CacheDirName = '.sdrcache'
+CacheVersion = 1
+
+Table = collections.namedtuple('Table', ['values', 'offsets', 'labels'])
+
+
+def cachePaths(fileName, cacheDir=None):
+    """
+    Returns the paths of the cache files of a source file as a dict.
+    """
+    fileName = os.path.abspath(fileName)
+    if cacheDir is None:
+        cacheDir = os.path.join(os.path.dirname(fileName), CacheDirName)
+    base = os.path.join(cacheDir, os.path.basename(fileName))
+    return {
+        'values': base + '.values.npy',
+        'offsets': base + '.offsets.npy',
+        'labels': base + '.labels.npy',
+        'meta': base + '.meta.json',
+    }
+
+
+def parseTable(fileName, delimiter='|', labelColumn=False, skipRows=0):
+    """
+    Parses a text file with a variable number of numbers per row.
+
+    @param fileName    (str)  text file
+    @param delimiter   (str)  delimiter of the numbers
+    @param labelColumn (bool) the first column of every row is a label
+    @param skipRows    (int)  number of header rows
+
+    @return (Table) float64 values, row offsets and labels (None if no labels)
+    """
+    rows = []
+    labels = []
+    with open(fileName, 'r') as file:
+        for line in itertools.islice(file, skipRows, None):
+            if len(line.strip()) == 0 or line.startswith('#'):
+                continue
+            tokens = line.split(delimiter)
+            if labelColumn:
+                labels.append(tokens[0].strip())
+                tokens = tokens[1:]
+            tokens = [token for token in tokens if token.strip()]
+            rows.append(np.array(tokens, dtype=np.float64))
+
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    values = np.concatenate(rows) if len(rows) > 0 else np.empty(0)
+    return Table(values, offsets, np.array(labels) if labelColumn else None)
+
+
+def _sourceInfo(fileName, kind, delimiter, labelColumn, skipRows):
+    stat = os.stat(fileName)
+    return {
+        'version': CacheVersion,
+        'source': os.path.abspath(fileName),
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'kind': kind,
+        'delimiter': delimiter,
+        'labelColumn': labelColumn,
+        'skipRows': skipRows,
+    }
+
+
+def _readMeta(paths):
+    try:
+        with open(paths['meta'], 'r') as file:
+            return json.load(file)
+    except (IOError, ValueError):
+        return None
+
+
+def _isValid(meta, info):
+    if meta is None:
+        return False
+    return all(meta.get(key) == value for key, value in info.items())
+
+
+def tempPath(path, suffix='.tmp'):
+    """
+    Creates a unique temporary file next to path. Files are written to it and
+    moved to path with os.replace, so a crash never leaves a truncated file and
+    processes converting the same file at the same time do not collide.
+
+    @return (str) path of the empty temporary file
+    """
+    fd, tmpPath = tempfile.mkstemp(suffix=suffix, prefix=os.path.basename(path) + '.',
+                                   dir=os.path.dirname(path))
+    os.close(fd)
+    return tmpPath
+
+
+def replaceFile(tmpPath, path):
+    """
+    Moves a complete temporary file of tempPath to path. mkstemp creates the
+    file readable for its owner only, so it gets the mode of a file created by
+    open first (0666 without the bits of the umask).
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmpPath, 0o666 & ~umask)
+    os.replace(tmpPath, path)
+
+
+def _replace(tmpPath, path, write):
+    try:
+        write(tmpPath)
+        replaceFile(tmpPath, path)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+
+def _save(path, array):
+    # np.save would append .npy to another suffix
+    _replace(tempPath(path, '.tmp.npy'), path, lambda tmpPath: np.save(tmpPath, array))
+
+
+def _saveMeta(path, meta):
+    def write(tmpPath):
+        with open(tmpPath, 'w') as file:
+            json.dump(meta, file, indent=2)
+    _replace(tempPath(path), path, write)
+
+
+def convert(fileName, kind='sdr', delimiter=',', labelColumn=False, skipRows=0, cacheDir=None):
+    """
+    Converts a text trace into the binary cache, even if the cache is up to date.
+
+    @param fileName  (str) text file
+    @param kind      (str) 'sdr': rows of cell indices, 'table': rows of numbers
+    @param delimiter (str) delimiter of the numbers, only used by tables
+
+    @return (dict) the meta data of the cache
+    """
+    info = _sourceInfo(fileName, kind, delimiter, labelColumn, skipRows)
+    paths = cachePaths(fileName, cacheDir)
+    os.makedirs(os.path.dirname(paths['meta']), exist_ok=True)
+
+    meta = dict(info)
+    if kind == 'sdr':
+        trace = sdrio.readSdrFile(fileName)
+        _save(paths['values'], trace.indices)
+        _save(paths['offsets'], trace.offsets)
+        meta.update(minValue=trace.minCell, maxValue=trace.maxCell)
+    elif kind == 'table':
+        table = parseTable(fileName, delimiter, labelColumn, skipRows)
+        _save(paths['values'], table.values)
+        _save(paths['offsets'], table.offsets)
+        if table.labels is not None:
+            _save(paths['labels'], table.labels)
+        hasValues = len(table.values) > 0
+        meta.update(minValue=float(table.values.min()) if hasValues else None,
+                    maxValue=float(table.values.max()) if hasValues else None)
+    else:
+        raise ValueError("Unknown trace kind '%s'." % kind)
+
+    # The meta data is written last, it marks the cache as complete.
+    _saveMeta(paths['meta'], meta)
+    return meta
+
+
+def _load(fileName, kind, delimiter, labelColumn, skipRows, cacheDir):
+    info = _sourceInfo(fileName, kind, delimiter, labelColumn, skipRows)
+    paths = cachePaths(fileName, cacheDir)
+    meta = _readMeta(paths)
+    if not _isValid(meta, info):
+        meta = convert(fileName, kind, delimiter, labelColumn, skipRows, cacheDir)
+
+    values = np.load(paths['values'], mmap_mode='r')
+    offsets = np.load(paths['offsets'], mmap_mode='r')
+    return meta, values, offsets, paths
+
+
+def loadSdrTrace(fileName, cacheDir=None):
+    """
+    Loads a SDR activity file through the cache. The arrays are memory mapped.
+
+    @return (sdrio.SdrTrace) see sdrio.readSdrFile
+    """
+    meta, values, offsets, _ = _load(fileName, 'sdr', ',', False, 0, cacheDir)
+    return sdrio.SdrTrace(values, offsets, meta['minValue'], meta['maxValue'])
+
+
+def loadTable(fileName, delimiter='|', labelColumn=False, skipRows=0, cacheDir=None):
+    """
+    Loads a delimited table through the cache. The arrays are memory mapped.
+
+    @return (Table) see parseTable
+    """
+    meta, values, offsets, paths = _load(
+        fileName, 'table', delimiter, labelColumn, skipRows, cacheDir)
+    labels = np.load(paths['labels']) if labelColumn else None
+    return Table(values, offsets, labels)
+
+
+def columnPath(fileName, column, cacheDir=None):
+    """
+    Path of one column of a columnar table, e.g. <name>.cycle.npy.
+    """
+    return cachePaths(fileName, cacheDir)['meta'][:-len('meta.json')] + column + '.npy'
+
+
+def saveColumns(fileName, kind, columns, meta=None, cacheDir=None):
+    """
+    Saves a columnar table extracted from a text file, one .npy file per column.
+
+    @param kind    (str)  kind of the table, part of the validity check
+    @param columns (dict) column name -> array
+    @param meta    (dict) additional meta data (e.g. category names)
+
+    @return (dict) the meta data of the cache
+    """
+    info = _sourceInfo(fileName, kind, None, False, 0)
+    paths = cachePaths(fileName, cacheDir)
+    os.makedirs(os.path.dirname(paths['meta']), exist_ok=True)
+
+    for name, array in columns.items():
+        _save(columnPath(fileName, name, cacheDir), np.asarray(array))
+    info.update(meta or {})
+    info['columns'] = list(columns)
+    _saveMeta(paths['meta'], info)
+    return info
+
+
+def loadColumns(fileName, kind, extract, cacheDir=None, force=False):
+    """
+    Loads a columnar table through the cache. If the cache is missing or outdated
+    the table is extracted with extract(fileName) -> (columns, meta) and saved.
+    The arrays are memory mapped.
+
+    @return (tuple) dict column name -> array and the meta data
+    """
+    info = _sourceInfo(fileName, kind, None, False, 0)
+    meta = _readMeta(cachePaths(fileName, cacheDir))
+    if force or not _isValid(meta, info):
+        columns, extra = extract(fileName)
+        meta = saveColumns(fileName, kind, columns, extra, cacheDir)
+    return {name: np.load(columnPath(fileName, name, cacheDir), mmap_mode='r')
+            for name in meta['columns']}, meta
+
+
+def _sourceFiles(paths, extensions):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [d for d in dirs if d != CacheDirName]
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in extensions:
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert text traces into the binary cache')
+    parser.add_argument('paths', nargs='+', help='Files or folders (searched recursively)')
+    parser.add_argument('--kind', '-k', choices=['sdr', 'table'], default='sdr',
+                        help='sdr: rows of cell indices, table: rows of numbers')
+    parser.add_argument('--delimiter', '-d', default=',', help='Delimiter of table files')
+    parser.add_argument('--labels', '-l', action='store_true',
+                        help='The first column of table rows is a label')
+    parser.add_argument('--skiprows', '-sr', default=0, type=int, help='Number of header rows')
+    parser.add_argument('--extensions', '-e', default='.csv',
+                        help='Comma separated extensions of files searched in folders')
+    parser.add_argument('--force', '-f', action='store_true',
+                        help='Rebuild the cache even if it is up to date')
+    args = parser.parse_args()
+
+    extensions = [ext.strip().lower() for ext in args.extensions.split(',')]
+    for fileName in _sourceFiles(args.paths, extensions):
+        info = _sourceInfo(fileName, args.kind, args.delimiter, args.labels, args.skiprows)
+        if not args.force and _isValid(_readMeta(cachePaths(fileName)), info):
+            print("up to date  %s" % fileName)
+            continue
+        start = time.time()
+        try:
+            convert(fileName, args.kind, args.delimiter, args.labels, args.skiprows)
+        except ValueError as e:
+            print("failed      %s: %s" % (fileName, e), file=sys.stderr)
+            continue
+        print("%8.3f s  %s" % (time.time() - start, fileName))
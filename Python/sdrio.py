@@ -0,0 +1,309 @@
+########################################################################################
+# Loader of the SDR activity files written by NeoCortexApi experiments.
+# Every line holds the indices of active cells/columns of one cycle:
+#   39, 45, 93, 100, 116,
+#   39, 45, 93, 100, 145, 166,
+# Lines are parsed into a CSR-like pair of flat arrays. Active cells of cycle t are
+# indices[offsets[t]:offsets[t + 1]]. Empty lines are cycles without activity.
+# Large files can be streamed block by block with iterSdrBlocks/iterSdrRows, which
+# stop reading as soon as the consumer stops (e.g. after maxCycles).
+# SdrFollower reads files which are still being written, only the appended lines.
+#
+# Scripts in sub folders can import it with:
+#   sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+#   import sdrio
+########################################################################################
+
+import collections
+import itertools
+import os
+import numpy as np
+
+SdrTrace = collections.namedtuple(
+    'SdrTrace', ['indices', 'offsets', 'minCell', 'maxCell'])
+
+_newLine = ord('\n')
+_minus = ord('-')
+_zero = ord('0')
+_nine = ord('9')
+_powersOfTen = 10 ** np.arange(19, dtype=np.int64)
+
+
+def parseSdrBlock(data):
+    """
+    Parses the bytes of complete lines into CSR arrays in one vectorized pass.
+    Any character which is not a digit separates numbers, so the trailing
+    comma and the spaces after delimiters need no special handling.
+
+    @param data (bytes) content of one or more lines
+
+    @return (indices, offsets) int32 array of all cells and int64 row offsets
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    newLines = np.flatnonzero(buf == _newLine)
+    numRows = len(newLines)
+    if len(buf) > 0 and buf[-1] != _newLine:
+        numRows += 1
+
+    isDigit = (buf >= _zero) & (buf <= _nine)
+    edges = np.diff(isDigit.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.int32), np.zeros(numRows + 1, dtype=np.int64)
+    if lengths.max() > 9:
+        raise ValueError('SDR index with more than 9 digits found.')
+
+    # Every digit is weighted with the power of ten of its position inside
+    # its number and the weighted digits are summed up per number.
+    digitPositions = np.flatnonzero(isDigit)
+    numberOfDigit = np.repeat(np.arange(len(starts)), lengths)
+    exponents = ends[numberOfDigit] - digitPositions - 1
+    digits = (buf[digitPositions] - _zero).astype(np.int64)
+    values = np.add.reduceat(digits * _powersOfTen[exponents],
+                             np.cumsum(lengths) - lengths)
+
+    negative = buf[np.maximum(starts - 1, 0)] == _minus
+    negative &= starts > 0
+    values[negative] *= -1
+
+    rowOfNumber = np.searchsorted(newLines, starts)
+    offsets = np.searchsorted(rowOfNumber, np.arange(numRows + 1))
+
+    return values.astype(np.int32), offsets.astype(np.int64)
+
+
+def readSdrFile(fileName):
+    """
+    Reads a whole SDR activity file.
+
+    @param fileName (str) comma separated file with one SDR per line
+
+    @return (SdrTrace) indices, offsets and min/max cell (None if no cell is active)
+    """
+    with open(fileName, 'rb') as file:
+        indices, offsets = parseSdrBlock(file.read())
+
+    minCell = None
+    maxCell = None
+    if len(indices) > 0:
+        minCell = int(indices.min())
+        maxCell = int(indices.max())
+
+    return SdrTrace(indices, offsets, minCell, maxCell)
+
+
+def iterSdrBlocks(fileName, startCycle=0, blockSize=1 << 20):
+    """
+    Streams a SDR activity file as CSR blocks of complete lines. Lines before
+    startCycle are only counted and never parsed. A last line without a line
+    break is returned as the last cycle.
+
+    @param fileName   (str) comma separated file with one SDR per line
+    @param startCycle (int) number of leading cycles to skip
+    @param blockSize  (int) number of bytes read at once
+
+    @return generator of (indices, offsets) tuples, see parseSdrBlock
+    """
+    skip = startCycle
+    rest = b''
+    with open(fileName, 'rb') as file:
+        while True:
+            block = file.read(blockSize)
+            if not block:
+                break
+
+            data = rest + block
+            last = data.rfind(b'\n')
+            if last < 0:
+                rest = data
+                continue
+            rest = data[last + 1:]
+            data = data[:last + 1]
+
+            if skip > 0:
+                numLines = data.count(b'\n')
+                if numLines <= skip:
+                    skip -= numLines
+                    continue
+                pos = 0
+                for _ in range(skip):
+                    pos = data.index(b'\n', pos) + 1
+                data = data[pos:]
+                skip = 0
+
+            yield parseSdrBlock(data)
+
+    if len(rest) > 0 and skip == 0:
+        yield parseSdrBlock(rest)
+
+
+def iterSdrRows(fileName, startCycle=0, blockSize=1 << 20):
+    """
+    Streams a SDR activity file cycle by cycle.
+
+    @return generator of int32 arrays with active cells, one per cycle
+    """
+    for indices, offsets in iterSdrBlocks(fileName, startCycle, blockSize):
+        for t in range(len(offsets) - 1):
+            yield indices[offsets[t]:offsets[t + 1]]
+
+
+def downsampleRows(rows, step, mode='nth'):
+    """
+    Reduces the number of cycles of a stream of SDRs.
+
+    @param rows (iterable) arrays with active cells, one per cycle
+    @param step (int)      number of input cycles per output cycle
+    @param mode (str)      'nth': take every step-th cycle,
+                           'or':  union of the active cells of step cycles
+
+    @return generator of arrays with active cells
+    """
+    if step <= 1:
+        for row in rows:
+            yield row
+    elif mode == 'nth':
+        for row in itertools.islice(rows, 0, None, step):
+            yield row
+    elif mode == 'or':
+        group = []
+        for row in rows:
+            group.append(row)
+            if len(group) == step:
+                yield np.unique(np.concatenate(group))
+                group = []
+        if len(group) > 0:
+            yield np.unique(np.concatenate(group))
+    else:
+        raise ValueError("Unknown downsampling mode '%s'." % mode)
+
+
+def rowsToTrace(rows):
+    """
+    Builds a SdrTrace from arrays with active cells, one per cycle.
+    """
+    rows = list(rows)
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    if len(rows) > 0:
+        indices = np.concatenate(rows).astype(np.int32)
+    else:
+        indices = np.empty(0, dtype=np.int32)
+
+    minCell = None
+    maxCell = None
+    if len(indices) > 0:
+        minCell = int(indices.min())
+        maxCell = int(indices.max())
+
+    return SdrTrace(indices, offsets, minCell, maxCell)
+
+
+def windowRows(rows, maxCycles=None, step=1, mode='nth'):
+    """
+    Downsamples a stream of SDRs and collects at most maxCycles of the
+    resulting cycles. The stream is not consumed any further.
+
+    @return (SdrTrace) the cycles of the window
+    """
+    rows = downsampleRows(rows, step, mode)
+    return rowsToTrace(itertools.islice(rows, maxCycles))
+
+
+def readSdrWindow(fileName, startCycle=0, maxCycles=None, step=1, mode='nth'):
+    """
+    Reads a window of a SDR activity file. Reading stops after maxCycles
+    (downsampled) cycles, so the cost depends on the window and not on the
+    size of the file.
+
+    @param fileName   (str) comma separated file with one SDR per line
+    @param startCycle (int) first cycle of the window
+    @param maxCycles  (int) maximal number of returned cycles, None for all
+    @param step       (int) number of input cycles per returned cycle
+    @param mode       (str) downsampling mode, see downsampleRows
+
+    @return (SdrTrace) the cycles of the window
+    """
+    return windowRows(iterSdrRows(fileName, startCycle), maxCycles, step, mode)
+
+
+def iterTraceRows(trace, startCycle=0):
+    """
+    Streams the cycles of an already loaded (or memory mapped) trace.
+    """
+    for t in range(startCycle, len(trace.offsets) - 1):
+        yield trace.indices[trace.offsets[t]:trace.offsets[t + 1]]
+
+
+def sdrRows(trace):
+    """
+    Splits a trace into a list with one array of active cells per cycle.
+    The arrays are views into trace.indices.
+    """
+    if len(trace.offsets) < 2:
+        return []
+    return np.split(trace.indices, trace.offsets[1:-1])
+
+
+def formatSdrRow(cells):
+    """
+    One line of an activity file, in the format the C# experiments write ("7, 11, 25, ").
+    """
+    return ''.join('%d, ' % cell for cell in cells) + '\n'
+
+
+class SdrFollower(object):
+    """
+    Follows a SDR activity file while an experiment appends to it. Every call of
+    readNew() parses only the complete lines appended since the last call, a
+    partial last line is parsed as soon as its line break is written.
+
+    @param fileName (str) comma separated file with one SDR per line
+    """
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.reset()
+
+    def reset(self):
+        """
+        Starts reading at the beginning of the file again.
+        """
+        self.offset = 0
+        self.cycles = 0
+
+    def readNew(self, maxBytes=1 << 24):
+        """
+        Reads the complete lines appended since the last call, at most maxBytes
+        at once. Call it again until it returns no rows to read everything.
+
+        @return (list) arrays with active cells of the new cycles, None if the
+                file was truncated (a new run started), reading starts again
+                at the beginning with the next call
+        """
+        size = os.path.getsize(self.fileName)
+        if size < self.offset:
+            self.reset()
+            return None
+        if size == self.offset:
+            return []
+
+        with open(self.fileName, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read(min(size - self.offset, maxBytes))
+            last = data.rfind(b'\n')
+            if last < 0 and len(data) < size - self.offset:
+                # a line longer than maxBytes
+                data += file.read(size - self.offset - len(data))
+                last = data.rfind(b'\n')
+        if last < 0:
+            return []
+        self.offset += last + 1
+
+        indices, offsets = parseSdrBlock(data[:last + 1])
+        rows = sdrRows(SdrTrace(indices, offsets, None, None))
+        self.cycles += len(rows)
+        return rows
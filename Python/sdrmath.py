@@ -0,0 +1,296 @@
+########################################################################################
+# Combinatorics of SDRs in log space.
+# n: number of bits, a: active bits of the stored SDR, b: active bits of the
+# compared SDR (b = a if not given), q/theta: overlap (threshold).
+# All functions accept scalars or NumPy arrays (broadcast against each other) and
+# work with natural logarithms, so results like 1E-2000 do not underflow.
+# 'exact' variants use big integers and a memoized factorial table.
+#
+# Example:
+#   import sdrmath
+#   sdrmath.logFalsePositiveProbability(2048, 40, np.arange(10, 41))
+########################################################################################
+
+import math
+from decimal import Decimal
+import numpy as np
+
+try:
+    from scipy.special import gammaln
+except ImportError:
+    gammaln = np.vectorize(math.lgamma, otypes=[np.float64])
+
+_log10 = math.log(10)
+
+# Number of terms evaluated at once by logFalsePositiveProbability.
+_chunkTerms = 1 << 22
+
+# log(i!) for i = 0..len - 1, grown on demand.
+_logFactorials = np.zeros(1)
+
+
+def logFactorials(maxN):
+    """
+    Returns the table of log(i!) for i = 0..maxN (or longer). Integer
+    arguments are looked up in it instead of evaluating lgamma every time.
+    """
+    global _logFactorials
+    if len(_logFactorials) <= maxN:
+        _logFactorials = gammaln(np.arange(max(maxN + 1, 2 * len(_logFactorials))) + 1.0)
+    return _logFactorials
+
+
+def _logBinomialInt(n, k):
+    table = logFactorials(int(np.max(n)))
+    valid = (k >= 0) & (k <= n)
+    if np.all(valid):
+        return table[n] - table[k] - table[n - k]
+    nv = np.where(valid, n, 0)
+    kv = np.where(valid, k, 0)
+    return np.where(valid, table[nv] - table[kv] - table[nv - kv], -np.inf)
+
+
+def logBinomial(n, k):
+    """
+    Natural logarithm of 'n choose k', -inf where k < 0 or k > n.
+    """
+    n = np.asarray(n, dtype=np.float64)
+    k = np.asarray(k, dtype=np.float64)
+    valid = (k >= 0) & (k <= n)
+    nv = np.where(valid, n, 0)
+    kv = np.where(valid, k, 0)
+    res = gammaln(nv + 1) - gammaln(kv + 1) - gammaln(nv - kv + 1)
+    return np.where(valid, res, -np.inf)
+
+
+def logOverlapProbability(n, a, q, b=None):
+    """
+    Natural logarithm of the probability that a random SDR with b active bits
+    has exactly q active bits in common with a SDR with a active bits:
+    C(a, q) * C(n - a, b - q) / C(n, b)
+    """
+    if b is None:
+        b = a
+    return logBinomial(a, q) + logBinomial(np.subtract(n, a), np.subtract(b, q)) - logBinomial(n, b)
+
+
+def _logTails(n, a, b):
+    # log P(overlap >= theta) for theta = 0..columns - 1, one row per (n, a, b).
+    q = np.arange(int(np.max(np.minimum(a, b))) + 1)
+    terms = _logBinomialInt(a[:, None], q) + \
+        _logBinomialInt(n[:, None] - a[:, None], b[:, None] - q) - \
+        _logBinomialInt(n, b)[:, None]
+    return np.logaddexp.accumulate(terms[:, ::-1], axis=1)[:, ::-1]
+
+
+def _logTailAt(n, a, b, theta):
+    # log P(overlap >= theta) for every element. Only the terms q >= theta are
+    # evaluated, stored back to back in one flat array (ragged rows).
+    theta = np.maximum(theta, 0)
+    lengths = np.maximum(np.minimum(a, b) - theta + 1, 0)
+    res = np.full(len(n), -np.inf)
+    rows = np.flatnonzero(lengths > 0)
+    if len(rows) == 0:
+        return res
+
+    lengths = lengths[rows]
+    starts = np.cumsum(lengths) - lengths
+    owner = np.repeat(rows, lengths)
+    q = theta[owner] + np.arange(int(lengths.sum())) - np.repeat(starts, lengths)
+    terms = _logBinomialInt(a[owner], q) + \
+        _logBinomialInt(n[owner] - a[owner], b[owner] - q)
+
+    peak = np.maximum.reduceat(terms, starts)
+    finite = np.isfinite(peak)
+    with np.errstate(invalid='ignore'):
+        sums = np.add.reduceat(np.exp(terms - np.repeat(peak, lengths)), starts)
+    rows = rows[finite]
+    res[rows] = peak[finite] + np.log(sums[finite]) - _logBinomialInt(n[rows], b[rows])
+    return res
+
+
+def logMatchProbabilities(n, a, b=None):
+    """
+    Natural logarithms of the probabilities that the overlap is at least theta,
+    for all thresholds theta = 0..min(a, b) of one scalar (n, a, b) at once.
+
+    @return (array) element theta is log P(overlap >= theta)
+    """
+    if b is None:
+        b = a
+    return _logTails(np.array([n]), np.array([a]), np.array([b]))[0]
+
+
+def logFalsePositiveProbability(n, a, theta, b=None):
+    """
+    Natural logarithm of the probability that a random SDR with b active bits
+    matches a SDR with a active bits, i.e. overlaps with at least theta bits.
+    Vectorized over all arguments. The tail sums are computed once per distinct
+    (n, a, b) for all thresholds, so sweeping theta is almost free.
+    """
+    if b is None:
+        b = a
+    n, a, theta, b = np.broadcast_arrays(n, a, theta, b)
+    shape = n.shape
+    n, a, theta, b = [np.ravel(x).astype(np.int64) for x in (n, a, theta, b)]
+
+    res = np.full(len(n), -np.inf)
+    if len(n) == 0:
+        return res.reshape(shape)
+
+    triples, inverse = np.unique(np.stack([n, a, b], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    theta = np.maximum(theta, 0)
+
+    numTerms = int(np.max(np.minimum(triples[:, 1], triples[:, 2]))) + 1
+    chunk = max(1, _chunkTerms // numTerms)
+    for start in range(0, len(triples), chunk):
+        t = triples[start:start + chunk]
+        tails = _logTails(t[:, 0], t[:, 1], t[:, 2])
+        points = np.flatnonzero((inverse >= start) & (inverse < start + chunk))
+        inRange = theta[points] < tails.shape[1]
+        points = points[inRange]
+        res[points] = tails[inverse[points] - start, theta[points]]
+
+    return res.reshape(shape)
+
+
+def falsePositiveProbability(n, a, theta, b=None, exact=False):
+    """
+    Probability that a random SDR overlaps with at least theta bits, see
+    logFalsePositiveProbability. With exact=True the result is computed with
+    big integers and returned as Decimal (object array for array inputs).
+    """
+    if not exact:
+        return np.exp(logFalsePositiveProbability(n, a, theta, b))
+    if b is None:
+        b = a
+
+    def exactValue(n, a, theta, b):
+        num = sum(exactBinomial(a, q) * exactBinomial(n - a, b - q)
+                  for q in range(max(theta, 0), min(a, b) + 1))
+        return Decimal(num) / Decimal(exactBinomial(n, b))
+
+    return _exactMap(exactValue, n, a, theta, b)
+
+
+def overlapProbability(n, a, q, b=None, exact=False):
+    """
+    Probability that a random SDR overlaps with exactly q bits, see
+    logOverlapProbability. With exact=True the result is a Decimal.
+    """
+    if not exact:
+        return np.exp(logOverlapProbability(n, a, q, b))
+    if b is None:
+        b = a
+
+    def exactValue(n, a, q, b):
+        num = exactBinomial(a, q) * exactBinomial(n - a, b - q)
+        return Decimal(num) / Decimal(exactBinomial(n, b))
+
+    return _exactMap(exactValue, n, a, q, b)
+
+
+def unionSize(n, a, numPatterns):
+    """
+    Expected number of active bits in the union of numPatterns random SDRs
+    with a active bits each.
+    """
+    return n * (1.0 - (1.0 - np.divide(a, n)) ** numPatterns)
+
+
+def logUnionFalsePositiveProbability(n, a, theta, numPatterns):
+    """
+    Natural logarithm of the probability that a random SDR with a active bits
+    matches the union of numPatterns stored SDRs with at least theta bits.
+    """
+    u = np.rint(unionSize(n, a, numPatterns)).astype(np.int64)
+    return logFalsePositiveProbability(n, u, theta, b=a)
+
+
+def unionCapacity(n, a, theta, maxError):
+    """
+    Maximal number of random SDRs with a active bits that can be stored in a
+    union, before a random SDR matches it (overlap >= theta) with a
+    probability above maxError. Vectorized over all arguments. The union size
+    is found by bisection, the number of patterns follows from unionSize.
+
+    @return (array) capacity as float, 0 if even one pattern exceeds the
+                    error and inf if the union may become completely active.
+    """
+    n, a, theta = np.broadcast_arrays(n, a, theta)
+    shape = n.shape
+    n, a, theta = [np.ravel(x).astype(np.int64) for x in (n, a, theta)]
+    limit = math.log(maxError)
+
+    # Invariant: union size lo keeps the error, hi does not.
+    lo = a.copy()
+    hi = n.copy()
+    ok = _logTailAt(n, lo, a, theta) <= limit
+    full = _logTailAt(n, hi, a, theta) <= limit
+    active = ok & ~full & (hi - lo > 1)
+    while np.any(active):
+        mid = (lo[active] + hi[active]) // 2
+        good = _logTailAt(n[active], mid, a[active], theta[active]) <= limit
+        index = np.flatnonzero(active)
+        lo[index[good]] = mid[good]
+        hi[index[~good]] = mid[~good]
+        active = ok & ~full & (hi - lo > 1)
+
+    # Largest number of patterns whose rounded union size is at most lo.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        patterns = np.ceil(np.log1p(-(lo + 0.5) / n) / np.log1p(-a / n)) - 1
+    patterns = np.maximum(patterns, 1.0)
+    patterns[~ok] = 0.0
+    patterns[full] = np.inf
+    return patterns.reshape(shape)
+
+
+_factorials = [1]
+
+
+def exactFactorial(n):
+    """
+    n! as big integer. All factorials up to n are memoized.
+    """
+    for i in range(len(_factorials), n + 1):
+        _factorials.append(_factorials[-1] * i)
+    return _factorials[n]
+
+
+def exactBinomial(n, k):
+    """
+    'n choose k' as big integer, 0 where k < 0 or k > n.
+    """
+    n = int(n)
+    k = int(k)
+    if k < 0 or k > n:
+        return 0
+    return exactFactorial(n) // (exactFactorial(k) * exactFactorial(n - k))
+
+
+def _exactMap(func, *args):
+    arrays = np.broadcast_arrays(*args)
+    if arrays[0].ndim == 0:
+        return func(*[int(x) for x in arrays])
+    res = np.empty(arrays[0].shape, dtype=object)
+    for index in np.ndindex(res.shape):
+        res[index] = func(*[int(x[index]) for x in arrays])
+    return res
+
+
+def formatLog(logValue, digits=3):
+    """
+    Formats exp(logValue) like '%10.3E' does, also far below the float range.
+    """
+    if logValue == -np.inf:
+        return "%*.*E" % (digits + 7, digits, 0)
+    log10 = logValue / _log10
+    exponent = int(math.floor(log10))
+    mantissa = 10 ** (log10 - exponent)
+    # rounding the mantissa can carry into the exponent, e.g. 9.9996E-05
+    if float("%.*f" % (digits, mantissa)) >= 10:
+        mantissa /= 10
+        exponent += 1
+    text = "%.*fE%s%02d" % (digits, mantissa, '-' if exponent < 0 else '+', abs(exponent))
+    return text.rjust(digits + 7)
@@ -0,0 +1,146 @@
+########################################################################################
+# Pairwise overlap of many SDRs.
+# SDRs are rows of a sparse binary CSR matrix (cycles x cells), all pairwise overlaps
+# are one sparse matrix product A * B^T. Large comparisons are computed in tiles,
+# which are written into a memory mapped .npy file instead of one dense matrix.
+# Example:
+# python sdroverlap.py "../Results/SequenceLearning/.../cellState_..._Digit_6-5.csv" -m percent -o overlap.npy
+########################################################################################
+
+import argparse
+import time
+import numpy as np
+import scipy.sparse
+
+import sdrio
+
+Metrics = ['overlap', 'percent', 'jaccard']
+
+
+def sdrMatrix(trace, numCells=None):
+    """
+    Converts a SdrTrace into a binary CSR matrix with one row per cycle.
+
+    @param trace    (sdrio.SdrTrace) active cells per cycle
+    @param numCells (int)            number of columns, default is maxCell + 1
+
+    @return (scipy.sparse.csr_matrix) int32 matrix of shape (cycles, numCells)
+    """
+    if numCells is None:
+        numCells = trace.maxCell + 1 if trace.maxCell is not None else 0
+    indices = np.asarray(trace.indices, dtype=np.int32)
+    offsets = np.asarray(trace.offsets, dtype=np.int64)
+    data = np.ones(len(indices), dtype=np.int32)
+    matrix = scipy.sparse.csr_matrix((data, indices, offsets),
+                                     shape=(len(offsets) - 1, numCells))
+    # a cell listed twice in one SDR counts once
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def overlapMatrix(A, B=None):
+    """
+    Number of common active cells of every pair of rows of A and B.
+
+    @return (array) dense int matrix of shape (rows of A, rows of B)
+    """
+    if B is None:
+        B = A
+    return np.asarray((A @ B.T).toarray(), dtype=np.int32)
+
+
+def _normalize(overlaps, sizesA, sizesB, metric):
+    if metric == 'overlap':
+        return overlaps
+    if metric == 'percent':
+        # same as percentOverlap() in SpatialPooler_Sample.py
+        denominator = np.minimum(sizesA[:, None], sizesB[None, :])
+    elif metric == 'jaccard':
+        denominator = sizesA[:, None] + sizesB[None, :] - overlaps
+    else:
+        raise ValueError("Unknown metric '%s'." % metric)
+    res = np.zeros(overlaps.shape, dtype=np.float32)
+    np.divide(overlaps, denominator, out=res, where=denominator > 0)
+    return res
+
+
+def percentOverlapMatrix(A, B=None):
+    """
+    Overlap divided by the smaller number of active cells of the pair, 0 if
+    one SDR is empty.
+    """
+    if B is None:
+        B = A
+    return _normalize(overlapMatrix(A, B), rowSizes(A), rowSizes(B), 'percent')
+
+
+def jaccardMatrix(A, B=None):
+    """
+    Overlap divided by the size of the union of the pair, 0 if both are empty.
+    """
+    if B is None:
+        B = A
+    return _normalize(overlapMatrix(A, B), rowSizes(A), rowSizes(B), 'jaccard')
+
+
+def rowSizes(A):
+    """
+    Number of active cells of every row.
+    """
+    return np.diff(A.indptr).astype(np.int32)
+
+
+def blockedOverlap(fileName, A, B=None, metric='overlap', blockSize=4096):
+    """
+    Computes the pairwise metric tile by tile and streams the tiles into a
+    memory mapped .npy file, so only one tile is held in memory.
+
+    @param fileName  (str)    output .npy file
+    @param A         (csr)    SDRs as rows
+    @param B         (csr)    SDRs compared with A, default is A
+    @param metric    (str)    'overlap' (int32), 'percent' or 'jaccard' (float32)
+    @param blockSize (int)    number of rows and columns of a tile
+
+    @return (np.memmap) the result, opened read only
+    """
+    if B is None:
+        B = A
+    if metric not in Metrics:
+        raise ValueError("Unknown metric '%s'." % metric)
+
+    dtype = np.int32 if metric == 'overlap' else np.float32
+    out = np.lib.format.open_memmap(fileName, mode='w+', dtype=dtype,
+                                    shape=(A.shape[0], B.shape[0]))
+    sizesA = rowSizes(A)
+    sizesB = rowSizes(B)
+    for i in range(0, A.shape[0], blockSize):
+        blockA = A[i:i + blockSize]
+        for j in range(0, B.shape[0], blockSize):
+            overlaps = overlapMatrix(blockA, B[j:j + blockSize])
+            out[i:i + blockSize, j:j + blockSize] = _normalize(
+                overlaps, sizesA[i:i + blockSize], sizesB[j:j + blockSize], metric)
+    out.flush()
+    del out
+    return np.load(fileName, mmap_mode='r')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pairwise overlap of the SDRs of activity files')
+    parser.add_argument('filename', help='File with one SDR per line')
+    parser.add_argument('--other', '-other', help='Second file compared with the first one')
+    parser.add_argument('--metric', '-m', choices=Metrics, default='overlap')
+    parser.add_argument('--blocksize', '-b', type=int, default=4096, help='Rows and columns of a tile')
+    parser.add_argument('--out', '-o', help='Output .npy file', default='overlap.npy')
+    args = parser.parse_args()
+
+    start = time.time()
+    traceA = sdrio.readSdrFile(args.filename)
+    traceB = sdrio.readSdrFile(args.other) if args.other is not None else traceA
+    numCells = max(traceA.maxCell or 0, traceB.maxCell or 0) + 1
+    A = sdrMatrix(traceA, numCells)
+    B = sdrMatrix(traceB, numCells) if args.other is not None else A
+
+    res = blockedOverlap(args.out, A, B, args.metric, args.blocksize)
+    print("%d x %d %s matrix written to '%s' in %.2f s" %
+          (res.shape[0], res.shape[1], args.metric, args.out, time.time() - start))
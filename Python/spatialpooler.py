@@ -0,0 +1,373 @@
+########################################################################################
+# Spatial Pooler in NumPy, same algorithm as SpatialPooler.cs of NeoCortexApi.
+# The potential pools are CSR arrays (potential input of every synapse, offsets per
+# column) with float32 permanences. The connected synapses are a scipy.sparse CSR
+# matrix (columns x inputs) with the same structure, learning only rewrites its data.
+#  - overlaps of a batch of inputs are one sparse matrix product
+#  - global inhibition selects the top columns of all inputs with argpartition
+#    (ties like the stable sort of InhibitColumnsGlobal), local inhibition uses
+#    inhibition.py
+#  - AdaptSynapses, BoostProximalSegment and BoostColsWithLowOverlap update the
+#    permanences of all synapses of the active/weak columns at once
+#  - duty cycles and boost factors use boostreplay.DutyCycleReplay and boostsim
+# compute() without learning processes a whole batch at once. With learning the batch
+# is split into steps of 'learnBatch' inputs, 1 (default) learns input by input like
+# the C# code, larger steps sum the permanence changes of their inputs, which is much
+# faster and close to sequential learning for small steps.
+# Duty cycle periods count the learning iterations only.
+# Example:
+#   sp = SpatialPooler([28, 28], [64, 64], potentialRadius=-1, globalInhibition=True)
+#   winners = sp.compute(inputs, learn=True, learnBatch=100)   # inputs: (B, 784) 0/1
+########################################################################################
+
+import numpy as np
+import scipy.sparse
+
+import boostreplay
+import boostsim
+import inhibition
+import neighborhood
+
+# Number of (column, input) candidates generated at once while mapping the pools.
+_chunkPairs = 1 << 22
+
+
+def _segmentStarts(sizes):
+    starts = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=starts[1:])
+    return starts
+
+
+def _maskToCsr(mask):
+    # rows of a boolean matrix -> (indices, offsets) like sdrio.parseSdrBlock
+    rows, indices = np.nonzero(mask)
+    return indices, _segmentStarts(np.bincount(rows, minlength=mask.shape[0]))
+
+
+class SpatialPooler(object):
+    """
+    Parameters have the names and defaults of HtmConfig.
+
+    @param inputDimensions            (list)  input topology, e.g. [28, 28]
+    @param columnDimensions           (list)  column topology, e.g. [64, 64]
+    @param potentialRadius            (int)   receptive field radius, < 0 for all inputs
+    @param potentialPct               (float) fraction of the receptive field in the pool
+    @param globalInhibition           (bool)  global or local inhibition
+    @param localAreaDensity           (float) density of active columns, <= 0 to use
+                                              numActiveColumnsPerInhArea
+    @param numActiveColumnsPerInhArea (float) active columns per inhibition area
+    @param seed                       (int)   seed of the pools and initial permanences
+    """
+
+    def __init__(self, inputDimensions, columnDimensions, potentialRadius=15, potentialPct=0.75,
+                 globalInhibition=True, localAreaDensity=-1.0, numActiveColumnsPerInhArea=10,
+                 stimulusThreshold=5.0, synPermInactiveDec=0.008, synPermActiveInc=0.05,
+                 synPermConnected=0.1, synPermBelowStimulusInc=0.01, synPermTrimThreshold=0.05,
+                 synPermMax=1.0, initialSynapseConnsPct=0.5, minPctOverlapDutyCycles=0.001,
+                 minPctActiveDutyCycles=0.001, dutyCyclePeriod=1000, maxBoost=10.0,
+                 maxInhibitionDensity=0.5, updatePeriod=50, wrapAround=True, seed=42):
+        self.inputDimensions = [int(d) for d in inputDimensions]
+        self.columnDimensions = [int(d) for d in columnDimensions]
+        self.numInputs = int(np.prod(self.inputDimensions))
+        self.numColumns = int(np.prod(self.columnDimensions))
+        if self.numInputs <= 0 or self.numColumns <= 0:
+            raise ValueError("Invalid number of inputs or columns.")
+
+        self.potentialRadius = potentialRadius
+        self.potentialPct = potentialPct
+        self.globalInhibition = globalInhibition
+        self.localAreaDensity = localAreaDensity
+        self.numActiveColumnsPerInhArea = numActiveColumnsPerInhArea
+        self.stimulusThreshold = stimulusThreshold
+        self.synPermInactiveDec = synPermInactiveDec
+        self.synPermActiveInc = synPermActiveInc
+        self.synPermConnected = synPermConnected
+        self.synPermBelowStimulusInc = synPermBelowStimulusInc
+        self.synPermTrimThreshold = synPermTrimThreshold
+        self.synPermMax = synPermMax
+        self.initialSynapseConnsPct = initialSynapseConnsPct
+        self.minPctOverlapDutyCycles = minPctOverlapDutyCycles
+        self.minPctActiveDutyCycles = minPctActiveDutyCycles
+        self.maxBoost = maxBoost
+        self.maxInhibitionDensity = maxInhibitionDensity
+        self.updatePeriod = updatePeriod
+        self.wrapAround = wrapAround
+        self.random = np.random.default_rng(seed)
+
+        self.iteration = 0
+        self.overlapDutyCycles = boostreplay.DutyCycleReplay(self.numColumns, dutyCyclePeriod)
+        self.activeDutyCycles = boostreplay.DutyCycleReplay(self.numColumns, dutyCyclePeriod)
+        self.minOverlapDutyCycles = np.zeros(self.numColumns)
+        self.minActiveDutyCycles = np.zeros(self.numColumns)
+        self.boostFactors = np.ones(self.numColumns)
+
+        self.potential, self.offsets = self._mapPotential()
+        sizes = np.diff(self.offsets)
+        if sizes.min() < self.stimulusThreshold:
+            raise ValueError("StimulusThreshold as number of required connected synapses cannot be "
+                             "greater than number of neurons in receptive field.")
+        self.synapseColumns = np.repeat(np.arange(self.numColumns, dtype=np.int32), sizes)
+        # one entry per potential synapse, 1 if connected, updated in place by learning
+        self.connected = scipy.sparse.csr_matrix(
+            (np.zeros(len(self.potential), dtype=np.float32), self.potential, self.offsets),
+            shape=(self.numColumns, self.numInputs))
+        self.permanences = self._initPermanences()
+        self._updatePermanences(np.arange(len(self.permanences)), np.zeros(len(self.permanences)))
+        self.inhibitionRadius = 0
+        self.updateInhibitionRadius()
+
+    def _mapColumns(self):
+        # HtmCompute.MapColumn: input in the center of the span of every column
+        coords = neighborhood.coordinates(np.arange(self.numColumns), self.columnDimensions)
+        colDims = np.array(self.columnDimensions, dtype=np.float64)
+        inpDims = np.array(self.inputDimensions, dtype=np.float64)
+        inputCoords = (coords / colDims * inpDims + 0.5 * inpDims / colDims).astype(np.int64)
+        inputCoords = np.minimum(inputCoords, np.array(self.inputDimensions) - 1)
+        return neighborhood.flatIndices(inputCoords, self.inputDimensions)
+
+    def _mapPotential(self):
+        # HtmCompute.MapPotential: a random subset of the receptive field of every column
+        if self.potentialRadius < 0 or self.potentialRadius >= max(self.inputDimensions):
+            fields = neighborhood.Neighborhoods(
+                np.arange(self.numInputs, dtype=np.int32),
+                np.array([0, self.numInputs], dtype=np.int64))
+            centers = np.zeros(self.numColumns, dtype=np.int64)
+        else:
+            fields = neighborhood.neighborhoods(self.inputDimensions, self.potentialRadius, self.wrapAround)
+            centers = self._mapColumns()
+
+        fieldSizes = np.diff(fields.offsets)[centers]
+        numPotential = (fieldSizes * self.potentialPct + 0.5).astype(np.int64)
+        offsets = _segmentStarts(numPotential)
+        potential = np.empty(offsets[-1], dtype=np.int32)
+
+        chunk = max(1, _chunkPairs // max(int(fieldSizes.max()), 1))
+        for start in range(0, self.numColumns, chunk):
+            end = min(start + chunk, self.numColumns)
+            sizes = fieldSizes[start:end]
+            local = _segmentStarts(sizes)
+            # receptive fields of the columns in a random order, the first numPotential are sampled
+            owners = np.repeat(np.arange(end - start, dtype=np.int64), sizes)
+            fieldInputs = fields.indices[np.arange(local[-1]) +
+                                         np.repeat(fields.offsets[centers[start:end]] - local[:-1], sizes)]
+            order = np.lexsort((self.random.random(len(owners)), owners))
+            rank = np.arange(len(order)) - np.repeat(local[:-1], sizes)
+            picked = order[rank < np.repeat(numPotential[start:end], sizes)]
+            # sorted inputs per column
+            keys = np.sort(owners[picked] * self.numInputs + fieldInputs[picked])
+            potential[offsets[start]:offsets[end]] = keys % self.numInputs
+        return potential, offsets
+
+    def _initPermanences(self):
+        # HtmCompute.InitSynapsePermanences
+        numSynapses = len(self.potential)
+        connected = self.random.random(numSynapses) <= self.initialSynapseConnsPct
+        values = self.random.random(numSynapses)
+        perm = np.where(connected,
+                        self.synPermConnected + (self.synPermMax - self.synPermConnected) * values,
+                        self.synPermConnected * values)
+        perm = np.floor(perm * 100000) / 100000.0
+        perm[perm < self.synPermTrimThreshold] = 0
+        return perm.astype(np.float32)
+
+    def _synapsesOf(self, columns):
+        # indices of all synapses of the (sorted) columns
+        sizes = self.offsets[columns + 1] - self.offsets[columns]
+        local = _segmentStarts(sizes)
+        return np.arange(local[-1]) + np.repeat(self.offsets[columns] - local[:-1], sizes)
+
+    def _updatePermanences(self, synapses, changes):
+        """
+        Adds changes to the permanences of complete columns and applies
+        UpdatePermanencesForColumn (raise to the stimulus threshold, trim, clip).
+
+        @param synapses (array) all synapses of the columns, grouped by column
+        """
+        perm = np.clip(self.permanences[synapses] + changes, 0.0, self.synPermMax)
+        columns = self.synapseColumns[synapses]
+        threshold = int(np.ceil(self.stimulusThreshold))
+        if threshold > 0 and len(synapses) > 0:
+            # BoostProximalSegment raises the whole pool until 'threshold' synapses are
+            # connected, i.e. by the number of steps the threshold-th largest one needs.
+            order = np.lexsort((-perm, columns))
+            starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+            nth = perm[order[starts + threshold - 1]]
+            steps = np.where(nth > self.synPermConnected, 0,
+                             np.floor((self.synPermConnected - nth) / self.synPermBelowStimulusInc) + 1)
+            perm = perm + np.repeat(steps * self.synPermBelowStimulusInc, np.diff(np.r_[starts, len(perm)]))
+        perm[perm <= self.synPermTrimThreshold] = 0
+        self.permanences[synapses] = np.clip(perm, 0.0, self.synPermMax)
+        self.connected.data[synapses] = self.permanences[synapses] >= self.synPermConnected
+
+    def _inputMatrix(self, inputs):
+        if scipy.sparse.issparse(inputs):
+            inputs = scipy.sparse.csr_matrix(inputs, dtype=np.float32)
+        else:
+            inputs = np.asarray(inputs, dtype=np.float32).reshape(-1, self.numInputs)
+        if inputs.shape[1] != self.numInputs:
+            raise ValueError("Input array must be same size as the defined number of inputs: %d, %d" %
+                             (self.numInputs, inputs.shape[1]))
+        return inputs
+
+    def overlaps(self, inputs):
+        """
+        CalculateOverlap of a batch, overlaps below stimulusThreshold are 0.
+
+        @param inputs (array) 0/1 inputs, one row per input (dense or scipy.sparse)
+
+        @return (array) int32 overlaps, inputs x columns
+        """
+        inputs = self._inputMatrix(inputs)
+        if scipy.sparse.issparse(inputs):
+            overlaps = (inputs @ self.connected.T).toarray()
+        else:
+            overlaps = (self.connected @ inputs.T).T
+        overlaps = np.rint(overlaps).astype(np.int32)
+        overlaps[overlaps < self.stimulusThreshold] = 0
+        return overlaps
+
+    def density(self):
+        # CalcInhibitionDensity
+        if self.localAreaDensity > 0:
+            return self.localAreaDensity
+        return inhibition.inhibitionDensity(self.numActiveColumnsPerInhArea, self.inhibitionRadius,
+                                            self.columnDimensions, self.maxInhibitionDensity)
+
+    def inhibitColumnsGlobal(self, overlaps, density):
+        """
+        Top int(density * numColumns) columns of every row. Like the stable sort of the
+        C# code, of equal overlaps the columns with the higher index win.
+
+        @return (array) boolean winner mask, rows x columns
+        """
+        numActive = int(density * self.numColumns)
+        winners = np.zeros(overlaps.shape, dtype=bool)
+        if numActive <= 0:
+            return winners
+        numActive = min(numActive, self.numColumns)
+        kth = np.partition(overlaps, self.numColumns - numActive, axis=1)[:, self.numColumns - numActive]
+        above = overlaps > kth[:, None]
+        equal = overlaps == kth[:, None]
+        missing = numActive - np.count_nonzero(above, axis=1)
+        fromRight = np.cumsum(equal[:, ::-1], axis=1)[:, ::-1]
+        winners = above | (equal & (fromRight <= missing[:, None]))
+        return winners & (overlaps >= self.stimulusThreshold)
+
+    def inhibitColumns(self, overlaps):
+        density = self.density()
+        if self.globalInhibition or self.inhibitionRadius > max(self.columnDimensions):
+            return self.inhibitColumnsGlobal(overlaps, density)
+        return inhibition.inhibitColumnsLocal(overlaps, self.columnDimensions, self.inhibitionRadius,
+                                              density, self.stimulusThreshold, self.wrapAround)
+
+    def compute(self, inputs, learn=True, learnBatch=1):
+        """
+        Active columns of one input or a batch of inputs.
+
+        @param inputs     (array) 0/1 input vector, or one row per input (dense or scipy.sparse)
+        @param learn      (bool)  adapt synapses, duty cycles and boost factors
+        @param learnBatch (int)   inputs learned at once, 1 is the sequential C# algorithm
+
+        @return (array) boolean mask of the active columns, one row per input
+        """
+        single = not scipy.sparse.issparse(inputs) and np.ndim(inputs) == 1
+        inputs = self._inputMatrix(inputs)
+        if not learn:
+            self.iteration += inputs.shape[0]
+            winners = self.inhibitColumns(self.overlaps(inputs).astype(np.float64))
+        else:
+            winners = np.zeros((inputs.shape[0], self.numColumns), dtype=bool)
+            for start in range(0, inputs.shape[0], learnBatch):
+                end = min(start + learnBatch, inputs.shape[0])
+                winners[start:end] = self._learn(inputs[start:end])
+        return winners[0] if single else winners
+
+    def _learn(self, inputs):
+        numInputs = inputs.shape[0]
+        first = self.iteration
+        self.iteration += numInputs
+
+        overlaps = self.overlaps(inputs)
+        winners = self.inhibitColumns(overlaps * self.boostFactors)
+
+        self.adaptSynapses(inputs, winners)
+        self.overlapDutyCycles.update(*_maskToCsr(overlaps > 0))
+        self.activeDutyCycles.update(*_maskToCsr(winners))
+        self.boostColsWithLowOverlap()
+        self.boostByActivationFrequency()
+        if self.iteration // self.updatePeriod > first // self.updatePeriod:
+            self.updateInhibitionRadius()
+            self.updateMinDutyCycles()
+        return winners
+
+    def adaptSynapses(self, inputs, winners):
+        """
+        Increments the synapses of the winners to active inputs by synPermActiveInc and
+        decrements all others by synPermInactiveDec, summed over the rows of a batch.
+        """
+        columns = np.flatnonzero(winners.any(axis=0))
+        if len(columns) == 0:
+            return
+        synapses = self._synapsesOf(columns)
+        if inputs.shape[0] == 1:
+            row = inputs[0].toarray()[0] if scipy.sparse.issparse(inputs) else inputs[0]
+            activeCount = row[self.potential[synapses]]
+            wins = 1
+        else:
+            # how often every winner saw every input bit active
+            together = scipy.sparse.csr_matrix(winners.T.astype(np.float32)) @ inputs
+            if scipy.sparse.issparse(together):
+                activeCount = np.asarray(together[self.synapseColumns[synapses],
+                                                  self.potential[synapses]]).ravel()
+            else:
+                activeCount = np.asarray(together)[self.synapseColumns[synapses], self.potential[synapses]]
+            wins = np.count_nonzero(winners, axis=0)[self.synapseColumns[synapses]]
+        changes = self.synPermActiveInc * activeCount - self.synPermInactiveDec * (wins - activeCount)
+        self._updatePermanences(synapses, changes)
+
+    def boostColsWithLowOverlap(self):
+        weak = np.flatnonzero(self.overlapDutyCycles.activeDutyCycles < self.minOverlapDutyCycles)
+        if len(weak) > 0:
+            synapses = self._synapsesOf(weak)
+            self._updatePermanences(synapses, np.full(len(synapses), self.synPermBelowStimulusInc))
+
+    def boostByActivationFrequency(self):
+        # boost factors are kept while all minimal duty cycles are 0
+        if np.any(self.minActiveDutyCycles > 0):
+            self.boostFactors = boostsim.boostFactors(self.activeDutyCycles.activeDutyCycles,
+                                                      self.minActiveDutyCycles, self.maxBoost)
+
+    def updateInhibitionRadius(self):
+        """
+        Average span of the connected synapses (in inputs) times columns per input.
+        """
+        if self.globalInhibition:
+            self.inhibitionRadius = max(self.columnDimensions)
+            return
+        connected = self.permanences >= self.synPermConnected
+        columns = self.synapseColumns[connected]
+        coords = neighborhood.coordinates(self.potential[connected], self.inputDimensions)
+        spans = np.zeros(self.numColumns)
+        if len(columns) > 0:
+            starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+            spanPerDim = (np.maximum.reduceat(coords, starts, axis=0) -
+                          np.minimum.reduceat(coords, starts, axis=0) + 1)
+            spans[columns[starts]] = spanPerDim.mean(axis=1)
+        columnsPerInput = np.mean(np.array(self.columnDimensions, dtype=np.float64) /
+                                  np.array(self.inputDimensions, dtype=np.float64))
+        radius = max(1.0, (spans.mean() * columnsPerInput - 1) / 2.0)
+        self.inhibitionRadius = int(radius + 0.5)
+
+    def updateMinDutyCycles(self):
+        overlapDuty = self.overlapDutyCycles.activeDutyCycles
+        activeDuty = self.activeDutyCycles.activeDutyCycles
+        if self.globalInhibition or self.inhibitionRadius > self.numInputs:
+            self.minOverlapDutyCycles[:] = self.minPctOverlapDutyCycles * overlapDuty.max()
+            self.minActiveDutyCycles[:] = self.minPctActiveDutyCycles * activeDuty.max()
+        else:
+            nbs = neighborhood.neighborhoods(self.columnDimensions, self.inhibitionRadius, self.wrapAround)
+            starts = nbs.offsets[:-1]
+            self.minOverlapDutyCycles = self.minPctOverlapDutyCycles * np.maximum.reduceat(
+                overlapDuty[nbs.indices], starts)
+            self.minActiveDutyCycles = self.minPctActiveDutyCycles * np.maximum.reduceat(
+                activeDuty[nbs.indices], starts)
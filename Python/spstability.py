@@ -0,0 +1,207 @@
+########################################################################################
+# Stability of the Spatial Pooler output over cycles.
+# Streams SDR-per-cycle files once and computes for every cycle the overlap with the
+# previous cycle, a rolling stability score (mean overlap of the last N cycles) and
+# the first cycle after which the SDR stays stable for K cycles.
+# Memory is O(window), no matter how long the file is.
+# Examples:
+# python spstability.py "../Results/Spatial Pooler Stability" -k 20 -o stability.csv
+# python spstability.py ActiveColumns_MaxBoost_5_MinOverl_1_4_plotly-input.csv -cy cycles.csv
+########################################################################################
+
+import argparse
+import collections
+import concurrent.futures
+import glob
+import os
+import sys
+import numpy as np
+
+import sdrio
+
+
+def percentOverlap(activeCells1, activeCells2):
+    """
+    Number of common active cells divided by the smaller number of active
+    cells, 0 if one of the SDRs is empty. Same as percentOverlap() of
+    SpatialPooler_Sample.py for sparse SDRs.
+    """
+    minSize = min(len(activeCells1), len(activeCells2))
+    if minSize == 0:
+        return 0.0
+    return float(len(np.intersect1d(activeCells1, activeCells2))) / minSize
+
+
+class StabilityAnalyzer(object):
+    """
+    Consumes one SDR per cycle.
+
+    @param window       (int)   number of cycles of the rolling stability score
+    @param stableCycles (int)   number of cycles (K) the SDR has to stay stable
+    @param minOverlap   (float) percent overlap with the previous cycle that
+                                counts as stable (1.0: unchanged SDR)
+    """
+
+    def __init__(self, window=10, stableCycles=10, minOverlap=1.0):
+        self.window = window
+        self.stableCycles = stableCycles
+        self.minOverlap = minOverlap
+        self.cycle = -1
+        self.previous = None
+        self.overlaps = collections.deque(maxlen=window)
+        self.overlapSum = 0.0
+        self.runStart = None
+        self.stableCycle = None
+
+    def update(self, activeCells):
+        """
+        Adds the SDR of the next cycle.
+
+        @return (tuple) overlap with the previous cycle (None for the first
+                        cycle) and the rolling stability score
+        """
+        self.cycle += 1
+        overlap = None
+        if self.previous is not None:
+            overlap = percentOverlap(self.previous, activeCells)
+            if len(self.overlaps) == self.window:
+                self.overlapSum -= self.overlaps[0]
+            self.overlaps.append(overlap)
+            self.overlapSum += overlap
+
+            if overlap >= self.minOverlap:
+                if self.runStart is None:
+                    # the SDR of the previous cycle is the first one of the run
+                    self.runStart = self.cycle - 1
+                if self.stableCycle is None and self.cycle - self.runStart >= self.stableCycles:
+                    self.stableCycle = self.runStart
+            else:
+                self.runStart = None
+
+        self.previous = np.array(activeCells)
+        return overlap, self.score()
+
+    def score(self):
+        """
+        Mean overlap of the last 'window' cycles, None before the second cycle.
+        """
+        if len(self.overlaps) == 0:
+            return None
+        return self.overlapSum / len(self.overlaps)
+
+
+def findStableCycle(rows, stableCycles=10, minOverlap=1.0):
+    """
+    Returns the first cycle after which the SDR stays stable for stableCycles
+    cycles, or None. Stops consuming rows as soon as the cycle is found.
+    """
+    analyzer = StabilityAnalyzer(1, stableCycles, minOverlap)
+    for activeCells in rows:
+        analyzer.update(activeCells)
+        if analyzer.stableCycle is not None:
+            return analyzer.stableCycle
+    return None
+
+
+def trackStability(rows, analyzer):
+    """
+    Passes a stream of SDRs through and feeds every SDR to the analyzer, so the
+    stability is computed while another consumer reads the stream.
+    """
+    for activeCells in rows:
+        analyzer.update(activeCells)
+        yield activeCells
+
+
+def analyzeFile(fileName, window=10, stableCycles=10, minOverlap=1.0, cyclesFile=None):
+    """
+    Analyzes a SDR activity file in one pass.
+
+    @param cyclesFile (str) optional CSV receiving cycle, overlap and score per cycle
+
+    @return (dict) cycles, stableCycle, finalScore and meanOverlap of the file
+    """
+    analyzer = StabilityAnalyzer(window, stableCycles, minOverlap)
+    overlapSum = 0.0
+    out = open(cyclesFile, 'w') if cyclesFile is not None else None
+    try:
+        if out is not None:
+            out.write("cycle,overlap,score\n")
+        for activeCells in sdrio.iterSdrRows(fileName):
+            overlap, score = analyzer.update(activeCells)
+            if overlap is not None:
+                overlapSum += overlap
+            if out is not None:
+                out.write("%d,%s,%s\n" % (analyzer.cycle,
+                                          '' if overlap is None else '%.4f' % overlap,
+                                          '' if score is None else '%.4f' % score))
+    finally:
+        if out is not None:
+            out.close()
+
+    return {
+        'file': fileName,
+        'cycles': analyzer.cycle + 1,
+        'stableCycle': analyzer.stableCycle,
+        'finalScore': analyzer.score(),
+        'meanOverlap': overlapSum / analyzer.cycle if analyzer.cycle > 0 else None,
+    }
+
+
+def _analyzeJob(job):
+    # one file which is not a SDR activity file does not stop the whole scan
+    try:
+        return analyzeFile(*job)
+    except (IOError, ValueError) as e:
+        sys.stderr.write("%s: failed: %s\n" % (job[0], e))
+        return {'file': job[0], 'cycles': None, 'stableCycle': None,
+                'finalScore': None, 'meanOverlap': None}
+
+
+def _format(value):
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return '%.4f' % value
+    return str(value)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stability of SDRs over cycles')
+    parser.add_argument('paths', nargs='+', help='SDR activity files or folders')
+    parser.add_argument('--glob', '-g', default='**/*_plotly-input.csv',
+                        help='Pattern of the files searched in folders')
+    parser.add_argument('--window', '-w', type=int, default=10, help='Cycles of the rolling score')
+    parser.add_argument('--stablecycles', '-k', type=int, default=10,
+                        help='Cycles the SDR has to stay stable')
+    parser.add_argument('--minoverlap', '-mo', type=float, default=1.0,
+                        help='Overlap with the previous cycle that counts as stable')
+    parser.add_argument('--cycles', '-cy', help='Per cycle CSV (single file only)')
+    parser.add_argument('--workers', '-wk', type=int, help='Number of parallel processes')
+    parser.add_argument('--out', '-o', help='Summary CSV, default is stdout')
+    args = parser.parse_args()
+
+    fileNames = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            fileNames.extend(sorted(glob.glob(os.path.join(path, args.glob), recursive=True)))
+        else:
+            fileNames.append(path)
+    if args.cycles is not None and len(fileNames) != 1:
+        parser.error('--cycles requires exactly one input file')
+
+    jobs = [(fileName, args.window, args.stablecycles, args.minoverlap, args.cycles)
+            for fileName in fileNames]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(_analyzeJob, jobs))
+
+    columns = ['file', 'cycles', 'stableCycle', 'finalScore', 'meanOverlap']
+    lines = [','.join(columns)]
+    for result in results:
+        lines.append(','.join('"%s"' % result[c] if c == 'file' else _format(result[c])
+                              for c in columns))
+    if args.out is not None:
+        with open(args.out, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+    else:
+        print('\n'.join(lines))
@@ -0,0 +1,80 @@
+########################################################################################
+# Out-of-core histograms of large text files with numbers.
+# Files are read in blocks of complete numbers (see valueio.py), so memory does not
+# depend on the file size.
+# Pass 1 finds the global min/max of all files (skipped if a range is given), pass 2
+# counts every file with the same bin edges. Files are processed concurrently and the
+# per-file counts are merged at the end.
+# Example:
+#   import streamhist
+#   edges, counts = streamhist.histograms(['data1.txt', 'data2.txt'], 28)
+########################################################################################
+
+import concurrent.futures
+import numpy as np
+
+import valueio
+
+
+def valueRange(fileName, blockSize=1 << 22):
+    """
+    @return (tuple) min and max of all numbers of the file, (inf, -inf) if empty
+    """
+    lo = np.inf
+    hi = -np.inf
+    for values in valueio.iterValues(fileName, blockSize):
+        lo = min(lo, values.min())
+        hi = max(hi, values.max())
+    return lo, hi
+
+
+def histogram(fileName, edges, blockSize=1 << 22):
+    """
+    Counts the numbers of the file in the bins of edges (np.histogram rules,
+    values outside of the edges are not counted).
+
+    @return (array) int64 counts, one per bin
+    """
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for values in valueio.iterValues(fileName, blockSize):
+        counts += np.histogram(values, edges)[0]
+    return counts
+
+
+def _mapFiles(func, fileNames, args, workers):
+    if workers == 1 or len(fileNames) <= 1:
+        return [func(fileName, *args) for fileName in fileNames]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(func, fileName, *args) for fileName in fileNames]
+        return [future.result() for future in futures]
+
+
+def histograms(fileNames, numEdges, valuesRange=None, workers=None, blockSize=1 << 22):
+    """
+    Histograms of several files with common bin edges.
+
+    @param numEdges    (int)   number of bin edges, like np.linspace(min, max, numEdges)
+    @param valuesRange (tuple) (min, max) of the edges, default is the range of all files
+    @param workers     (int)   number of parallel processes, 1 reads in this process
+
+    @return (tuple) edges and an array of counts with one row per file
+    """
+    if valuesRange is None:
+        ranges = _mapFiles(valueRange, fileNames, (blockSize,), workers)
+        valuesRange = (min(r[0] for r in ranges), max(r[1] for r in ranges))
+        if not np.isfinite(valuesRange[0]):
+            valuesRange = (0.0, 1.0)
+        elif valuesRange[0] == valuesRange[1]:
+            # same as np.histogram for a single value
+            valuesRange = (valuesRange[0] - 0.5, valuesRange[1] + 0.5)
+
+    edges = np.linspace(valuesRange[0], valuesRange[1], numEdges)
+    counts = _mapFiles(histogram, fileNames, (edges, blockSize), workers)
+    return edges, np.array(counts).reshape(len(fileNames), len(edges) - 1)
+
+
+def mergeHistograms(counts):
+    """
+    Merges per-file (or per-machine) counts of the same edges.
+    """
+    return np.sum(counts, axis=0)
@@ -0,0 +1,416 @@
+########################################################################################
+# Temporal Memory in NumPy, same algorithm as TemporalMemory.cs of NeoCortexApi.
+# Segments and synapses are flat arrays instead of objects:
+#   segmentCell[s]                      cell that owns segment s
+#   synapseSegment[i], synapseCell[i]   segment and presynaptic cell of synapse i
+#   synapsePermanence[i]                float32 permanence
+# Active and matching segments (Connections.ComputeActivity) are one bincount over
+# the synapses whose presynaptic cells are active. Adapting, punishing and growing
+# work on all learning segments of a cycle at once.
+# Like the C# code bursting columns pick a random least used cell and grow random
+# synapses, so runs are reproducible per seed but not identical to a C# run.
+# The replay mode feeds an activity file with the active columns of every cycle
+# (e.g. ActiveColumns_*_plotly-input.csv) into the TM and writes the active,
+# winner and predictive cells per cycle in the format draw_figure.py reads.
+# Examples:
+# python temporalmemory.py columns.csv -n 2048 -cpc 32 -rep 10 -a activeCells.csv -p predictiveCells.csv
+# python ColumnActivityDiagram/draw_figure.py -fn predictiveCells.csv -gn predictive ...
+########################################################################################
+
+import argparse
+import time
+import numpy as np
+
+import sdrio
+
+# HtmConfig.EPSILON
+Epsilon = 0.00001
+
+
+def _groupStarts(keys):
+    # first index of every run of equal sorted keys
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+class TemporalMemory(object):
+    """
+    Parameters have the names and defaults of HtmConfig.
+
+    @param numColumns     (int) number of columns
+    @param cellsPerColumn (int) cells of every column, cell c belongs to column c // cellsPerColumn
+    @param seed           (int) seed of the random cell and synapse selection
+    """
+
+    def __init__(self, numColumns, cellsPerColumn=32, activationThreshold=10, minThreshold=9,
+                 maxNewSynapseCount=20, maxSynapsesPerSegment=225, maxSegmentsPerCell=225,
+                 initialPermanence=0.21, connectedPermanence=0.5, permanenceIncrement=0.10,
+                 permanenceDecrement=0.10, predictedSegmentDecrement=0.1, seed=42):
+        self.numColumns = numColumns
+        self.cellsPerColumn = cellsPerColumn
+        self.numCells = numColumns * cellsPerColumn
+        self.activationThreshold = activationThreshold
+        self.minThreshold = minThreshold
+        self.maxNewSynapseCount = maxNewSynapseCount
+        self.maxSynapsesPerSegment = maxSynapsesPerSegment
+        self.maxSegmentsPerCell = maxSegmentsPerCell
+        self.initialPermanence = initialPermanence
+        self.connectedPermanence = connectedPermanence
+        self.permanenceIncrement = permanenceIncrement
+        self.permanenceDecrement = permanenceDecrement
+        self.predictedSegmentDecrement = predictedSegmentDecrement
+        self.random = np.random.default_rng(seed)
+
+        # segments, ids of destroyed segments are reused like m_FreeFlatIdxs
+        self.segmentCell = np.zeros(0, dtype=np.int32)
+        self.segmentOrdinal = np.zeros(0, dtype=np.int64)
+        self.segmentLastUsed = np.zeros(0, dtype=np.int64)
+        self.segmentAlive = np.zeros(0, dtype=bool)
+        self.freeSegments = []
+        self.nextSegmentOrdinal = 0
+
+        # synapses, destroyed synapses are removed by compacting the arrays
+        self.synapseSegment = np.zeros(0, dtype=np.int32)
+        self.synapseCell = np.zeros(0, dtype=np.int32)
+        self.synapsePermanence = np.zeros(0, dtype=np.float32)
+        self.synapseAlive = np.zeros(0, dtype=bool)
+
+        self.iteration = 0
+        self.reset()
+
+    @property
+    def numSegments(self):
+        return int(np.count_nonzero(self.segmentAlive))
+
+    @property
+    def numSynapses(self):
+        return int(np.count_nonzero(self.synapseAlive))
+
+    def reset(self):
+        """
+        Clears the activity, e.g. between two sequences.
+        """
+        self.activeCells = np.empty(0, dtype=np.int64)
+        self.winnerCells = np.empty(0, dtype=np.int64)
+        self.activeSegments = np.empty(0, dtype=np.int64)
+        self.matchingSegments = np.empty(0, dtype=np.int64)
+        self.numActivePotential = np.zeros(len(self.segmentCell), dtype=np.int64)
+
+    def predictiveCells(self):
+        return np.unique(self.segmentCell[self.activeSegments]).astype(np.int64)
+
+    def computeActivity(self, activeCells):
+        """
+        Connections.ComputeActivity: number of connected and of all synapses of every
+        segment to the active cells.
+
+        @return (tuple) int64 arrays indexed by segment
+        """
+        isActive = np.zeros(self.numCells, dtype=bool)
+        isActive[activeCells] = True
+        onActive = self.synapseAlive & isActive[self.synapseCell]
+        segments = self.synapseSegment[onActive]
+        connected = self.synapsePermanence[onActive] > self.connectedPermanence - Epsilon
+        numSegments = len(self.segmentCell)
+        return (np.bincount(segments[connected], minlength=numSegments),
+                np.bincount(segments, minlength=numSegments))
+
+    def _sortSegments(self, segments):
+        # DentriteComparer: by cell, then by ordinal
+        return segments[np.lexsort((self.segmentOrdinal[segments], self.segmentCell[segments]))]
+
+    def compute(self, activeColumns, learn=True):
+        """
+        One cycle of the TM.
+
+        @param activeColumns (array) indices of the active columns
+        @param learn         (bool)  adapt and grow segments
+
+        @return (tuple) sorted active, winner and predictive cells
+        """
+        columns = np.unique(np.asarray(activeColumns, dtype=np.int64))
+        prevActiveCells = self.activeCells
+        prevWinnerCells = self.winnerCells
+        cpc = self.cellsPerColumn
+
+        isActiveColumn = np.zeros(self.numColumns, dtype=bool)
+        isActiveColumn[columns] = True
+        activeSegColumns = self.segmentCell[self.activeSegments] // cpc
+        matchingSegColumns = self.segmentCell[self.matchingSegments] // cpc
+
+        # ActivatePredictedColumn: cells with active segments become active and winners
+        predictedSegments = self.activeSegments[isActiveColumn[activeSegColumns]]
+        predictedCells = np.unique(self.segmentCell[predictedSegments]).astype(np.int64)
+        isPredicted = np.zeros(self.numColumns, dtype=bool)
+        isPredicted[predictedCells // cpc] = True
+
+        # BurstColumn: all cells active, the winner is the cell of the best matching
+        # segment or a least used cell
+        bursting = columns[~isPredicted[columns]]
+        burstingCells = (bursting[:, None] * cpc + np.arange(cpc)).ravel()
+        isBursting = np.zeros(self.numColumns, dtype=bool)
+        isBursting[bursting] = True
+        burstMatching = self.matchingSegments[isBursting[matchingSegColumns]]
+        bestSegments = self._bestMatchingSegments(burstMatching)
+        hasMatching = np.zeros(self.numColumns, dtype=bool)
+        hasMatching[self.segmentCell[bestSegments] // cpc] = True
+        unmatched = bursting[~hasMatching[bursting]]
+        newSegmentCells = self._leastUsedCells(unmatched)
+
+        activeCells = np.sort(np.concatenate([predictedCells, burstingCells]))
+        winnerCells = np.sort(np.concatenate([predictedCells, self.segmentCell[bestSegments],
+                                              newSegmentCells])).astype(np.int64)
+
+        if learn:
+            learning = np.concatenate([predictedSegments, bestSegments])
+            self._adaptSegments(learning, prevActiveCells, self.permanenceIncrement,
+                                self.permanenceDecrement)
+            punished = self.matchingSegments[~isActiveColumn[matchingSegColumns]]
+            if self.predictedSegmentDecrement > 0 and len(punished) > 0:
+                self._adaptSegments(punished, prevActiveCells, -self.predictedSegmentDecrement, 0.0)
+
+            learning = learning[self.segmentAlive[learning]]
+            self._growSynapses(learning, prevWinnerCells,
+                               self.maxNewSynapseCount - self.numActivePotential[learning])
+            numGrow = min(self.maxNewSynapseCount, len(prevWinnerCells))
+            if numGrow > 0 and len(newSegmentCells) > 0:
+                newSegments = self._createSegments(newSegmentCells)
+                self._growSynapses(newSegments, prevWinnerCells, np.full(len(newSegments), numGrow))
+
+        self._activateDendrites(activeCells, winnerCells, learn)
+        return self.activeCells, self.winnerCells, self.predictiveCells()
+
+    def _activateDendrites(self, activeCells, winnerCells, learn):
+        numConnected, numPotential = self.computeActivity(activeCells)
+        alive = self.segmentAlive
+        self.activeSegments = self._sortSegments(np.flatnonzero(alive & (numConnected >= self.activationThreshold)))
+        self.matchingSegments = self._sortSegments(np.flatnonzero(alive & (numPotential >= self.minThreshold)))
+        self.numActivePotential = numPotential
+        self.activeCells = activeCells
+        self.winnerCells = winnerCells
+        if learn:
+            self.segmentLastUsed[self.activeSegments] = self.iteration
+            self.iteration += 1
+
+    def _bestMatchingSegments(self, matching):
+        """
+        GetSegmentWithHighestPotential for every column: like the C# loop, the last
+        segment with more potential synapses than its predecessor, else the first.
+        """
+        if len(matching) == 0:
+            return matching
+        columns = self.segmentCell[matching] // self.cellsPerColumn
+        starts = _groupStarts(columns)
+        potential = self.numActivePotential[matching]
+        positions = np.arange(len(matching))
+        rises = np.r_[False, (potential[1:] > potential[:-1]) & (columns[1:] == columns[:-1])]
+        return matching[np.maximum.reduceat(np.where(rises, positions, 0), starts)
+                        .clip(min=starts)]
+
+    def _leastUsedCells(self, columns):
+        # GetLeastUsedCell: random cell among the cells with the fewest segments
+        if len(columns) == 0:
+            return np.empty(0, dtype=np.int64)
+        counts = np.bincount(self.segmentCell[self.segmentAlive], minlength=self.numCells)
+        cells = columns[:, None] * self.cellsPerColumn + np.arange(self.cellsPerColumn)
+        counts = counts[cells]
+        keys = self.random.random(cells.shape)
+        keys[counts != counts.min(axis=1, keepdims=True)] = -1
+        return cells[np.arange(len(columns)), keys.argmax(axis=1)]
+
+    def _adaptSegments(self, segments, prevActiveCells, increment, decrement):
+        """
+        AdaptSegment of several segments: synapses to previously active cells are
+        incremented, all others decremented. Synapses below Epsilon and segments
+        without synapses are destroyed.
+        """
+        if len(segments) == 0:
+            return
+        isSegment = np.zeros(len(self.segmentCell), dtype=bool)
+        isSegment[segments] = True
+        wasActive = np.zeros(self.numCells, dtype=bool)
+        wasActive[prevActiveCells] = True
+
+        synapses = np.flatnonzero(self.synapseAlive & isSegment[self.synapseSegment])
+        changes = np.where(wasActive[self.synapseCell[synapses]], increment, -decrement)
+        permanences = np.clip(self.synapsePermanence[synapses] + changes, 0.0, 1.0)
+        self.synapsePermanence[synapses] = permanences
+        self._destroySynapses(synapses[permanences < Epsilon])
+
+        remaining = np.bincount(self.synapseSegment[self.synapseAlive], minlength=len(self.segmentCell))
+        self._destroySegments(segments[remaining[segments] == 0])
+
+    def _destroySynapses(self, synapses):
+        self.synapseAlive[synapses] = False
+        if len(self.synapseAlive) > 1024 and self.numSynapses < len(self.synapseAlive) // 2:
+            alive = self.synapseAlive
+            self.synapseSegment = self.synapseSegment[alive]
+            self.synapseCell = self.synapseCell[alive]
+            self.synapsePermanence = self.synapsePermanence[alive]
+            self.synapseAlive = self.synapseAlive[alive]
+
+    def _destroySegments(self, segments):
+        segments = np.unique(segments)
+        segments = segments[self.segmentAlive[segments]]
+        if len(segments) == 0:
+            return
+        isDestroyed = np.zeros(len(self.segmentCell), dtype=bool)
+        isDestroyed[segments] = True
+        self.segmentAlive[segments] = False
+        self.freeSegments.extend(segments.tolist())
+        self._destroySynapses(np.flatnonzero(self.synapseAlive & isDestroyed[self.synapseSegment]))
+        self.activeSegments = self.activeSegments[~isDestroyed[self.activeSegments]]
+        self.matchingSegments = self.matchingSegments[~isDestroyed[self.matchingSegments]]
+
+    def _createSegments(self, cells):
+        """
+        CreateDistalSegment for every cell, the least recently used segments of
+        full cells are destroyed first.
+        """
+        counts = np.bincount(self.segmentCell[self.segmentAlive], minlength=self.numCells)[cells]
+        for cell in cells[counts >= self.maxSegmentsPerCell]:
+            owned = np.flatnonzero(self.segmentAlive & (self.segmentCell == cell))
+            excess = len(owned) - self.maxSegmentsPerCell + 1
+            self._destroySegments(owned[np.argsort(self.segmentLastUsed[owned], kind='stable')[:excess]])
+
+        numReused = min(len(self.freeSegments), len(cells))
+        reused = [self.freeSegments.pop() for _ in range(numReused)]
+        first = len(self.segmentCell)
+        numNew = len(cells) - numReused
+        if numNew > 0:
+            self.segmentCell = np.concatenate([self.segmentCell, np.zeros(numNew, dtype=np.int32)])
+            self.segmentOrdinal = np.concatenate([self.segmentOrdinal, np.zeros(numNew, dtype=np.int64)])
+            self.segmentLastUsed = np.concatenate([self.segmentLastUsed, np.zeros(numNew, dtype=np.int64)])
+            self.segmentAlive = np.concatenate([self.segmentAlive, np.zeros(numNew, dtype=bool)])
+            self.numActivePotential = np.concatenate([self.numActivePotential, np.zeros(numNew, dtype=np.int64)])
+
+        segments = np.array(reused + list(range(first, first + numNew)), dtype=np.int64)
+        self.segmentCell[segments] = cells
+        self.segmentOrdinal[segments] = self.nextSegmentOrdinal + np.arange(len(segments))
+        self.segmentLastUsed[segments] = self.iteration
+        self.segmentAlive[segments] = True
+        self.numActivePotential[segments] = 0
+        self.nextSegmentOrdinal += len(segments)
+        return segments
+
+    def _growSynapses(self, segments, prevWinnerCells, desired):
+        """
+        GrowSynapses for several segments: up to desired[i] synapses from random previous
+        winner cells that are not yet presynaptic to segments[i].
+        """
+        keep = desired > 0
+        segments = segments[keep]
+        # never more new synapses than a segment can hold, _makeRoom frees the rest
+        desired = np.minimum(desired[keep], self.maxSynapsesPerSegment)
+        if len(segments) == 0 or len(prevWinnerCells) == 0:
+            return
+
+        numWinners = len(prevWinnerCells)
+        candidates = np.repeat(segments, numWinners) * self.numCells + np.tile(prevWinnerCells, len(segments))
+        isSegment = np.zeros(len(self.segmentCell), dtype=bool)
+        isSegment[segments] = True
+        existing = np.flatnonzero(self.synapseAlive & isSegment[self.synapseSegment])
+        existingKeys = self.synapseSegment[existing].astype(np.int64) * self.numCells + self.synapseCell[existing]
+        candidates = candidates[~np.isin(candidates, existingKeys)]
+
+        # random candidates first, the first 'desired' of every segment are grown
+        owners = candidates // self.numCells
+        order = np.lexsort((self.random.random(len(candidates)), owners))
+        candidates = candidates[order]
+        owners = owners[order]
+        starts = _groupStarts(owners)
+        rank = np.arange(len(candidates)) - np.repeat(starts, np.diff(np.r_[starts, len(candidates)]))
+        numDesired = np.zeros(len(self.segmentCell), dtype=np.int64)
+        numDesired[segments] = desired
+        grown = candidates[rank < numDesired[owners]]
+        newSegments = grown // self.numCells
+
+        self._makeRoom(newSegments, existing)
+        self.synapseSegment = np.concatenate([self.synapseSegment, newSegments.astype(np.int32)])
+        self.synapseCell = np.concatenate([self.synapseCell, (grown % self.numCells).astype(np.int32)])
+        self.synapsePermanence = np.concatenate([self.synapsePermanence,
+                                                 np.full(len(grown), self.initialPermanence, dtype=np.float32)])
+        self.synapseAlive = np.concatenate([self.synapseAlive, np.ones(len(grown), dtype=bool)])
+
+    def _makeRoom(self, newSegments, existing):
+        # CreateSynapse destroys the weakest synapses of full segments
+        existing = existing[self.synapseAlive[existing]]
+        numSegments = len(self.segmentCell)
+        total = (np.bincount(self.synapseSegment[existing], minlength=numSegments) +
+                 np.bincount(newSegments, minlength=numSegments))
+        for segment in np.flatnonzero(total > self.maxSynapsesPerSegment):
+            own = existing[self.synapseSegment[existing] == segment]
+            excess = total[segment] - self.maxSynapsesPerSegment
+            self._destroySynapsesOf(own[np.argsort(self.synapsePermanence[own], kind='stable')[:excess]])
+
+    def _destroySynapsesOf(self, synapses):
+        # without compacting, the caller still holds synapse indices
+        self.synapseAlive[synapses] = False
+
+
+def replayFile(fileName, tm, repeat=1, resetEvery=None, learn=True, activeFile=None,
+               winnerFile=None, predictiveFile=None):
+    """
+    Feeds the active columns of every cycle of an activity file into the TM.
+
+    @param repeat     (int) number of passes over the file
+    @param resetEvery (int) reset the TM after this many cycles (sequence length), None: never
+
+    @return (list) per pass the fraction of active columns that were predicted
+    """
+    outputs = [open(name, 'w') if name is not None else None
+               for name in (activeFile, winnerFile, predictiveFile)]
+    try:
+        accuracies = []
+        for _ in range(repeat):
+            tm.reset()
+            numPredicted = 0
+            numActive = 0
+            cycle = 0
+            for columns in sdrio.iterSdrRows(fileName):
+                if resetEvery is not None and cycle > 0 and cycle % resetEvery == 0:
+                    tm.reset()
+                predicted = np.unique(tm.predictiveCells() // tm.cellsPerColumn)
+                columns = np.unique(columns)
+                numPredicted += np.count_nonzero(np.isin(columns, predicted))
+                numActive += len(columns)
+
+                cells = tm.compute(columns, learn)
+                for output, cellsOfCycle in zip(outputs, cells):
+                    if output is not None:
+                        output.write(sdrio.formatSdrRow(cellsOfCycle))
+                cycle += 1
+            accuracies.append(float(numPredicted) / numActive if numActive > 0 else 0.0)
+        return accuracies
+    finally:
+        for output in outputs:
+            if output is not None:
+                output.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replays active columns through a Temporal Memory')
+    parser.add_argument('filename', help='Activity file with the active columns of every cycle')
+    parser.add_argument('--numcolumns', '-n', type=int, required=True)
+    parser.add_argument('--cellspercolumn', '-cpc', type=int, default=32)
+    parser.add_argument('--activationthreshold', '-at', type=int, default=10)
+    parser.add_argument('--minthreshold', '-mt', type=int, default=9)
+    parser.add_argument('--maxnewsynapses', '-mns', type=int, default=20)
+    parser.add_argument('--repeat', '-rep', type=int, default=1, help='Passes over the file')
+    parser.add_argument('--resetevery', '-r', type=int, help='Reset after this many cycles')
+    parser.add_argument('--nolearn', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--activecells', '-a', help='Output file with the active cells')
+    parser.add_argument('--winnercells', '-w', help='Output file with the winner cells')
+    parser.add_argument('--predictivecells', '-p', help='Output file with the predictive cells')
+    args = parser.parse_args()
+
+    tm = TemporalMemory(args.numcolumns, args.cellspercolumn, activationThreshold=args.activationthreshold,
+                        minThreshold=args.minthreshold, maxNewSynapseCount=args.maxnewsynapses, seed=args.seed)
+    start = time.time()
+    accuracies = replayFile(args.filename, tm, args.repeat, args.resetevery, not args.nolearn,
+                            args.activecells, args.winnercells, args.predictivecells)
+    for i, accuracy in enumerate(accuracies):
+        print("pass %d: %.1f%% of the active columns predicted" % (i, 100 * accuracy))
+    print("%d segments, %d synapses, %.2f s" % (tm.numSegments, tm.numSynapses, time.time() - start))
@@ -0,0 +1,98 @@
+########################################################################################
+# Tests of boostreplay.py against the cycle by cycle loop of SpatialPooler.cs, run with:
+# python -m unittest test_boostreplay
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import boostreplay
+import sdrio
+
+
+def naiveDutyCycles(rows, numColumns, period, cellsPerColumn=1):
+    dutyCycles = np.zeros(numColumns)
+    for t, row in enumerate(rows):
+        active = np.zeros(numColumns)
+        active[np.asarray(row, dtype=np.int64) // cellsPerColumn] = 1
+        p = min(period, t + 1)
+        dutyCycles = ((p - 1) * dutyCycles + active) / p
+    return dutyCycles
+
+
+def replayRows(replay, rows, blockSizes):
+    # applies the rows in blocks of the given sizes, the last size repeats
+    start = 0
+    for i in range(len(rows)):
+        if start >= len(rows):
+            break
+        size = blockSizes[min(i, len(blockSizes) - 1)]
+        trace = sdrio.rowsToTrace(rows[start:start + size])
+        replay.update(trace.indices, trace.offsets)
+        start += size
+
+
+class BoostreplayTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.rows = [rng.choice(40, size=rng.integers(0, 6), replace=False) for _ in range(300)]
+
+    def testBlocksEqualLoop(self):
+        expected = naiveDutyCycles(self.rows, 40, 50)
+        for blockSizes in [[1], [7], [300], [49, 1, 3, 100]]:
+            replay = boostreplay.DutyCycleReplay(40, period=50)
+            replayRows(replay, self.rows, blockSizes)
+            self.assertEqual(replay.cycle, 300)
+            np.testing.assert_allclose(replay.activeDutyCycles, expected, rtol=1e-10, atol=1e-15)
+
+    def testShortTrace(self):
+        # all cycles inside of the first period: plain mean
+        replay = boostreplay.DutyCycleReplay(40, period=1000)
+        replayRows(replay, self.rows[:20], [6])
+        np.testing.assert_allclose(replay.activeDutyCycles, naiveDutyCycles(self.rows[:20], 40, 1000))
+
+    def testCellsPerColumn(self):
+        # cells 0..3 belong to column 0, a column with two active cells counts once
+        rows = [np.array([0, 1, 9]), np.array([4]), np.array([2, 3, 5, 6])]
+        replay = boostreplay.DutyCycleReplay(0, period=10, cellsPerColumn=4)
+        replayRows(replay, rows, [2])
+        np.testing.assert_allclose(replay.activeDutyCycles, naiveDutyCycles(rows, 3, 10, 4))
+
+    def testGrowsColumns(self):
+        replay = boostreplay.DutyCycleReplay(2, period=10)
+        replayRows(replay, [np.array([0]), np.array([5])], [1])
+        self.assertEqual(len(replay.activeDutyCycles), 6)
+        np.testing.assert_allclose(replay.activeDutyCycles, [0.5, 0, 0, 0, 0, 0.5])
+
+    def testBoostAndClassify(self):
+        replay = boostreplay.DutyCycleReplay(4, period=10)
+        replay.activeDutyCycles = np.array([0.0, 0.05, 0.1, 0.9])
+        self.assertAlmostEqual(replay.minDutyCycle(0.1), 0.09)
+        boosts = replay.boostFactors(maxBoost=10.0, minPctActiveDutyCycles=0.1)
+        np.testing.assert_allclose(boosts, [10.0, 10.0 - 9.0 * 0.05 / 0.09, 1.0, 1.0])
+        self.assertEqual(replay.classify(0.1, dominance=3.0).tolist(), [1, 1, 0, 2])
+
+    def testReplayFile(self):
+        folder = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(folder, 'activity.csv')
+            with open(fileName, 'w') as file:
+                file.writelines(''.join('%d, ' % cell for cell in row) + '\n' for row in self.rows)
+            reportFile = os.path.join(folder, 'report.csv')
+            replay = boostreplay.replayFile(fileName, boostreplay.DutyCycleReplay(40, period=50),
+                                            every=100, reportFile=reportFile)
+            np.testing.assert_allclose(replay.activeDutyCycles, naiveDutyCycles(self.rows, 40, 50),
+                                       rtol=1e-10, atol=1e-15)
+            with open(reportFile) as file:
+                cycles = [line.split(',')[0] for line in file.readlines()[1:]]
+            self.assertEqual(cycles[:3], ['100', '200', '300'])
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+########################################################################################
+# Tests of boostsim.py against the cycle by cycle formulas of SpatialPooler.cs, run with:
+# python -m unittest test_boostsim
+########################################################################################
+
+import unittest
+import numpy as np
+
+import boostsim
+
+
+def naiveDutyCycles(inputs, period, initial=0.0):
+    # CalcEventFrequency once per cycle
+    res = []
+    dutyCycle = initial
+    for value in inputs:
+        dutyCycle = ((period - 1) * dutyCycle + value) / period
+        res.append(dutyCycle)
+    return res
+
+
+class BoostsimTest(unittest.TestCase):
+
+    def tearDown(self):
+        boostsim.clearCache()
+
+    def testClosedForm(self):
+        curves = boostsim.dutyCycles([5.0, 100.0], [[50.0], [200.0]], 30, initial=1.0)
+        self.assertEqual(curves.shape, (2, 2, 30))
+        for i, period in enumerate([50.0, 200.0]):
+            for j, value in enumerate([5.0, 100.0]):
+                np.testing.assert_allclose(curves[i, j], [1.0] + naiveDutyCycles([value] * 29, period, 1.0))
+
+    def testFilter(self):
+        inputs = np.random.default_rng(1).integers(0, 2, size=(3, 100)).astype(np.float64)
+        expected = [naiveDutyCycles(row, 25.0, 0.5) for row in inputs]
+        np.testing.assert_allclose(boostsim.filterDutyCycles(inputs, 25.0, 0.5), expected)
+
+        # the loop used without scipy
+        lfilter = boostsim.lfilter
+        boostsim.lfilter = None
+        try:
+            np.testing.assert_allclose(boostsim.filterDutyCycles(inputs, 25.0, 0.5), expected)
+        finally:
+            boostsim.lfilter = lfilter
+
+    def testBoostFactors(self):
+        np.testing.assert_allclose(boostsim.boostFactors([0.0, 0.005, 0.01, 0.5], 0.01, 10.0),
+                                   [10.0, 5.5, 1.0, 1.0])
+        # a minimal duty cycle of 0 gives no boost
+        np.testing.assert_allclose(boostsim.boostFactors([0.0, 0.3], 0.0, 10.0), [1.0, 1.0])
+        np.testing.assert_allclose(boostsim.minDutyCycles(0.1, [0.5, 2.0]), [0.05, 0.2])
+
+    def testGrids(self):
+        cycles, curves = boostsim.dutyCycleGrid([5, 100], [50, 125, 200], 40)
+        self.assertEqual(cycles.tolist(), list(range(40)))
+        self.assertEqual(curves.shape, (2, 3, 40))
+        np.testing.assert_allclose(curves[1, 2, 1:], naiveDutyCycles([100.0] * 39, 200.0))
+
+        # cached curves are returned again and can not be changed
+        key = (100.0, 200.0, 40, 0.0)
+        cached = boostsim._dutyCycleCache[key]
+        self.assertFalse(cached.flags.writeable)
+        _, again = boostsim.dutyCycleGrid([100], [200], 40)
+        np.testing.assert_array_equal(again[0, 0], cached)
+
+        axis = np.linspace(0, 0.02, 5)
+        boosts = boostsim.boostGrid([10.0, 5.0], [0.01], axis)
+        self.assertEqual(boosts.shape, (2, 1, 5))
+        np.testing.assert_allclose(boosts[1, 0], boostsim.boostFactors(axis, 0.01, 5.0))
+
+        boostsim.clearCache()
+        self.assertEqual((len(boostsim._dutyCycleCache), len(boostsim._boostCache)), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+########################################################################################
+# Tests of figexport.py, images are only written where kaleido finds a Chrome, run with:
+# python -m unittest test_figexport
+########################################################################################
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import figexport
+
+Figure = {'data': [{'type': 'scatter', 'x': [0, 1], 'y': [1, 0]}], 'layout': {}}
+
+
+class FigexportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.basename = os.path.join(self.folder, 'figure')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testUnknownFormat(self):
+        with self.assertRaises(ValueError):
+            figexport.writeImages(Figure, self.basename, ['gif'])
+        self.assertEqual(os.listdir(self.folder), [])
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'the display check is for Linux')
+    def testHasDisplay(self):
+        with mock.patch.dict(os.environ, {'DISPLAY': ':0'}):
+            self.assertTrue(figexport.hasDisplay())
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(figexport.hasDisplay())
+
+    @unittest.skipUnless(figexport.isAvailable(), 'kaleido or Chrome is not installed')
+    def testWriteImages(self):
+        fileNames = figexport.writeImages(Figure, self.basename, ['svg', 'png'], scale=1)
+        self.assertEqual(fileNames, [self.basename + '.svg', self.basename + '.png'])
+        for fileName in fileNames:
+            self.assertGreater(os.path.getsize(fileName), 0)
+
+    def testMissingRenderer(self):
+        with mock.patch.object(figexport, '_hasBrowser', return_value=False), \
+                mock.patch.object(figexport, '_rendererStarted', False):
+            self.assertEqual(figexport.writeImages(Figure, self.basename, ['png'], required=False), [])
+            with self.assertRaises(RuntimeError):
+                figexport.writeImages(Figure, self.basename, ['png'])
+        self.assertEqual(os.listdir(self.folder), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+########################################################################################
+# Tests of inhibition.py against the hard coded results of bouble-densities.py and the
+# column by column loop of InhibitColumnsLocalOriginal, run with:
+# python -m unittest test_inhibition
+########################################################################################
+
+import unittest
+import numpy as np
+
+import inhibition
+import neighborhood
+
+Densities = [0.1, 0.2, 0.3, 0.4, 0.5]
+
+# TEST 1 and TEST 2 of bouble-densities.py, radius 3 without wrap around
+Overlaps1 = [1, 2, 7, 0.1, 3, 4, 16, 1, 1.5, 1.7]
+Results1 = [[2, 6], [2, 6], [2, 6], [2, 5, 6, 9], [1, 2, 4, 5, 6, 9]]
+Overlaps2 = [1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+Results2 = [[1, 5], [0, 4, 8], [0, 1, 4, 5, 8], [0, 1, 3, 4, 5, 8, 9], [0, 1, 2, 3, 4, 5, 6, 8]]
+
+
+def naiveWinners(overlaps, dimensions, radius, density, stimulusThreshold=0.0, wrap=True):
+    # the C# loop: every winner gets winnerDelta before the next column is processed
+    overlaps = np.array(overlaps, dtype=np.float64)
+    winnerDelta = overlaps.max() / 1000.0 or 0.001
+    winners = []
+    for column in range(len(overlaps)):
+        if overlaps[column] < stimulusThreshold:
+            continue
+        neighbors = neighborhood.neighborhood(column, dimensions, radius, wrap)
+        numActive = int(0.5 + density * len(neighbors))
+        if np.count_nonzero(overlaps[neighbors] > overlaps[column]) < numActive:
+            winners.append(column)
+            overlaps[column] += winnerDelta
+    return winners
+
+
+class InhibitionTest(unittest.TestCase):
+
+    def testHardCodedResults(self):
+        for overlaps, results in [(Overlaps1, Results1), (Overlaps2, Results2)]:
+            for density, expected in zip(Densities, results):
+                self.assertEqual(inhibition.activeColumns(overlaps, [10], 3, density, wrap=False).tolist(),
+                                 expected, (overlaps, density))
+                self.assertEqual(naiveWinners(overlaps, [10], 3, density, wrap=False), expected)
+
+    def testBatch(self):
+        batch = np.array([Overlaps1, Overlaps2])
+        winners = inhibition.inhibitColumnsLocal(batch, [10], 3, 0.4, wrap=False)
+        self.assertEqual(winners.shape, (2, 10))
+        self.assertEqual([np.flatnonzero(row).tolist() for row in winners], [Results1[3], Results2[3]])
+
+    def testRandomAgainstLoop(self):
+        # small integer overlaps give many ties, where the earlier winners decide
+        rng = np.random.default_rng(11)
+        for _ in range(60):
+            dimensions = [int(d) for d in rng.integers(3, 12, size=rng.integers(1, 3))]
+            radius = int(rng.integers(1, 4))
+            density = float(rng.choice(Densities))
+            wrap = bool(rng.integers(2))
+            overlaps = rng.integers(0, 4, size=(3, int(np.prod(dimensions)))).astype(np.float64)
+            winners = inhibition.inhibitColumnsLocal(overlaps, dimensions, radius, density, 1.0, wrap)
+            for row, mask in zip(overlaps, winners):
+                self.assertEqual(np.flatnonzero(mask).tolist(),
+                                 naiveWinners(row, dimensions, radius, density, 1.0, wrap),
+                                 (dimensions, radius, density, wrap, row.tolist()))
+
+    def testChunks(self):
+        rng = np.random.default_rng(2)
+        overlaps = rng.integers(0, 3, size=(4, 256)).astype(np.float64)
+        whole = inhibition.inhibitColumnsLocal(overlaps, [16, 16], 2, 0.2)
+        chunkPairs = inhibition._chunkPairs
+        inhibition._chunkPairs = 64
+        try:
+            chunked = inhibition.inhibitColumnsLocal(overlaps, [16, 16], 2, 0.2)
+        finally:
+            inhibition._chunkPairs = chunkPairs
+        np.testing.assert_array_equal(chunked, whole)
+
+    def testInhibitionDensity(self):
+        self.assertAlmostEqual(inhibition.inhibitionDensity(10, 3, [64, 64]), 10.0 / 49)
+        self.assertEqual(inhibition.inhibitionDensity(10, 1, [64]), 0.5)
+        self.assertAlmostEqual(inhibition.inhibitionDensity(2, 10, [8]), 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
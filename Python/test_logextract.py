@@ -0,0 +1,106 @@
+########################################################################################
+# Tests of logextract.py with small synthetic logs of the TM tests and Performance runs,
+# run with:
+# python -m unittest test_logextract
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import logextract
+
+TmLog = b"""'dotnet.exe' (CoreCLR: clrhost): Loaded 'C:\\Program Files\\System.Runtime.dll'. Skipped loading symbols.
+-------------- 1 ---------------
+W: 1290, 1291, 1292,
+P:
+Current Input: 1 | Predicted Input: 2
+The thread 0x3a4 has exited with code 0 (0x0).
+-------------- 2 ---------------
+Item length: 4
+W: 7, 8,
+P: 7, 9,
+Current Input: 1,5 | Predicted Input: 3
+Inference mode
+-------------- next ---------------
+W: 10,
+something the extractor does not know
+"""
+
+PerformanceLog = b"""Compute time:
+1000 | 2933
+2000 | 2540
+----- 2 -----
+Init time: 17
+42
+1290, 1291,
+1300,
+"""
+
+
+class LogExtractTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, name, data):
+        fileName = os.path.join(self.folder, name)
+        with open(fileName, 'wb') as file:
+            file.write(data)
+        return fileName
+
+    def testTmCycles(self):
+        columns, meta = logextract.extractLog(self.write('tm.txt', TmLog.replace(b'\n', b'\r\n')))
+        self.assertEqual(columns['cycle'].tolist(), [1, 2, 3])
+        np.testing.assert_array_equal(columns['input'], [1, 1.5, np.nan])
+        np.testing.assert_array_equal(columns['predictedInput'], [2, 3, np.nan])
+        self.assertEqual(columns['inference'].tolist(), [False, True, False])
+        self.assertEqual([logextract.cycleCells(columns, 'winnerCells', t).tolist() for t in range(3)],
+                         [[1290, 1291, 1292], [7, 8], [10]])
+        self.assertEqual([logextract.cycleCells(columns, 'predictiveCells', t).tolist() for t in range(3)],
+                         [[], [7, 9], []])
+        # two lines of debugger output and the 'Item length' line
+        self.assertEqual((meta['droppedLines'], meta['unknownLines']), (3, 1))
+        self.assertEqual(len(columns['time']), 0)
+
+    def testTimingsAndCellRows(self):
+        columns, meta = logextract.extractLog(self.write('performance.txt', PerformanceLog))
+        self.assertEqual(meta['sections'], ['', 'Compute time', 'Init time'])
+        self.assertEqual(columns['run'].tolist(), [0, 0, 2])
+        self.assertEqual([meta['sections'][s] for s in columns['section']],
+                         ['Compute time', 'Compute time', 'Init time'])
+        np.testing.assert_array_equal(columns['parameter'], [1000, 2000, np.nan])
+        self.assertEqual(columns['time'].tolist(), [2933, 2540, 17])
+        # the plain number above the cell rows is their label
+        self.assertEqual(columns['cellRowLabel'].tolist(), [42, 42])
+        self.assertEqual(logextract.cycleCells(columns, 'cellRows', 0).tolist(), [1290, 1291])
+        self.assertEqual(logextract.cycleCells(columns, 'cellRows', 1).tolist(), [1300])
+
+    def testTrailingNumberIsTiming(self):
+        columns, _ = logextract.extractLog(self.write('numbers.txt', b'Load time:\n1,5 | 2,25\n12.5\n'))
+        self.assertEqual(columns['parameter'][0], 1.5)
+        self.assertEqual(columns['time'].tolist(), [2.25, 12.5])
+        self.assertEqual(len(columns['cellRowLabel']), 0)
+
+    def testLoadLogCache(self):
+        fileName = self.write('tm.txt', TmLog)
+        cacheDir = os.path.join(self.folder, 'cache')
+        columns, meta = logextract.loadLog(fileName, cacheDir)
+        self.assertEqual(columns['cycle'].tolist(), [1, 2, 3])
+        self.assertTrue(os.path.isdir(cacheDir))
+
+        # an edited log is extracted again
+        with open(fileName, 'ab') as file:
+            file.write(b'-------------- 7 ---------------\nW: 1,\n')
+        columns, meta = logextract.loadLog(fileName, cacheDir)
+        self.assertEqual(columns['cycle'].tolist(), [1, 2, 3, 7])
+        del columns
+
+
+if __name__ == '__main__':
+    unittest.main()
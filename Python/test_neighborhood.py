@@ -0,0 +1,78 @@
+########################################################################################
+# Tests of neighborhood.py against the checked-in CSV dumps of the NeighborhoodTest and
+# a loop over the neighbor coordinates, run with:
+# python -m unittest test_neighborhood
+########################################################################################
+
+import glob
+import itertools
+import os
+import unittest
+import numpy as np
+
+import neighborhood
+
+DumpFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'NeighborhoodTest')
+
+
+def naiveNeighborhood(center, dimensions, radius, wrap, columnMajor=False):
+    coords = np.unravel_index(center, dimensions, order='F' if columnMajor else 'C')
+    ranges = []
+    for c, dim in zip(coords, dimensions):
+        if wrap:
+            ranges.append([(c + o) % dim for o in range(-radius, min(-radius + dim - 1, radius) + 1)])
+        else:
+            ranges.append([p for p in range(c - radius, c + radius + 1) if 0 <= p < dim])
+    # the last dimension changes fastest with both orderings of the flat indices
+    return [int(np.ravel_multi_index(p, dimensions, order='F' if columnMajor else 'C'))
+            for p in itertools.product(*ranges)]
+
+
+class NeighborhoodTest(unittest.TestCase):
+
+    def testDumps(self):
+        fileNames = sorted(glob.glob(os.path.join(DumpFolder, 'neighborhood-test-rad*-center-from-64-to-0.csv')))
+        self.assertEqual(len(fileNames), 5)
+        for fileName in fileNames:
+            numColumns, radius, rows = neighborhood.readNeighborhoodTest(fileName)
+            self.assertEqual(numColumns, 64)
+            self.assertEqual(sorted(rows), list(range(64)))
+            self.assertEqual(neighborhood.checkFile(fileName), [], fileName)
+
+    def testDumpDifference(self):
+        fileName = os.path.join(DumpFolder, 'neighborhood-test-rad5-center-from-64-to-0.csv')
+        # the clipped neighborhoods of the dump differ from the wrapping ones at the borders
+        differences = neighborhood.checkFile(fileName, wrap=True)
+        self.assertEqual([center for center, _, _ in differences], list(range(5)) + list(range(59, 64)))
+
+    def testLoop(self):
+        for dimensions, radius in [([10], 3), ([7, 9], 2), ([4, 5, 6], 1), ([3, 8], 4)]:
+            for wrap in [False, True]:
+                for columnMajor in [False, True]:
+                    nbs = neighborhood.neighborhoods(dimensions, radius, wrap, columnMajor)
+                    for center in range(int(np.prod(dimensions))):
+                        self.assertEqual(nbs.indices[nbs.offsets[center]:nbs.offsets[center + 1]].tolist(),
+                                         naiveNeighborhood(center, dimensions, radius, wrap, columnMajor),
+                                         (dimensions, radius, wrap, columnMajor, center))
+
+    def testChunks(self):
+        whole = neighborhood.neighborhoods([20, 30], 3, True)
+        chunkPairs = neighborhood._chunkPairs
+        neighborhood._chunkPairs = 100
+        try:
+            chunked = neighborhood._neighborhoods.__wrapped__((20, 30), 3, True, False)
+        finally:
+            neighborhood._chunkPairs = chunkPairs
+        np.testing.assert_array_equal(chunked.indices, whole.indices)
+        np.testing.assert_array_equal(chunked.offsets, whole.offsets)
+
+    def testCachedAndReadOnly(self):
+        nbs = neighborhood.neighborhoods([16, 16], 2)
+        self.assertIs(neighborhood.neighborhoods((16, 16), 2.0), nbs)
+        with self.assertRaises(ValueError):
+            nbs.indices[0] = 1
+        self.assertEqual(neighborhood.neighborhood(0, [16, 16], 2).tolist(), [0, 1, 2, 16, 17, 18, 32, 33, 34])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+########################################################################################
+# Tests of quantsketch.py against the exact quantiles of numpy, run with:
+# python -m unittest test_quantsketch
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import quantsketch
+
+Qs = [0.0, 0.01, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+class QuantsketchTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.values = np.concatenate([rng.lognormal(8, 1.5, 5000), -rng.lognormal(2, 1, 500),
+                                      np.zeros(100)])
+        rng.shuffle(self.values)
+
+    def assertWithinAccuracy(self, sketch, values):
+        # the sketch returns the value of rank floor(q * (count - 1)) with a relative error
+        expected = np.quantile(values, Qs, method='lower')
+        res = sketch.quantiles(Qs)
+        self.assertTrue(np.all(np.abs(res - expected) <= sketch.relativeAccuracy * np.abs(expected) + 1e-12),
+                        (res, expected))
+
+    def testQuantiles(self):
+        for accuracy in [0.05, 0.01, 0.001]:
+            sketch = quantsketch.QuantileSketch(accuracy)
+            sketch.add(self.values)
+            self.assertWithinAccuracy(sketch, self.values)
+
+    def testExactStatistics(self):
+        sketch = quantsketch.QuantileSketch(0.01)
+        sketch.add(np.append(self.values, np.nan))
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertEqual(sketch.zeros, 100)
+        self.assertEqual((sketch.min, sketch.max), (self.values.min(), self.values.max()))
+        self.assertAlmostEqual(sketch.mean(), self.values.mean(), places=6)
+
+    def testEmpty(self):
+        sketch = quantsketch.QuantileSketch()
+        sketch.add([])
+        self.assertTrue(np.all(np.isnan(sketch.quantiles([0.5, 0.9]))))
+        self.assertTrue(np.isnan(sketch.mean()))
+
+    def testMergeEqualsAdd(self):
+        whole = quantsketch.QuantileSketch(0.01)
+        whole.add(self.values)
+        merged = quantsketch.QuantileSketch(0.01)
+        for part in np.array_split(self.values, 7):
+            sketch = quantsketch.QuantileSketch(0.01)
+            sketch.add(part)
+            merged.merge(sketch)
+        self.assertEqual((merged.positive, merged.negative, merged.zeros, merged.count),
+                         (whole.positive, whole.negative, whole.zeros, whole.count))
+        self.assertEqual((merged.min, merged.max), (whole.min, whole.max))
+        np.testing.assert_array_equal(merged.quantiles(Qs), whole.quantiles(Qs))
+
+        with self.assertRaises(ValueError):
+            merged.merge(quantsketch.QuantileSketch(0.02))
+
+    def testBoxStats(self):
+        sketch = quantsketch.QuantileSketch(0.01)
+        sketch.add(self.values)
+        stats = sketch.boxStats('label')
+        self.assertEqual(stats['label'], 'label')
+        self.assertLessEqual(stats['whislo'], stats['q1'])
+        self.assertLessEqual(stats['q1'], stats['med'])
+        self.assertLessEqual(stats['med'], stats['q3'])
+        self.assertLessEqual(stats['q3'], stats['whishi'])
+        # the lognormal tail reaches far above q3 + 1.5 * IQR, the negative values not below q1 - 1.5 * IQR
+        self.assertEqual(stats['fliers'], [sketch.max])
+
+    def testSaveAndLoad(self):
+        first = quantsketch.QuantileSketch(0.01)
+        first.add(self.values)
+        empty = quantsketch.QuantileSketch(0.02)
+        folder = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(folder, 'sketches.json')
+            quantsketch.saveSketches(fileName, [('first', first), ('empty', empty)])
+            loaded = quantsketch.loadSketches(fileName)
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual([name for name, _ in loaded], ['first', 'empty'])
+        sketch = loaded[0][1]
+        self.assertEqual(sketch.toDict(), first.toDict())
+        np.testing.assert_array_equal(sketch.quantiles(Qs), first.quantiles(Qs))
+        self.assertEqual((loaded[1][1].count, loaded[1][1].relativeAccuracy), (0, 0.02))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+########################################################################################
+# Tests of sdrcache.py, the cached arrays must equal the parsed text files, run with:
+# python -m unittest test_sdrcache
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import sdrcache
+import sdrio
+
+Trace = b'39, 45, 93,\n\n7, 166,\n'
+TableText = 'header\nfirst|1|2.5|\nsecond|3\n\nthird|4|5|6\n'
+
+
+class SdrcacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, name, data, mode='wb'):
+        fileName = os.path.join(self.folder, name)
+        with open(fileName, mode) as file:
+            file.write(data)
+        return fileName
+
+    def testSdrTrace(self):
+        fileName = self.write('activity.csv', Trace)
+        trace = sdrcache.loadSdrTrace(fileName)
+        expected = sdrio.readSdrFile(fileName)
+        np.testing.assert_array_equal(trace.indices, expected.indices)
+        np.testing.assert_array_equal(trace.offsets, expected.offsets)
+        self.assertEqual((trace.minCell, trace.maxCell), (7, 166))
+        self.assertTrue(os.path.isfile(sdrcache.cachePaths(fileName)['meta']))
+        self.assertTrue(os.path.dirname(sdrcache.cachePaths(fileName)['meta']).endswith(sdrcache.CacheDirName))
+
+    def testRebuiltWhenSourceChanges(self):
+        fileName = self.write('activity.csv', Trace)
+        self.assertEqual(len(sdrcache.loadSdrTrace(fileName).offsets), 4)
+        self.write('activity.csv', b'1, 2,\n', 'ab')
+        trace = sdrcache.loadSdrTrace(fileName)
+        self.assertEqual(len(trace.offsets), 5)
+        self.assertEqual(trace.indices[-2:].tolist(), [1, 2])
+
+    def testTable(self):
+        fileName = self.write('table.txt', TableText, 'w')
+        table = sdrcache.loadTable(fileName, '|', labelColumn=True, skipRows=1)
+        self.assertEqual(table.labels.tolist(), ['first', 'second', 'third'])
+        self.assertEqual([table.values[table.offsets[t]:table.offsets[t + 1]].tolist() for t in range(3)],
+                         [[1, 2.5], [3], [4, 5, 6]])
+        # a different delimiter or header is another cache entry
+        plain = sdrcache.loadTable(fileName, '|', skipRows=5)
+        self.assertEqual(plain.values.tolist(), [])
+
+    def testCacheDir(self):
+        fileName = self.write('activity.csv', Trace)
+        cacheDir = os.path.join(self.folder, 'elsewhere')
+        sdrcache.loadSdrTrace(fileName, cacheDir)
+        self.assertEqual(sorted(os.listdir(cacheDir)),
+                         ['activity.csv.meta.json', 'activity.csv.offsets.npy', 'activity.csv.values.npy'])
+        self.assertFalse(os.path.exists(os.path.join(self.folder, sdrcache.CacheDirName)))
+
+    @unittest.skipIf(os.name == 'nt', 'Windows has no permission bits')
+    def testFileMode(self):
+        fileName = self.write('activity.csv', Trace)
+        cacheDir = os.path.join(self.folder, 'cache')
+        umask = os.umask(0o022)
+        try:
+            sdrcache.loadSdrTrace(fileName, cacheDir)
+        finally:
+            os.umask(umask)
+        # the cache files are readable by other users like the trace, not 0600 from mkstemp
+        for name in os.listdir(cacheDir):
+            self.assertEqual(os.stat(os.path.join(cacheDir, name)).st_mode & 0o777, 0o644, name)
+
+    def testUnknownKind(self):
+        fileName = self.write('activity.csv', Trace)
+        with self.assertRaises(ValueError):
+            sdrcache.convert(fileName, kind='image')
+
+
+if __name__ == '__main__':
+    unittest.main()
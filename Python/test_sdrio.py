@@ -0,0 +1,129 @@
+########################################################################################
+# Tests of sdrio.py, run from this folder with:
+# python -m unittest test_sdrio
+# python -m pytest -q
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import sdrio
+
+Sample = b'39, 45, 93, 100, 116,\n\n39, 45, 93, 100, 145, 166,\n7,\n'
+
+
+def rowsOf(indices, offsets):
+    return [indices[offsets[t]:offsets[t + 1]].tolist() for t in range(len(offsets) - 1)]
+
+
+class SdrioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.folder, 'activity.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, data, mode='wb'):
+        with open(self.fileName, mode) as file:
+            file.write(data)
+
+    def testParseSdrBlock(self):
+        indices, offsets = sdrio.parseSdrBlock(Sample)
+        self.assertEqual(indices.dtype, np.int32)
+        self.assertEqual(rowsOf(indices, offsets),
+                         [[39, 45, 93, 100, 116], [], [39, 45, 93, 100, 145, 166], [7]])
+
+    def testParseWithoutTrailingComma(self):
+        indices, offsets = sdrio.parseSdrBlock(b'1,2 , 3\r\n-4, 5')
+        self.assertEqual(rowsOf(indices, offsets), [[1, 2, 3], [-4, 5]])
+
+    def testParseEmpty(self):
+        indices, offsets = sdrio.parseSdrBlock(b'')
+        self.assertEqual(len(indices), 0)
+        self.assertEqual(offsets.tolist(), [0])
+
+    def testTooManyDigits(self):
+        with self.assertRaises(ValueError):
+            sdrio.parseSdrBlock(b'1234567890,\n')
+
+    def testReadSdrFile(self):
+        self.write(Sample)
+        trace = sdrio.readSdrFile(self.fileName)
+        self.assertEqual(len(trace.offsets), 5)
+        self.assertEqual((trace.minCell, trace.maxCell), (7, 166))
+
+    def testBlocksSplitInsideOfLines(self):
+        # blocks of 7 bytes end inside of numbers and lines
+        self.write(Sample)
+        rows = [row.tolist() for row in sdrio.iterSdrRows(self.fileName, blockSize=7)]
+        self.assertEqual(rows, rowsOf(*sdrio.parseSdrBlock(Sample)))
+
+    def testLastLineWithoutLineBreak(self):
+        self.write(b'1, 2,\n3, 4')
+        self.assertEqual([row.tolist() for row in sdrio.iterSdrRows(self.fileName, blockSize=4)],
+                         [[1, 2], [3, 4]])
+
+    def testStartCycle(self):
+        self.write(Sample)
+        for blockSize in [3, 8, 1 << 20]:
+            rows = [row.tolist() for row in sdrio.iterSdrRows(self.fileName, 2, blockSize)]
+            self.assertEqual(rows, [[39, 45, 93, 100, 145, 166], [7]])
+        self.assertEqual(list(sdrio.iterSdrRows(self.fileName, 10)), [])
+
+    def testDownsample(self):
+        rows = [np.array([t, 10 + t]) for t in range(5)]
+        self.assertEqual([row.tolist() for row in sdrio.downsampleRows(iter(rows), 2, 'nth')],
+                         [[0, 10], [2, 12], [4, 14]])
+        self.assertEqual([row.tolist() for row in sdrio.downsampleRows(iter(rows), 2, 'or')],
+                         [[0, 1, 10, 11], [2, 3, 12, 13], [4, 14]])
+        with self.assertRaises(ValueError):
+            list(sdrio.downsampleRows(iter(rows), 2, 'and'))
+
+    def testWindowStopsReading(self):
+        def rows():
+            for t in range(3):
+                yield np.array([t])
+            raise AssertionError('read after the window')
+        trace = sdrio.windowRows(rows(), maxCycles=3)
+        self.assertEqual(trace.offsets.tolist(), [0, 1, 2, 3])
+
+    def testFollowerPartialLine(self):
+        self.write(b'1, 2,\n3, ')
+        follower = sdrio.SdrFollower(self.fileName)
+        self.assertEqual([row.tolist() for row in follower.readNew()], [[1, 2]])
+        self.assertEqual(follower.readNew(), [])
+
+        self.write(b'4,\n5,\n', 'ab')
+        self.assertEqual([row.tolist() for row in follower.readNew()], [[3, 4], [5]])
+        self.assertEqual(follower.cycles, 3)
+
+    def testFollowerTruncatedFile(self):
+        self.write(b'1, 2,\n3, 4,\n')
+        follower = sdrio.SdrFollower(self.fileName)
+        self.assertEqual(len(follower.readNew()), 2)
+
+        self.write(b'5,\n')
+        self.assertIsNone(follower.readNew())
+        self.assertEqual((follower.offset, follower.cycles), (0, 0))
+        self.assertEqual([row.tolist() for row in follower.readNew()], [[5]])
+
+    def testFollowerChunks(self):
+        self.write(b''.join(sdrio.formatSdrRow(range(t, t + 3)).encode() for t in range(10)) +
+                   sdrio.formatSdrRow(range(100)).encode())
+        follower = sdrio.SdrFollower(self.fileName)
+        rows = []
+        while True:
+            newRows = follower.readNew(maxBytes=16)
+            if len(newRows) == 0:
+                break
+            rows.extend(row.tolist() for row in newRows)
+        self.assertEqual(rows, [list(range(t, t + 3)) for t in range(10)] + [list(range(100))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+########################################################################################
+# Tests of sdrmath.py against exact big integer binomials (math.comb), run with:
+# python -m unittest test_sdrmath
+########################################################################################
+
+import math
+import unittest
+import numpy as np
+
+import sdrmath
+
+
+def exactLogFalsePositive(n, a, theta, b):
+    num = sum(math.comb(a, q) * math.comb(n - a, b - q) for q in range(max(theta, 0), min(a, b) + 1))
+    if num == 0:
+        return -math.inf
+    # math.log accepts big integers beyond the float range
+    return math.log(num) - math.log(math.comb(n, b))
+
+
+class SdrmathTest(unittest.TestCase):
+
+    def testExactBinomial(self):
+        for n, k in [(0, 0), (10, 3), (2048, 40), (4096, 2048)]:
+            self.assertEqual(sdrmath.exactBinomial(n, k), math.comb(n, k))
+        self.assertEqual(sdrmath.exactBinomial(5, 6), 0)
+        self.assertEqual(sdrmath.exactBinomial(5, -1), 0)
+
+    def testLogBinomial(self):
+        n = np.array([10, 100, 2048, 65536])
+        k = np.array([3, 50, 40, 1000])
+        expected = [math.log(math.comb(int(nn), int(kk))) for nn, kk in zip(n, k)]
+        np.testing.assert_allclose(sdrmath.logBinomial(n, k), expected, rtol=1e-12)
+        self.assertEqual(sdrmath.logBinomial(5, 6), -np.inf)
+        self.assertEqual(sdrmath.logBinomial(5, -1), -np.inf)
+
+    def testLogOverlapProbability(self):
+        n, a, b = 1024, 20, 25
+        q = np.arange(0, 21)
+        expected = [math.log(math.comb(a, int(x)) * math.comb(n - a, b - int(x))) - math.log(math.comb(n, b))
+                    for x in q]
+        np.testing.assert_allclose(sdrmath.logOverlapProbability(n, a, q, b), expected, rtol=1e-10)
+
+    def testLogFalsePositiveProbability(self):
+        for n, a, b in [(2048, 40, 40), (1024, 20, 35), (100, 60, 70), (16384, 300, 200)]:
+            theta = np.arange(-1, min(a, b) + 3)
+            res = sdrmath.logFalsePositiveProbability(n, a, theta, b)
+            expected = [exactLogFalsePositive(n, a, int(t), b) for t in theta]
+            finite = np.isfinite(expected)
+            np.testing.assert_array_equal(np.isfinite(res), finite)
+            np.testing.assert_allclose(res[finite], np.array(expected)[finite], rtol=1e-9, atol=1e-9)
+
+    def testBroadcasting(self):
+        n = np.array([[1024], [2048]])
+        theta = np.array([5, 10, 15])
+        res = sdrmath.logFalsePositiveProbability(n, 20, theta)
+        self.assertEqual(res.shape, (2, 3))
+        for i in range(2):
+            for j in range(3):
+                self.assertAlmostEqual(res[i, j], exactLogFalsePositive(int(n[i, 0]), 20, int(theta[j]), 20),
+                                       places=9)
+
+    def testExactVariants(self):
+        value = sdrmath.falsePositiveProbability(2048, 40, 10, exact=True)
+        self.assertAlmostEqual(math.log(value), exactLogFalsePositive(2048, 40, 10, 40), places=12)
+        value = sdrmath.overlapProbability(2048, 40, 10, exact=True)
+        self.assertAlmostEqual(math.log(value), math.log(math.comb(40, 10) * math.comb(2008, 30)) -
+                               math.log(math.comb(2048, 40)), places=12)
+
+    def testUnionCapacity(self):
+        maxError = 1e-6
+        for n, a, theta in [(2048, 40, 20), (4096, 64, 32)]:
+            capacity = int(sdrmath.unionCapacity(n, a, theta, maxError))
+            self.assertGreater(capacity, 1)
+            self.assertLessEqual(sdrmath.logUnionFalsePositiveProbability(n, a, theta, capacity),
+                                 math.log(maxError))
+            self.assertGreater(sdrmath.logUnionFalsePositiveProbability(n, a, theta, capacity + 1),
+                               math.log(maxError))
+        self.assertEqual(sdrmath.unionCapacity(2048, 40, 1, 1e-6), 0)
+
+    def testFormatLog(self):
+        for value in [1.5e-5, 0.25, 3.0, 9.9996e-05]:
+            self.assertEqual(sdrmath.formatLog(math.log(value)), '%10.3E' % value)
+        self.assertEqual(sdrmath.formatLog(math.log(1.5) - 2000 * math.log(10)), '1.500E-2000')
+        self.assertEqual(sdrmath.formatLog(-np.inf), '%10.3E' % 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+########################################################################################
+# Tests of sdroverlap.py against overlaps counted with Python sets, run with:
+# python -m unittest test_sdroverlap
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import sdrio
+import sdroverlap
+
+
+def randomRows(rng, numRows, numCells):
+    rows = [rng.choice(numCells, size=rng.integers(0, 12), replace=False) for _ in range(numRows)]
+    # one row with a cell listed twice
+    rows[1] = np.array([3, 3, 5])
+    return rows
+
+
+class SdroverlapTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.rowsA = randomRows(rng, 23, 60)
+        self.rowsB = randomRows(rng, 17, 60)
+        self.A = sdroverlap.sdrMatrix(sdrio.rowsToTrace(self.rowsA), 60)
+        self.B = sdroverlap.sdrMatrix(sdrio.rowsToTrace(self.rowsB), 60)
+
+    def naive(self, metric):
+        res = np.zeros((len(self.rowsA), len(self.rowsB)))
+        for i, rowA in enumerate(self.rowsA):
+            for j, rowB in enumerate(self.rowsB):
+                a, b = set(rowA.tolist()), set(rowB.tolist())
+                common = len(a & b)
+                if metric == 'overlap':
+                    res[i, j] = common
+                elif metric == 'percent' and min(len(a), len(b)) > 0:
+                    res[i, j] = common / min(len(a), len(b))
+                elif metric == 'jaccard' and len(a | b) > 0:
+                    res[i, j] = common / len(a | b)
+        return res
+
+    def testSdrMatrix(self):
+        self.assertEqual(self.A.shape, (23, 60))
+        self.assertEqual(sdroverlap.rowSizes(self.A).tolist(), [len(set(row.tolist())) for row in self.rowsA])
+
+    def testOverlapMatrix(self):
+        np.testing.assert_array_equal(sdroverlap.overlapMatrix(self.A, self.B), self.naive('overlap'))
+
+    def testPercentAndJaccard(self):
+        np.testing.assert_allclose(sdroverlap.percentOverlapMatrix(self.A, self.B), self.naive('percent'),
+                                   rtol=1e-6)
+        np.testing.assert_allclose(sdroverlap.jaccardMatrix(self.A, self.B), self.naive('jaccard'), rtol=1e-6)
+
+    def testBlockedOverlap(self):
+        folder = tempfile.mkdtemp()
+        try:
+            for metric in sdroverlap.Metrics:
+                fileName = os.path.join(folder, metric + '.npy')
+                res = sdroverlap.blockedOverlap(fileName, self.A, self.B, metric, blockSize=5)
+                np.testing.assert_allclose(res, self.naive(metric), rtol=1e-6)
+                del res
+        finally:
+            shutil.rmtree(folder)
+
+    def testUnknownMetric(self):
+        with self.assertRaises(ValueError):
+            sdroverlap.blockedOverlap('unused.npy', self.A, metric='cosine')
+
+
+if __name__ == '__main__':
+    unittest.main()
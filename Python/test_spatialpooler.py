@@ -0,0 +1,112 @@
+########################################################################################
+# Tests of spatialpooler.py against dense loops over small topologies, run with:
+# python -m unittest test_spatialpooler
+########################################################################################
+
+import unittest
+import numpy as np
+import scipy.sparse
+
+import neighborhood
+import spatialpooler
+
+
+def smallPooler(**kwargs):
+    params = dict(potentialRadius=3, potentialPct=0.5, globalInhibition=True, localAreaDensity=0.1,
+                  stimulusThreshold=2.0, seed=1)
+    params.update(kwargs)
+    return spatialpooler.SpatialPooler([10, 10], [8, 8], **params)
+
+
+def randomInputs(numInputs, seed=4):
+    return (np.random.default_rng(seed).random((numInputs, 100)) < 0.2).astype(np.int8)
+
+
+class SpatialPoolerTest(unittest.TestCase):
+
+    def testPotentialPools(self):
+        sp = smallPooler()
+        centers = sp._mapColumns()
+        nbs = neighborhood.neighborhoods([10, 10], 3, True)
+        for column in range(sp.numColumns):
+            pool = sp.potential[sp.offsets[column]:sp.offsets[column + 1]]
+            field = nbs.indices[nbs.offsets[centers[column]]:nbs.offsets[centers[column] + 1]]
+            self.assertEqual(len(pool), int(len(field) * 0.5 + 0.5))
+            self.assertEqual(pool.tolist(), sorted(set(pool.tolist())))
+            self.assertTrue(set(pool.tolist()) <= set(field.tolist()))
+
+    def testSeed(self):
+        first, second, other = smallPooler(), smallPooler(), smallPooler(seed=2)
+        np.testing.assert_array_equal(first.potential, second.potential)
+        np.testing.assert_array_equal(first.permanences, second.permanences)
+        self.assertFalse(np.array_equal(first.permanences, other.permanences))
+
+    def testPermanenceInvariants(self):
+        sp = smallPooler()
+        sp.compute(randomInputs(20), learn=True)
+        perm = sp.permanences
+        self.assertTrue(np.all((perm == 0) | (perm > sp.synPermTrimThreshold)))
+        self.assertTrue(np.all(perm <= sp.synPermMax))
+        connected = np.add.reduceat(perm >= sp.synPermConnected, sp.offsets[:-1])
+        self.assertTrue(np.all(connected >= 2))
+        np.testing.assert_array_equal(sp.connected.data, perm >= sp.synPermConnected)
+
+    def testOverlaps(self):
+        sp = smallPooler()
+        inputs = randomInputs(6)
+        dense = np.zeros((sp.numColumns, sp.numInputs), dtype=np.int64)
+        dense[sp.synapseColumns, sp.potential] = sp.permanences >= sp.synPermConnected
+        expected = inputs.astype(np.int64) @ dense.T
+        expected[expected < 2] = 0
+        np.testing.assert_array_equal(sp.overlaps(inputs), expected)
+        np.testing.assert_array_equal(sp.overlaps(scipy.sparse.csr_matrix(inputs)), expected)
+        with self.assertRaises(ValueError):
+            sp.overlaps(np.zeros((1, 99)))
+
+    def testGlobalInhibition(self):
+        sp = smallPooler()
+        rng = np.random.default_rng(8)
+        overlaps = rng.integers(0, 5, size=(10, sp.numColumns)).astype(np.float64)
+        winners = sp.inhibitColumnsGlobal(overlaps, 0.1)
+        for row, mask in zip(overlaps, winners):
+            # stable ascending sort of the C# code, the last int(density * numColumns) win
+            order = sorted(range(sp.numColumns), key=lambda c: row[c])
+            expected = sorted(c for c in order[-6:] if row[c] >= 2)
+            self.assertEqual(np.flatnonzero(mask).tolist(), expected)
+
+    def testBatchWithoutLearning(self):
+        sp = smallPooler(globalInhibition=False)
+        inputs = randomInputs(8)
+        winners = sp.compute(inputs, learn=False)
+        for row, mask in zip(inputs, winners):
+            np.testing.assert_array_equal(sp.compute(row, learn=False), mask)
+        self.assertEqual(sp.iteration, 16)
+
+    def testSequentialLearning(self):
+        # learnBatch=1 learns input by input
+        inputs = randomInputs(12)
+        batch, single = smallPooler(), smallPooler()
+        winners = batch.compute(inputs, learn=True, learnBatch=1)
+        for row, mask in zip(inputs, winners):
+            np.testing.assert_array_equal(single.compute(row, learn=True), mask)
+        np.testing.assert_array_equal(batch.permanences, single.permanences)
+        np.testing.assert_allclose(batch.activeDutyCycles.activeDutyCycles,
+                                   single.activeDutyCycles.activeDutyCycles)
+
+    def testAdaptSynapses(self):
+        sp = smallPooler(stimulusThreshold=0.0)
+        inputs = randomInputs(1)
+        winners = np.zeros((1, sp.numColumns), dtype=bool)
+        winners[0, [3, 17]] = True
+        before = sp.permanences.copy()
+        sp.adaptSynapses(inputs, winners)
+        change = np.where(inputs[0][sp.potential] > 0, sp.synPermActiveInc, -sp.synPermInactiveDec)
+        expected = np.clip(before + change, 0, sp.synPermMax)
+        expected[expected <= sp.synPermTrimThreshold] = 0
+        adapted = np.isin(sp.synapseColumns, [3, 17])
+        np.testing.assert_allclose(sp.permanences[adapted], expected[adapted], atol=1e-6)
+        np.testing.assert_array_equal(sp.permanences[~adapted], before[~adapted])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+########################################################################################
+# Tests of spstability.py against overlaps and runs counted by hand, run with:
+# python -m unittest test_spstability
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import spstability
+
+# cycles 3..7 repeat the same SDR, cycle 8 changes one of four cells
+Rows = [[1, 2, 3, 4], [1, 2, 3, 5], [], [7, 8, 9, 10], [7, 8, 9, 10], [7, 8, 9, 10], [7, 8, 9, 10],
+        [7, 8, 9, 10], [7, 8, 9, 11]]
+
+
+class SpstabilityTest(unittest.TestCase):
+
+    def testPercentOverlap(self):
+        self.assertEqual(spstability.percentOverlap([1, 2, 3, 4], [2, 4]), 1.0)
+        self.assertEqual(spstability.percentOverlap([1, 2, 3, 4], [4, 5, 6]), 1.0 / 3)
+        self.assertEqual(spstability.percentOverlap([], [1]), 0.0)
+
+    def testAnalyzer(self):
+        analyzer = spstability.StabilityAnalyzer(window=3, stableCycles=4)
+        results = [analyzer.update(np.array(row)) for row in Rows]
+        self.assertEqual([overlap for overlap, _ in results], [None, 0.75, 0.0, 0.0, 1, 1, 1, 1, 0.75])
+        self.assertIsNone(results[0][1])
+        self.assertAlmostEqual(results[2][1], 0.375)
+        # mean of the last three overlaps
+        self.assertAlmostEqual(results[-1][1], (1 + 1 + 0.75) / 3)
+        self.assertEqual(analyzer.stableCycle, 3)
+
+    def testFindStableCycle(self):
+        self.assertEqual(spstability.findStableCycle(Rows, stableCycles=4), 3)
+        self.assertIsNone(spstability.findStableCycle(Rows, stableCycles=5))
+        # a lower threshold accepts the changed cell of the last cycle
+        self.assertEqual(spstability.findStableCycle(Rows, stableCycles=5, minOverlap=0.75), 3)
+
+        def rows():
+            for row in Rows[:7]:
+                yield row
+            raise AssertionError('read after the stable cycle')
+        self.assertEqual(spstability.findStableCycle(rows(), stableCycles=3), 3)
+
+    def testAnalyzeFile(self):
+        folder = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(folder, 'activity.csv')
+            with open(fileName, 'w') as file:
+                file.writelines(''.join('%d, ' % cell for cell in row) + '\n' for row in Rows)
+            cyclesFile = os.path.join(folder, 'cycles.csv')
+            result = spstability.analyzeFile(fileName, window=3, stableCycles=4, cyclesFile=cyclesFile)
+            with open(cyclesFile) as file:
+                lines = file.read().splitlines()
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual((result['cycles'], result['stableCycle']), (9, 3))
+        self.assertAlmostEqual(result['meanOverlap'], 5.5 / 8)
+        self.assertEqual(lines[:3], ['cycle,overlap,score', '0,,', '1,0.7500,0.7500'])
+        self.assertEqual(len(lines), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
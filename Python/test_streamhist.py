@@ -0,0 +1,75 @@
+########################################################################################
+# Tests of streamhist.py against np.histogram of all numbers, run with:
+# python -m unittest test_streamhist
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import streamhist
+
+
+class StreamhistTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        rng = np.random.default_rng(9)
+        self.values = [np.round(rng.normal(100, 30, 400), 3), np.round(rng.exponential(50, 250), 2)]
+        self.fileNames = []
+        for i, values in enumerate(self.values):
+            fileName = os.path.join(self.folder, 'data%d.txt' % i)
+            with open(fileName, 'w') as file:
+                file.write('# measurements %d\n' % i)
+                for row in np.array_split(values, 37):
+                    file.write(', '.join('%g' % v for v in row) + '  # comment, 1, 2\n')
+            self.fileNames.append(fileName)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testValueRange(self):
+        # blocks of 16 bytes end inside of numbers and comments
+        for blockSize in [16, 1 << 22]:
+            self.assertEqual(streamhist.valueRange(self.fileNames[0], blockSize),
+                             (self.values[0].min(), self.values[0].max()))
+
+    def testHistograms(self):
+        for workers in [1, 2]:
+            edges, counts = streamhist.histograms(self.fileNames, 28, workers=workers, blockSize=16)
+            allValues = np.concatenate(self.values)
+            np.testing.assert_allclose(edges, np.linspace(allValues.min(), allValues.max(), 28))
+            for values, row in zip(self.values, counts):
+                np.testing.assert_array_equal(row, np.histogram(values, edges)[0])
+            np.testing.assert_array_equal(streamhist.mergeHistograms(counts), np.histogram(allValues, edges)[0])
+
+    def testFixedRange(self):
+        edges, counts = streamhist.histograms(self.fileNames[:1], 11, valuesRange=(50, 150), workers=1)
+        self.assertEqual(edges.tolist(), list(range(50, 151, 10)))
+        inside = self.values[0][(self.values[0] >= 50) & (self.values[0] <= 150)]
+        self.assertEqual(counts.sum(), len(inside))
+
+    def testEmptyAndSingleValue(self):
+        empty = os.path.join(self.folder, 'empty.txt')
+        single = os.path.join(self.folder, 'single.txt')
+        with open(empty, 'w') as file:
+            file.write('# nothing\n\n')
+        with open(single, 'w') as file:
+            file.write('7, 7,\n7')
+        edges, counts = streamhist.histograms([empty], 3, workers=1)
+        self.assertEqual((edges.tolist(), counts.tolist()), ([0.0, 0.5, 1.0], [[0, 0]]))
+        edges, counts = streamhist.histograms([single], 3, workers=1)
+        self.assertEqual((edges.tolist(), counts.tolist()), ([6.5, 7.0, 7.5], [[0, 3]]))
+
+    def testInvalidNumber(self):
+        fileName = os.path.join(self.folder, 'invalid.txt')
+        with open(fileName, 'w') as file:
+            file.write('1, 2, x3\n')
+        with self.assertRaises(ValueError):
+            streamhist.valueRange(fileName)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+########################################################################################
+# Tests of temporalmemory.py with small repeated sequences, run with:
+# python -m unittest test_temporalmemory
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import sdrio
+import temporalmemory
+
+# four patterns of five disjoint columns
+Sequence = [np.arange(5) + 5 * i for i in range(4)]
+
+
+def smallMemory(**kwargs):
+    params = dict(cellsPerColumn=4, activationThreshold=3, minThreshold=2, maxNewSynapseCount=6,
+                  seed=3)
+    params.update(kwargs)
+    return temporalmemory.TemporalMemory(20, **params)
+
+
+def columnsOf(cells, cellsPerColumn=4):
+    return np.unique(np.asarray(cells) // cellsPerColumn).tolist()
+
+
+class TemporalMemoryTest(unittest.TestCase):
+
+    def learn(self, tm, repeat):
+        for _ in range(repeat):
+            for columns in Sequence:
+                tm.compute(columns, learn=True)
+            tm.reset()
+
+    def testBurstingFirstCycle(self):
+        tm = smallMemory()
+        active, winners, predictive = tm.compute(Sequence[0])
+        self.assertEqual(active.tolist(), list(range(20)))
+        self.assertEqual(columnsOf(winners), Sequence[0].tolist())
+        self.assertEqual(len(winners), 5)
+        self.assertEqual(len(predictive), 0)
+        # nothing to grow from in the first cycle
+        self.assertEqual((tm.numSegments, tm.numSynapses), (0, 0))
+
+    def testLearnsSequence(self):
+        tm = smallMemory()
+        self.learn(tm, 10)
+        for current, following in zip(Sequence, Sequence[1:]):
+            active, winners, predictive = tm.compute(current, learn=False)
+            self.assertEqual(columnsOf(predictive), following.tolist())
+        # the predicted columns do not burst, one active cell per column
+        active, _, _ = tm.compute(Sequence[0], learn=False)
+        active, _, _ = tm.compute(Sequence[1], learn=False)
+        self.assertEqual(len(active), 5)
+
+    def testNoLearning(self):
+        tm = smallMemory()
+        self.learn(tm, 3)
+        permanences = tm.synapsePermanence.copy()
+        numSegments = tm.numSegments
+        for columns in Sequence[::-1]:
+            tm.compute(columns, learn=False)
+        np.testing.assert_array_equal(tm.synapsePermanence, permanences)
+        self.assertEqual(tm.numSegments, numSegments)
+
+    def testSeed(self):
+        first, second = smallMemory(), smallMemory()
+        self.learn(first, 4)
+        self.learn(second, 4)
+        np.testing.assert_array_equal(first.synapseCell, second.synapseCell)
+        np.testing.assert_array_equal(first.segmentCell, second.segmentCell)
+
+    def testComputeActivity(self):
+        tm = smallMemory()
+        self.learn(tm, 4)
+        activeCells = np.arange(0, 80, 3)
+        numConnected, numPotential = tm.computeActivity(activeCells)
+        for segment in range(len(tm.segmentCell)):
+            synapses = [i for i in range(len(tm.synapseSegment))
+                        if tm.synapseAlive[i] and tm.synapseSegment[i] == segment and tm.synapseCell[i] in activeCells]
+            self.assertEqual(numPotential[segment], len(synapses))
+            self.assertEqual(numConnected[segment],
+                             sum(tm.synapsePermanence[i] > tm.connectedPermanence - temporalmemory.Epsilon
+                                 for i in synapses))
+
+    def testSynapseLimit(self):
+        tm = smallMemory(maxSynapsesPerSegment=3, maxNewSynapseCount=5)
+        self.learn(tm, 5)
+        counts = np.bincount(tm.synapseSegment[tm.synapseAlive], minlength=len(tm.segmentCell))
+        self.assertLessEqual(counts.max(), 3)
+
+    def testReplayFile(self):
+        folder = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(folder, 'columns.csv')
+            with open(fileName, 'w') as file:
+                file.writelines(sdrio.formatSdrRow(columns) for columns in Sequence * 2)
+            activeFile = os.path.join(folder, 'active.csv')
+            scores = temporalmemory.replayFile(fileName, smallMemory(), repeat=8, resetEvery=4,
+                                               activeFile=activeFile)
+            rows = list(sdrio.iterSdrRows(activeFile))
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual(len(scores), 8)
+        self.assertEqual(scores[0], 0.0)
+        self.assertGreater(scores[-1], 0.7)
+        self.assertEqual(columnsOf(rows[0]), Sequence[0].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+########################################################################################
+# Tests of valueio.py for numbers and lines split by the blocks, run with:
+# python -m unittest test_valueio
+########################################################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import valueio
+
+
+class ValueioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.folder, 'values.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, data):
+        with open(self.fileName, 'wb') as file:
+            file.write(data)
+
+    def testParseValues(self):
+        self.assertEqual(valueio.parseValues(b'1, 2.5\n-3e2 # 4, 5\n,6').tolist(), [1, 2.5, -300, 6])
+        self.assertEqual(len(valueio.parseValues(b' \n# only a comment\n')), 0)
+        with self.assertRaises(ValueError):
+            valueio.parseValues(b'1, 2, three')
+
+    def testIterValues(self):
+        self.write(b'# header, 1, 2\n10, 20.25, 30\n\n-4,5 # tail\n6')
+        for blockSize in [1, 3, 7, 1 << 22]:
+            values = np.concatenate(list(valueio.iterValues(self.fileName, blockSize)))
+            self.assertEqual(values.tolist(), [10, 20.25, 30, -4, 5, 6], blockSize)
+
+    def testIterLineBlocks(self):
+        lines = [b'a|1|2|3', b'', b'b|' + b'|'.join(b'%d' % i for i in range(100)), b'c|4']
+        self.write(b'\n'.join(lines))
+        for blockSize in [8, 50, 1 << 22]:
+            pieces = list(valueio.iterLineBlocks(self.fileName, b'|', blockSize))
+            joined = [b''.join(data for index, data in pieces if index == i) for i in range(len(lines))]
+            self.assertEqual(joined, lines, blockSize)
+            # every piece but the last one of a line ends with the separator
+            for (index, data), (nextIndex, _) in zip(pieces, pieces[1:]):
+                if index == nextIndex:
+                    self.assertTrue(data.endswith(b'|'))
+        self.assertGreater(len(list(valueio.iterLineBlocks(self.fileName, b'|', 8))), len(lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+########################################################################################
+# Block-wise parser of text files with numbers (measurement series, histogram input).
+# Numbers are separated by commas, white space or line breaks, '#' starts a comment.
+# Files are read in blocks of complete numbers, so memory does not depend on the file
+# size or on the length of a line:
+#  - iterValues streams all numbers of a file
+#  - iterLineBlocks streams the lines, long lines in pieces that end at a separator
+# Example:
+#   import valueio
+#   for lineIndex, data in valueio.iterLineBlocks('series.txt', b'|'):
+#       values = valueio.parseValues(data.replace(b'|', b' '))
+########################################################################################
+
+import re
+import warnings
+import numpy as np
+
+_comment = re.compile(rb'#[^\n]*')
+_commasToSpaces = bytes.maketrans(b',', b' ')
+
+
+def parseValues(data):
+    """
+    Parses a block of text into a float64 array.
+    """
+    if b'#' in data:
+        data = _comment.sub(b'', data)
+    data = data.translate(_commasToSpaces)
+    if len(data.strip()) == 0:
+        # fromstring returns [-1] for white space only
+        return np.empty(0)
+    # fromstring parses in C. Older NumPy versions only warn when it stops at
+    # an invalid number, newer ones raise ValueError.
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            return np.fromstring(data, sep=' ')
+        except (DeprecationWarning, ValueError):
+            raise ValueError("Invalid number in '%s...'." % data[:40].decode(errors='replace').strip())
+
+
+def iterValues(fileName, blockSize=1 << 22):
+    """
+    Streams the numbers of a file as arrays of about blockSize bytes.
+
+    @return generator of float64 arrays
+    """
+    rest = b''
+    with open(fileName, 'rb') as file:
+        while True:
+            block = file.read(blockSize)
+            if not block:
+                break
+
+            data = rest + block
+            # a number or a comment may continue in the next block
+            last = max(data.rfind(b'\n'), data.rfind(b','))
+            if last < 0 or data.rfind(b'#') > data.rfind(b'\n'):
+                last = data.rfind(b'\n')
+            if last < 0:
+                rest = data
+                continue
+            rest = data[last + 1:]
+            values = parseValues(data[:last + 1])
+            if len(values) > 0:
+                yield values
+
+    if len(rest) > 0:
+        values = parseValues(rest)
+        if len(values) > 0:
+            yield values
+
+
+def iterLineBlocks(fileName, separator=b',', blockSize=1 << 22):
+    """
+    Streams the lines of a file without the line breaks. A line longer than
+    blockSize is returned in several pieces, every piece but the last one ends
+    with separator, so no number is split.
+
+    @param separator (bytes) separator of the numbers inside of a line
+
+    @return generator of (lineIndex, bytes), at least one piece per line
+    """
+    lineIndex = 0
+    rest = b''
+    with open(fileName, 'rb') as file:
+        while True:
+            block = file.read(blockSize)
+            data = rest + block
+            start = 0
+            while True:
+                end = data.find(b'\n', start)
+                if end < 0:
+                    break
+                yield lineIndex, data[start:end]
+                lineIndex += 1
+                start = end + 1
+            rest = data[start:]
+
+            if not block:
+                if len(rest) > 0:
+                    yield lineIndex, rest
+                return
+            cut = rest.rfind(separator)
+            if cut >= 0 and len(rest) >= blockSize:
+                yield lineIndex, rest[:cut + len(separator)]
+                rest = rest[cut + len(separator):]